@@ -0,0 +1,6 @@
+"""
+@PACKAGEDESC: This package holds the benchmark harness of the documenter. It generates synthetic libraries of any
+size and times every phase of a documentation build separately: directory walk, import scan, ast extraction,
+library assembly, html rendering and writing to disk. Results are reported as JSON so they can be compared
+between versions.
+"""
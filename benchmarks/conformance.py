@@ -0,0 +1,94 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+
+Checks that the skeleton parse gives the same definitions as parsing the whole syntax tree. Run from the
+repository root, e.g.
+python -m benchmarks.conformance -i C:/MyProject
+python -m benchmarks.conformance --files 500
+"""
+
+from benchmarks.synthetic_library import generate_library
+from python_file_parser.directory_file_searcher import DirectoryScanner
+from python_file_parser.file_parser import FileParser
+from python_file_parser.skeleton_extractor import get_skeleton
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+
+def describe_module(module):
+    """
+    :param module: ModuleDefinition
+    :return: everything the docs show of a module, as comparable tuples.
+    """
+    def describe_functions(functions):
+        return [(f.get_name(), f.get_docstring(), f.get_parameters()) for f in functions]
+
+    return dict(docstring=module.get_docstring(), package_docstring=module.get_package_docstring(),
+                imports=module.get_imports(), functions=describe_functions(module.get_functions()),
+                classes=[(c.get_name(), c.get_docstring(), describe_functions(c.get_functions()))
+                         for c in module.get_classes()])
+
+
+def check_conformance(files):
+    """
+    Parses every file with and without the skeleton and compares the results.
+    :param files: .py file paths.
+    :return: dict with the number of files, of files parsed as a whole because no skeleton could be built, and the
+    mismatches as a list of (file, differing fields).
+    """
+    fast_parser, full_parser = FileParser(fast=True), FileParser()
+    fallbacks, mismatches = 0, []
+    for file in files:
+        try:
+            with open(file, 'r') as f:
+                if get_skeleton(f.read()) is None:
+                    fallbacks += 1
+        except Exception:
+            pass
+        # Both parsers report the files they cannot process, which is part of the comparison.
+        fast_output, full_output = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(fast_output):
+            fast = describe_module(fast_parser.parse_module(file))
+        with contextlib.redirect_stdout(full_output):
+            full = describe_module(full_parser.parse_module(file))
+        fast['errors'], full['errors'] = fast_output.getvalue(), full_output.getvalue()
+        fields = sorted(field for field in full if fast[field] != full[field])
+        if fields:
+            mismatches.append((file, fields))
+    return dict(files=len(files), fallbacks=fallbacks, mismatches=mismatches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YAYPD conformance: compares the skeleton parse with the full '
+                                                 'syntax tree parse.')
+    parser.add_argument('-i', '--library_path', type=str, action='append',
+                        help='Check an existing library instead of a generated one. Can be given several times.')
+    parser.add_argument('--files', type=int, default=200, help='Number of generated modules.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the generator.')
+    args = parser.parse_args()
+
+    work_directory = tempfile.mkdtemp(prefix='yaypd_conformance_')
+    try:
+        library_paths = args.library_path
+        if not library_paths:
+            library_paths = [os.path.join(work_directory, 'SyntheticLibrary')]
+            generate_library(library_paths[0], files=args.files, seed=args.seed)
+        files = [file.path for library_path in library_paths
+                 for directory in DirectoryScanner().scan(os.path.abspath(library_path)) for file in directory.files]
+        report = check_conformance(files)
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report['mismatches'] else 0)
+
+
+if __name__ == "__main__":
+    main()
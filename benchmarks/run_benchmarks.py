@@ -0,0 +1,163 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+
+Run from the repository root, e.g.
+python -m benchmarks.run_benchmarks --files 2000 --depth 3 -o bench.json
+"""
+
+from benchmarks.synthetic_library import generate_library
+from html_utils.py_html_processor import HTMLCreator
+from python_file_parser.directory_file_searcher import DirectoryScanner
+from python_file_parser.file_parser import FileParser, PARSER_VERSION
+from pydoc import get_content
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+
+class PhaseTimer():
+    """ Records wall and CPU time of each run of a phase. """
+
+    def __init__(self):
+        self.runs = {}
+
+    def time(self, phase, function):
+        """
+        Runs function once and records its wall and CPU time under phase.
+        :return: whatever function returns.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = function()
+        self.runs.setdefault(phase, []).append((time.perf_counter() - wall, time.process_time() - cpu))
+        return result
+
+    def report(self):
+        """ :return: dict of phase --> min/mean wall and CPU seconds. """
+        report = {}
+        for phase, runs in self.runs.items():
+            walls, cpus = [wall for wall, _ in runs], [cpu for _, cpu in runs]
+            report[phase] = dict(wall_s_min=min(walls), wall_s_mean=sum(walls) / len(walls),
+                                 cpu_s_min=min(cpus), cpu_s_mean=sum(cpus) / len(cpus), runs=len(runs))
+        return report
+
+
+class _PrescannedDirectories():
+    """ Stands in for a DirectoryScanner, replaying an earlier scan so assembly is timed on its own. """
+
+    def __init__(self, directories):
+        self.directories = directories
+
+    def scan(self, path):
+        return iter(self.directories)
+
+
+class _PreparsedModules():
+    """ Stands in for a FileParser, returning modules parsed earlier so assembly is timed on its own. """
+
+    def __init__(self, modules):
+        self.modules = modules
+
+    def parse_modules(self, directories, parent_package=None):
+        modules = [self.modules[directory] for directory in directories]
+        for module in modules:
+            module.parent = parent_package or ''
+        return modules
+
+
+def run_benchmark(library_path : str, output_path : str, repeat=1):
+    """
+    Times each phase of a documentation build separately.
+    :param library_path: Library to document.
+    :param output_path: Directory the html is written to.
+    :param repeat: Number of runs of each phase.
+    :return: (PhaseTimer, dict of counts)
+    """
+    timer = PhaseTimer()
+    parser, full_parser = FileParser(fast=True), FileParser()
+    for _ in range(repeat):
+        directories = timer.time('directory_walk', lambda: list(DirectoryScanner().scan(library_path)))
+        files = [file.path for directory in directories for file in directory.files]
+
+        timer.time('import_scan', lambda: [parser.find_imports(file) for file in files])
+        timer.time('ast_extraction', lambda: [parser.find_classes_and_functions(file) for file in files])
+        modules = timer.time('parse_module', lambda: {file: parser.parse_module(file) for file in files})
+        # The same modules parsed from their whole syntax tree instead of a skeleton.
+        timer.time('parse_module_full_ast', lambda: [full_parser.parse_module(file) for file in files])
+
+        library = timer.time('library_assembly', lambda: get_content(_PreparsedModules(modules), library_path,
+                                                                     scanner=_PrescannedDirectories(directories)))
+
+        html_creator = HTMLCreator(output_path, library, directory_delimiter=os.sep)
+        pages = timer.time('render', lambda: _render_pages(html_creator))
+        timer.time('write', lambda: [html_creator._save_template_to_html(save_directory, file_name, template)
+                                     for save_directory, file_name, template in pages])
+
+    counts = dict(files=len(files), bytes=sum(file.stat.st_size for d in directories for file in d.files),
+                  packages=len(directories), pages=len(pages), html_bytes=sum(len(page[2]) for page in pages),
+                  classes=sum(len(module.get_classes()) for module in modules.values()),
+                  functions=sum(len(module.get_functions()) +
+                                sum(len(c.get_functions()) for c in module.get_classes())
+                                for module in modules.values()))
+    return timer, counts
+
+
+def _render_pages(html_creator):
+    """ Renders every page of the library into memory. """
+    library = html_creator.library
+    html_creator._start_html_doc()
+    save_directory = html_creator._create_directory(os.path.join(html_creator.save_directory, str(library)))
+    return [(directory, file_name, html_creator.templates[template_name].render(**context))
+            for template_name, directory, file_name, context in html_creator._package_pages(library, save_directory)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YAYPD benchmark: times each phase on a synthetic library.')
+    parser.add_argument('-i', '--library_path', type=str,
+                        help='Benchmark an existing library instead of generating one.')
+    parser.add_argument('-o', '--output', type=str, help='JSON report file. Printed to stdout if not given.')
+    parser.add_argument('--files', type=int, default=1000, help='Number of generated modules.')
+    parser.add_argument('--depth', type=int, default=3, help='Package nesting depth.')
+    parser.add_argument('--packages-per-package', type=int, default=4, help='Sub-packages of each package.')
+    parser.add_argument('--classes', type=int, default=3, help='Classes per module.')
+    parser.add_argument('--functions', type=int, default=5, help='Top level functions per module.')
+    parser.add_argument('--methods', type=int, default=6, help='Methods per class.')
+    parser.add_argument('--docstring-words', type=int, default=30, help='Words per docstring.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the generator.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each phase; min and mean are reported.')
+    args = parser.parse_args()
+
+    work_directory = tempfile.mkdtemp(prefix='yaypd_bench_')
+    try:
+        config = vars(args).copy()
+        config.pop('output')
+        library_path = args.library_path
+        if library_path is None:
+            library_path = os.path.join(work_directory, 'SyntheticLibrary')
+            config['generated'] = generate_library(library_path, files=args.files, depth=args.depth,
+                                                   packages_per_package=args.packages_per_package,
+                                                   classes_per_file=args.classes, functions_per_file=args.functions,
+                                                   methods_per_class=args.methods,
+                                                   docstring_words=args.docstring_words, seed=args.seed)
+
+        timer, counts = run_benchmark(os.path.abspath(library_path), os.path.join(work_directory, 'docs'),
+                                      repeat=args.repeat)
+        report = dict(parser_version=PARSER_VERSION, python=platform.python_version(), platform=platform.platform(),
+                      config=config, counts=counts, phases=timer.report())
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+import os
+import random
+
+WORDS = ('parse', 'render', 'module', 'package', 'value', 'index', 'return', 'library', 'data', 'frame', 'binary',
+         'string', 'column', 'result', 'stored', 'converted', 'object', 'directory', 'template', 'function')
+ANNOTATIONS = ('int', 'str', 'float', 'bool', 'list', 'dict')
+
+
+def generate_library(root : str, files=1000, depth=3, packages_per_package=4, classes_per_file=3,
+                     functions_per_file=5, methods_per_class=6, docstring_words=30, seed=0):
+    """
+    Writes a synthetic Python library to disk. Packages form a tree of the given depth and the module files are
+    spread evenly over all packages. Output is fully determined by the arguments.
+    :param root: Library directory to create, e.g. /tmp/SyntheticLibrary
+    :param files: Number of module files, not counting the __init__.py of each package.
+    :param depth: Package nesting depth below the library root.
+    :param packages_per_package: Number of sub-packages of each package.
+    :param classes_per_file: Classes per module.
+    :param functions_per_file: Top level functions per module.
+    :param methods_per_class: Methods per class.
+    :param docstring_words: Words per docstring.
+    :param seed: Random seed.
+    :return: dict with the number of packages, modules, classes, functions and bytes written.
+    """
+    rng = random.Random(seed)
+    packages = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, 'package_{0}_{1}'.format(d, i))
+                 for parent in level for i in range(packages_per_package)]
+        packages.extend(level)
+
+    counts = dict(packages=len(packages), modules=0, classes=0, functions=0, bytes=0)
+    for package in packages:
+        os.makedirs(package, exist_ok=True)
+        counts['bytes'] += _write(os.path.join(package, '__init__.py'),
+                                  '"""\n@PACKAGEDESC: {}\n"""\n'.format(_sentence(rng, docstring_words)))
+
+    for i in range(files):
+        source = _module_source(rng, i, classes_per_file, functions_per_file, methods_per_class, docstring_words)
+        counts['bytes'] += _write(os.path.join(packages[i % len(packages)], 'module_{}.py'.format(i)), source)
+        counts['modules'] += 1
+        counts['classes'] += classes_per_file
+        counts['functions'] += functions_per_file + classes_per_file * methods_per_class
+    return counts
+
+
+def _module_source(rng, index, classes, functions, methods, docstring_words):
+    lines = ['"""', '@FILEDESC: {}'.format(_sentence(rng, docstring_words)), '"""', '',
+             'import os', 'import sys as system', 'from collections import OrderedDict, namedtuple',
+             'from . import module_{}'.format(max(index - 1, 0)), '']
+    for c in range(classes):
+        lines.extend(['', 'class Class{0}_{1}(object):'.format(index, c),
+                      '    """{}"""'.format(_sentence(rng, docstring_words)), ''])
+        for m in range(methods):
+            lines.extend(_function_source(rng, 'method_{}'.format(m), docstring_words, ['self'], '    '))
+    for f in range(functions):
+        lines.extend(_function_source(rng, 'function_{}'.format(f), docstring_words, [], ''))
+    return '\n'.join(lines) + '\n'
+
+
+def _function_source(rng, name, docstring_words, parameters, indent):
+    parameters = parameters + ['arg_{0} : {1}'.format(i, rng.choice(ANNOTATIONS)) if rng.random() < 0.5
+                               else 'arg_{}'.format(i) for i in range(rng.randint(0, 4))]
+    body = ['result = {}'.format(rng.randint(0, 100)),
+            'for value in range(10):',
+            '    result += value * {}'.format(rng.randint(1, 100)),
+            'return result']
+    return ([indent + 'def {0}({1}):'.format(name, ', '.join(parameters)),
+             indent + '    """{}"""'.format(_sentence(rng, docstring_words))] +
+            [indent + '    ' + line for line in body] + [''])
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+    return len(text)
@@ -0,0 +1,128 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.page_writer import PRECOMPRESS_FORMATS
+import hashlib
+import json
+import logging
+import os
+
+MANIFEST_FILE_NAME = '.yaypd_manifest.json'
+
+
+class BuildManifest():
+    """
+    Records a fingerprint of the render inputs of every page written by the HTMLCreator. On the next build,
+    pages whose fingerprint did not change are neither rendered nor written, and pages that are no longer
+    produced (removed modules and packages) are deleted. The formats of the precompressed siblings written
+    next to the pages are recorded too, so siblings no longer wanted can be removed.
+    """
+
+    def __init__(self, manifest_path : str, templates_digest='', precompress=()):
+        """
+        :param manifest_path:
+        :param templates_digest: hash_directory of the templates.
+        :param precompress: formats of the precompressed siblings written by this build, e.g. ('gz',).
+        """
+        self.manifest_path = manifest_path
+        self.templates_digest = templates_digest
+        self.precompress = tuple(sorted(precompress))
+        self.previous_pages = {}
+        # None when the previous build did not record its formats.
+        self.previous_precompress = ()
+        self.pages = {}
+        self._load()
+
+    def get_dropped_precompress(self):
+        """
+        :return: formats of the precompressed siblings the previous build may have written and this one does not.
+        """
+        previous = PRECOMPRESS_FORMATS if self.previous_precompress is None else self.previous_precompress
+        return tuple(compression for compression in previous if compression not in self.precompress)
+
+    def is_unchanged(self, page_key, fingerprint):
+        """
+        :param page_key: page path relative to the output directory.
+        :param fingerprint: digest of the page's render inputs.
+        :return: True if the previous build wrote the same page from the same inputs.
+        """
+        return self.previous_pages.get(page_key) == fingerprint
+
+    def remove_stale_pages(self, save_directory : str):
+        """
+        Deletes the pages of the previous build that were not produced by this one, with their precompressed
+        siblings, together with the package directories left empty.
+        :param save_directory: output directory the page keys are relative to.
+        :return: list of removed page keys.
+        """
+        stale_pages = [page_key for page_key in self.previous_pages if page_key not in self.pages]
+        save_directory = os.path.abspath(save_directory)
+        stale_directories = set()
+        for page_key in stale_pages:
+            file = os.path.join(save_directory, page_key)
+            for path in [file] + ['.'.join([file, compression]) for compression in PRECOMPRESS_FORMATS]:
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    print("Could not remove stale page {0}. Error: {1}".format(path, e))
+            # A package page sits next to the directory holding the package's own pages.
+            directory = os.path.abspath(file[:-len('.html')] if file.endswith('.html') else os.path.dirname(file))
+            while directory.startswith(save_directory + os.sep) and directory not in stale_directories:
+                stale_directories.add(directory)
+                directory = os.path.dirname(directory)
+
+        for directory in sorted(stale_directories, key=len, reverse=True):
+            if os.path.isdir(directory) and not os.listdir(directory):
+                os.rmdir(directory)
+        if stale_pages:
+            logging.info("Removed {} stale pages".format(len(stale_pages)))
+        return stale_pages
+
+    def keep_previous_pages(self):
+        """ Carries over the previous build's pages that this build did not produce, e.g. a partial build. """
+        for page_key, fingerprint in self.previous_pages.items():
+            self.pages.setdefault(page_key, fingerprint)
+        # The pages carried over may still have the siblings of the previous build.
+        self.precompress = tuple(sorted(set(self.precompress) | set(self.get_dropped_precompress())))
+
+    def save(self):
+        """ Writes the manifest of this build to disk. """
+        temp_path = self.manifest_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump({'pages': self.pages, 'precompress': self.precompress}, f, sort_keys=True)
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            print("Could not save the build manifest {0}. Error: {1}".format(self.manifest_path, e))
+
+    def _load(self):
+        """ Loads the manifest of the previous build, if any. """
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r') as f:
+                data = json.load(f)
+            self.previous_pages = data['pages']
+            self.previous_precompress = data.get('precompress')
+        except Exception as e:
+            logging.info("Ignoring unreadable build manifest {0}. Error: {1}".format(self.manifest_path, e))
+
+    @staticmethod
+    def hash_directory(directory : str):
+        """
+        Hashes the names and contents of all files in a directory, e.g. the html templates.
+        :param directory:
+        :return: hex digest str.
+        """
+        digest = hashlib.sha1()
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames.sort()
+            for file in sorted(filenames):
+                path = os.path.join(dirpath, file)
+                digest.update(os.path.relpath(path, directory).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        return digest.hexdigest()
@@ -0,0 +1,230 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from pydocumenter_utils.pydoc_utils import strip_file_extension
+from pydocumenter_utils.type_definitions import ClassDefinition, FunctionDefinition, ModuleDefinition
+from urllib.parse import quote, unquote
+import builtins
+import logging
+import re
+
+INIT_MODULE = '__init__'
+SUMMARY_LENGTH = 10
+# Link of a reference that can only be resolved once the symbols of every shard are known, e.g.
+# yaypd-ref:a.b.C|html_utils. merge_shards replaces it with the resolved link, or the bare name.
+DEFERRED_LINK_PREFIX = 'yaypd-ref:'
+DEFERRED_LINK_PATTERN = re.compile(r'<a href="([^"]*?)' + re.escape(DEFERRED_LINK_PREFIX) +
+                                   r'([^"|]*)\|([^"]*)">([^<]*)</a>')
+
+
+class SymbolTable():
+    """
+    Global table of the library's symbols, built once before rendering: fully qualified name, e.g.
+    html_utils.py_html_processor.HTMLCreator.create_html_doc --> (page url, anchor). Imports and parameter
+    annotations are resolved with dict lookups only, so linking is linear in the number of references.
+    References that cannot be resolved are counted for the summary.
+    """
+
+    def __init__(self, library_name='', record=False):
+        """
+        :param library_name:
+        :param record: keep the packages and modules added, in order, in self.records, e.g. for the shard
+        manifest of a sharded build.
+        """
+        self.library_name = library_name
+        self.symbols = {}
+        self.resolved = 0
+        self.unresolved = {}
+        self.deferred = 0
+        # Modules (and packages, for their __init__.py) whose classes and functions are not known, e.g. those of
+        # the packages of other shards. References below them are deferred.
+        self.incomplete = set()
+        self.records = [] if record else None
+        # Qualified module name --> the names it added to symbols, removed when the module is added again.
+        self.module_symbols = {}
+
+    def add_package(self, package_name, url):
+        """
+        :param package_name: dotted package name, e.g. html_utils.static, or '' for the library itself.
+        :param url: url of the package page, relative to the output directory.
+        """
+        self.symbols[package_name or self.library_name] = (url, '')
+        if self.records is not None:
+            self.records.append(['package', package_name, url])
+
+    def add_module(self, module, package_name, url, part_urls=None, complete=True):
+        """
+        Adds a module, its classes, methods and functions. The contents of an __init__.py are also added
+        under the package's own name, as they are usually imported from there. Adding a module again, e.g. after
+        it was edited in watch mode, first removes the symbols it added before.
+        :param module: ModuleDefinition
+        :param package_name: dotted name of the module's package, '' for top level modules.
+        :param url: url of the module page, relative to the output directory.
+        :param part_urls: for a module split over several pages, class/function name --> url of its page.
+        :param complete: False if the module's classes and functions are not known, e.g. a module of another
+        shard, which only has its name.
+        """
+        part_urls = part_urls or {}
+        module_name = self.qualified_name(package_name, strip_file_extension(module.get_name()))
+        prefixes = [module_name]
+        if strip_file_extension(module.get_name()) == INIT_MODULE and package_name:
+            prefixes.append(package_name)
+        if not complete:
+            self.incomplete.update(prefixes)
+        if self.records is not None:
+            self.records.append(['module', package_name, module.get_name(), url, part_urls, complete,
+                                 [[c.get_name(), [f.get_name() for f in c.get_functions()]]
+                                  for c in module.get_classes()],
+                                 [f.get_name() for f in module.get_functions()]])
+
+        for name in self.module_symbols.pop(module_name, ()):
+            self.symbols.pop(name, None)
+        added = []
+
+        def add(name, symbol):
+            if name not in self.symbols:
+                self.symbols[name] = symbol
+                added.append(name)
+
+        self.symbols[module_name] = (url, '')
+        for prefix in prefixes:
+            for class_definition in module.get_classes():
+                class_name = class_definition.get_name()
+                class_url = part_urls.get(class_name, url)
+                add(self.qualified_name(prefix, class_name), (class_url, class_name))
+                for function in class_definition.get_functions():
+                    anchor = '.'.join([class_name, function.get_name()])
+                    add(self.qualified_name(prefix, anchor), (class_url, anchor))
+            for function in module.get_functions():
+                function_name = function.get_name()
+                add(self.qualified_name(prefix, function_name), (part_urls.get(function_name, url), function_name))
+        self.module_symbols[module_name] = added
+
+    def resolve(self, reference, package_name=''):
+        """
+        Resolves an import as stored in ModuleDefinition.imports, e.g. a.b, .b or a.*, falling back to the
+        longest known prefix, e.g. a module for one of its constants.
+        :param reference: import str.
+        :param package_name: dotted name of the package the importing module belongs to.
+        :return: url#anchor relative to the output directory, or None. A reference that may point into an
+        incomplete module gets a deferred link (DEFERRED_LINK_PREFIX), see resolve_deferred_links.
+        """
+        name = reference[:-2] if reference.endswith('.*') else reference
+        if name.startswith('.'):
+            level = len(name) - len(name.lstrip('.'))
+            parts = package_name.split('.') if package_name else []
+            parts = parts[:len(parts) - (level - 1)] if level > 1 else parts
+            name = '.'.join(parts + [name[level:]]) if name[level:] else '.'.join(parts)
+
+        parts = name.split('.')
+        if self.incomplete and name not in self.symbols and self._is_incomplete(parts):
+            self.deferred += 1
+            return DEFERRED_LINK_PREFIX + quote(reference, safe='.*_') + '|' + quote(package_name, safe='._')
+        if parts[0] == self.library_name and len(parts) > 1 and name not in self.symbols:
+            parts = parts[1:]
+        for end in range(len(parts), 0, -1):
+            symbol = self.symbols.get('.'.join(parts[:end]))
+            if symbol is not None:
+                self.resolved += 1
+                url, anchor = symbol
+                return url + '#' + anchor if anchor else url
+
+        self.unresolved[reference] = self.unresolved.get(reference, 0) + 1
+        return None
+
+    def _is_incomplete(self, parts):
+        """ :return: True if the name, with or without the library name in front, is inside an incomplete module. """
+        candidates = [parts, parts[1:]] if parts[0] == self.library_name else [parts]
+        return any('.'.join(candidate[:end]) in self.incomplete
+                   for candidate in candidates for end in range(1, len(candidate)))
+
+    def resolve_module(self, module, package_name=''):
+        """
+        Resolves the imports of a module and the class names used in its parameter annotations. Annotations
+        are looked up among the module's own classes, then among the names it imports.
+        :param module: ModuleDefinition
+        :param package_name: dotted name of the module's package.
+        :return: list of (import, url or None), dict of annotation --> url
+        """
+        imports = module.get_imports() or []
+        import_links = [(reference, self.resolve(reference, package_name)) for reference in imports]
+        imported_names = {reference.split('.')[-1]: link for reference, link in import_links}
+
+        module_name = self.qualified_name(package_name, strip_file_extension(module.get_name()))
+        functions = list(module.get_functions())
+        for class_definition in module.get_classes():
+            functions.extend(class_definition.get_functions())
+
+        type_links = {}
+        for function in functions:
+            for parameter in function.get_parameters():
+                if ' : ' not in parameter:
+                    continue
+                annotation = parameter.split(' : ')[-1]
+                if annotation in type_links or hasattr(builtins, annotation):
+                    continue
+                symbol = self.symbols.get(self.qualified_name(module_name, annotation))
+                if symbol is not None:
+                    self.resolved += 1
+                    type_links[annotation] = symbol[0] + '#' + symbol[1]
+                elif imported_names.get(annotation):
+                    type_links[annotation] = imported_names[annotation]
+                else:
+                    self.unresolved[annotation] = self.unresolved.get(annotation, 0) + 1
+        return import_links, type_links
+
+    def resolve_deferred_links(self, html):
+        """
+        Replaces the deferred links of a page rendered by a shard with what resolve gives with the symbols of
+        every shard: the link, or the bare name if the reference cannot be resolved, as an unsharded build would.
+        :param html: page content.
+        :return: page content, and the number of links replaced.
+        """
+        def replace(match):
+            root, reference, package_name, text = match.groups()
+            url = self.resolve(unquote(reference), unquote(package_name))
+            return '<a href="{0}{1}">{2}</a>'.format(root, url, text) if url else text
+        return DEFERRED_LINK_PATTERN.subn(replace, html)
+
+    @classmethod
+    def from_records(cls, library_name, records):
+        """
+        Rebuilds a table from the records of SymbolTable(record=True), adding the packages and modules in the
+        same order, so symbols shared by several modules resolve to the same one.
+        :return: SymbolTable
+        """
+        symbol_table = cls(library_name)
+        for record in records:
+            if record[0] == 'package':
+                symbol_table.add_package(record[1], record[2])
+                continue
+            _, package_name, module_name, url, part_urls, complete, classes, functions = record
+            module = ModuleDefinition(module_name, '', None,
+                                      [ClassDefinition(name, [FunctionDefinition(f, ()) for f in methods])
+                                       for name, methods in classes],
+                                      [FunctionDefinition(f, ()) for f in functions])
+            symbol_table.add_module(module, package_name, url, part_urls, complete)
+        return symbol_table
+
+    def reset_counts(self):
+        self.resolved = 0
+        self.unresolved = {}
+        self.deferred = 0
+
+    def log_summary(self):
+        """ Logs how many references were linked, and the most frequent ones that were not. """
+        unresolved = sum(self.unresolved.values())
+        logging.info("Cross references: {0} symbols, {1} references resolved, {2} unresolved ({3} distinct)"
+                     .format(len(self.symbols), self.resolved, unresolved, len(self.unresolved)))
+        if self.deferred:
+            logging.info("{} references into other shards are resolved when merging".format(self.deferred))
+        if self.unresolved:
+            most_frequent = sorted(self.unresolved.items(), key=lambda item: (-item[1], item[0]))[:SUMMARY_LENGTH]
+            logging.info("Most frequent unresolved references: {}".format(
+                ', '.join('{0} ({1})'.format(reference, count) for reference, count in most_frequent)))
+
+    @staticmethod
+    def qualified_name(*parts):
+        return '.'.join(part for part in parts if part)
@@ -0,0 +1,321 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from html_utils.page_writer import MemoryWriter
+from html_utils.py_html_processor import HTMLCreator, STATIC_DIR
+from pydocumenter_utils.type_definitions import LibraryDefinition, ModuleDefinition, get_modules_package_docstring
+from python_file_parser.filetags import PACKAGE_DESCRIPTOR
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote, urlsplit
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+DEFAULT_MAX_PAGES = 256
+# A module page, or a part page of a split module, e.g. module.py or module.py-part2
+MODULE_PAGE_PATTERN = re.compile(r'^(?P<module>.+\.py)(?:-part\d+)?$')
+
+
+class DocServer():
+    """
+    Serves the docs of a library straight from its sources, for local use. Nothing is walked, parsed or
+    rendered up front: a directory is scanned when a page below it is first requested, and a page's modules are
+    parsed and the page rendered with the HTMLCreator templates on request. Rendered pages are kept in an LRU
+    cache of max_pages pages. On every request the files a page was rendered from are stat'ed: a page is
+    rendered again once one of them changed (mtime or size), and a directory is rescanned once its mtime
+    changed, e.g. when a module was added or removed. The search index and cross references need the whole
+    library, so they are left out.
+    """
+
+    def __init__(self, path : str, parser, scanner, split_char='-', max_pages=DEFAULT_MAX_PAGES,
+                 split_threshold=None, template_cache_directory=None):
+        """
+        :param path: Absolute path of the library.
+        :param parser: FileParser
+        :param scanner: DirectoryScanner
+        :param split_char: File name delimiter to split by.
+        :param max_pages: number of rendered pages kept in memory.
+        :param split_threshold: see HTMLCreator.
+        :param template_cache_directory: see HTMLCreator.
+        """
+        self.path = path
+        self.parser = parser
+        self.scanner = scanner
+        self.split_char = split_char
+        self.max_pages = max_pages
+        self.library = LibraryDefinition(library_name=os.path.basename(os.path.normpath(path)))
+        # Pages are rendered below the root '', so their paths are the urls they are served at.
+        self.html_creator = HTMLCreator('', self.library, directory_delimiter='/', split_char=split_char,
+                                        template_cache_directory=template_cache_directory, search=False,
+                                        cross_references=False, split_threshold=split_threshold)
+        self.html_creator.writer = MemoryWriter()
+        self.hits = 0
+        self.misses = 0
+        self._pages = OrderedDict() # url --> (stamp of the files it was rendered from, html bytes)
+        self._directories = {} # relative path parts --> (mtime, IgnoreRules, ScannedDirectory)
+        self._modules = {} # .py file path --> (mtime, size, ModuleDefinition)
+        self._lock = threading.Lock()
+
+    def get_index_url(self):
+        """ :return: url of the library page, e.g. /MyProject/MyProject.html """
+        return '/{0}/{0}.html'.format(self.library.get_name())
+
+    def get_page(self, url : str):
+        """
+        Returns the html of a page, rendering it if it is not cached or its sources changed.
+        :param url: path of the page, e.g. /MyProject/MyProject/Package1/module.py.html
+        :return: html bytes, or None if there is no such page.
+        """
+        target = self._resolve(url)
+        if target is None:
+            return None
+        url, relative_parts, module_name = target
+
+        with self._lock:
+            package = self._load_package(relative_parts)
+            if package is None:
+                return None
+            scanned = self._directories[relative_parts][2]
+            if module_name is None:
+                files = scanned.files
+                stamp = (self._directories[relative_parts][0],) + tuple(self._stat(file.path) for file in files)
+            else:
+                files = [file for file in scanned.files if file.name == module_name]
+                stamp = self._stat(files[0].path) if files else None
+            if stamp is None or None in stamp:
+                return None
+
+            entry = self._pages.get(url)
+            if entry is not None and entry[0] == stamp:
+                self._pages.move_to_end(url)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            start = time.perf_counter()
+            if module_name is None:
+                modules = [self._parse(file, package) if self._has_package_docstring(file) else module
+                           for file, module in zip(files, package.get_modules())]
+            else:
+                modules = [self._parse(files[0], package)]
+            for page_url, html in self._render(package, modules, module_name is None).items():
+                self._pages[page_url] = (stamp, html.encode('utf-8'))
+                self._pages.move_to_end(page_url)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+            logging.info("Rendered {0} in {1:.1f}ms".format(url, (time.perf_counter() - start) * 1000))
+            entry = self._pages.get(url)
+            return entry[1] if entry is not None else None
+
+    def _resolve(self, url):
+        """
+        Maps a page url to the directory it documents. Every package directory in the output is named after the
+        package's full name, e.g. Package1/Package1-Sub, so the directory names are recovered from the url.
+        :param url: e.g. /MyProject/MyProject/Package1/Package1-Sub.html
+        :return: (normalized url, relative path parts of the package directory, module file name or None for the
+        package page), or None if the url is not a page of the library.
+        """
+        library_name = self.library.get_name()
+        parts = [unquote(part) for part in url.split('/') if part]
+        if len(parts) < 2 or parts[0] != library_name or not parts[-1].endswith('.html'):
+            return None
+        url = '/' + '/'.join(parts)
+        page = parts.pop()[:-len('.html')]
+        if parts == [library_name]:
+            return (url, (), None) if page == library_name else None
+        if parts[1] != library_name:
+            return None
+
+        match = MODULE_PAGE_PATTERN.match(page)
+        package_names = parts[2:] if match else parts[2:] + [page]
+        relative_parts, parent_name = [], ''
+        for package_name in package_names:
+            prefix = parent_name + self.split_char if parent_name else ''
+            if not package_name.startswith(prefix) or len(package_name) == len(prefix):
+                return None
+            relative_parts.append(package_name[len(prefix):])
+            parent_name = package_name
+        return url, tuple(relative_parts), match.group('module') if match else None
+
+    def _load_package(self, relative_parts):
+        """
+        Scans the directories from the library root down to a package directory, rescanning those whose mtime
+        changed, and keeps their packages' modules and sub-packages in sync.
+        :param relative_parts: path parts of the package directory, () for the library.
+        :return: PackageDefinition or the LibraryDefinition, None if the directory is not part of the library.
+        """
+        package, ignore_rules = self.library, None
+        for depth in range(len(relative_parts) + 1):
+            parts = relative_parts[:depth]
+            if parts and parts[-1] not in self._directories[parts[:-1]][2].dirnames:
+                return None
+            package = self.library if not parts else self.library.get_package(self.split_char.join(parts))
+            ignore_rules = self._scan(parts, package, ignore_rules)
+            if ignore_rules is None:
+                return None
+        return package
+
+    def _scan(self, parts, package, ignore_rules):
+        """
+        Scans a package directory if it was not scanned yet or its mtime changed.
+        :return: IgnoreRules in effect in the directory, None if it cannot be read.
+        """
+        directory = os.path.join(self.path, *parts)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        entry = self._directories.get(parts)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        scanned, ignore_rules = self.scanner.scan_directory(directory, parts, ignore_rules)
+        if scanned is None:
+            return None
+        self._directories[parts] = (mtime, ignore_rules, scanned)
+
+        package_name = self.split_char.join(parts)
+        package.modules = [ModuleDefinition(file.name, '', None, [], [], package_name) for file in scanned.files]
+        sub_packages = OrderedDict()
+        for dirname in scanned.dirnames:
+            sub_package = self.library.create_package(self.split_char.join(parts + (dirname,)),
+                                                      split_char=self.split_char, parent_name=package_name)
+            sub_packages[sub_package.get_name()] = sub_package
+        package.get_subpackages().clear()
+        package.get_subpackages().update(sub_packages)
+
+        if not parts:
+            # The navigation sidebar of every page lists the library's top level.
+            self.html_creator.set_library(self.library)
+            self._pages.clear()
+        return ignore_rules
+
+    def _parse(self, file, package):
+        """
+        :param file: ScannedFile
+        :param package: package the module belongs to.
+        :return: ModuleDefinition, parsed again only if the file changed.
+        """
+        stat = os.stat(file.path)
+        entry = self._modules.get(file.path)
+        if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+            package_name = package.get_name() if package is not self.library else ''
+            entry = (stat.st_mtime_ns, stat.st_size, self.parser.parse_module(file.path, package_name))
+            self._modules[file.path] = entry
+        return entry[2]
+
+    def _has_package_docstring(self, file):
+        """
+        A package page only shows the names of its modules and the package description, so only the modules
+        holding a @PACKAGEDESC, or parsed already, are parsed for it.
+        :param file: ScannedFile
+        :return: True if the module may hold part of the package description.
+        """
+        if file.path in self._modules:
+            return True
+        try:
+            with open(file.path, 'rb') as f:
+                return PACKAGE_DESCRIPTOR.encode() in f.read()
+        except OSError:
+            return False
+
+    def _render(self, package, modules, package_page):
+        """
+        Renders a package page, or the pages of one of its modules, in memory.
+        :param package: PackageDefinition or the LibraryDefinition.
+        :param modules: modules of the package, or the parsed module to render.
+        :param package_page: True to render the package page.
+        :return: dict of url --> html.
+        """
+        if package_page:
+            package.modules = modules
+            package.doc_string = get_modules_package_docstring(modules)
+            self.html_creator.render_pages(package)
+        else:
+            self.html_creator.render_pages(package, modules)
+        return self.html_creator.writer.take_pages()
+
+    @staticmethod
+    def _stat(path):
+        """ :return: (mtime, size) of a file, None if it no longer exists. """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class _DocRequestHandler(BaseHTTPRequestHandler):
+    """ Serves the pages of the server's DocServer and the static files. """
+
+    server_version = 'YAYPD'
+
+    def do_GET(self):
+        doc_server = self.server.doc_server
+        path = urlsplit(self.path).path
+        if path in ('/', '/index.html'):
+            self.send_response(302)
+            self.send_header('Location', doc_server.get_index_url())
+            self.end_headers()
+            return
+
+        if path.startswith('/static/'):
+            body, content_type = self._read_static_file(unquote(path[len('/static/'):]))
+        else:
+            body, content_type = doc_server.get_page(path), 'text/html; charset=utf-8'
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _read_static_file(name):
+        """ :return: content bytes and type of a file of the static directory, None if there is no such file. """
+        file = os.path.normpath(os.path.join(STATIC_DIR, name))
+        if not file.startswith(STATIC_DIR + os.sep) or not os.path.isfile(file):
+            return None, None
+        with open(file, 'rb') as f:
+            return f.read(), mimetypes.guess_type(file)[0] or 'application/octet-stream'
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def serve(doc_server, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Serves the docs over HTTP until interrupted.
+    :param doc_server: DocServer
+    :param host: interface to listen on, only this machine by default.
+    :param port: 0 picks a free port.
+    :return: Nothing.
+    """
+    http_server = _ThreadingHTTPServer((host, port), _DocRequestHandler)
+    http_server.doc_server = doc_server
+    logging.info("Serving the docs of {0} on http://{1}:{2}{3}".format(doc_server.path, host,
+                                                                       http_server.server_address[1],
+                                                                       doc_server.get_index_url()))
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        logging.info("Served {0} cached and {1} rendered pages".format(doc_server.hits, doc_server.misses))
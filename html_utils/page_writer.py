@@ -0,0 +1,569 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import ctypes
+import gzip
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import struct
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+
+try:
+    import brotli
+except ImportError: # Optional, only needed for .br siblings.
+    brotli = None
+
+WRITER_THREADS = 8
+PENDING_WRITES = WRITER_THREADS * 16
+STAGING_SUFFIX = '.yaypd-staging'
+PREVIOUS_SUFFIX = '.yaypd-previous'
+RENAME_EXCHANGE = 2
+AT_FDCWD = -100
+PRECOMPRESS_FORMATS = ('gz', 'br')
+ARCHIVE_FORMATS = ('.zip', '.tar', '.tar.gz', '.tgz')
+PRECOMPRESS_LEVEL = 9
+ARCHIVE_LEVEL = 6
+GZIP_CHUNK = 1 << 20
+# Zip central directory records (APPNOTE.TXT 4.3.12, 4.3.14-16) and the zip64 extra field of an entry.
+ZIP_CENTRAL_DIRECTORY = struct.Struct('<4s4B4HL2L5H2L')
+ZIP_END_OF_CENTRAL_DIRECTORY = struct.Struct('<4s4H2LH')
+ZIP64_END_OF_CENTRAL_DIRECTORY = struct.Struct('<4sQ2H2L4Q')
+ZIP64_LOCATOR = struct.Struct('<4sLQL')
+# Sizes, offsets and counts above these are moved to zip64 records, at the same limits as zipfile and
+# ZipInfo.FileHeader, and the classic fields set to ZIP_MAX_LONG/ZIP_MAX_SHORT.
+ZIP64_LIMIT = zipfile.ZIP64_LIMIT
+ZIP_COUNT_LIMIT = zipfile.ZIP_FILECOUNT_LIMIT
+ZIP_MAX_LONG = 0xFFFFFFFF
+ZIP_MAX_SHORT = 0xFFFF
+
+
+def compress(data : bytes, compression : str):
+    """
+    :param data: page content.
+    :param compression: 'gz' or 'br'.
+    :return: the compressed bytes, e.g. for a page.html.gz sibling. gzip output does not depend on the time.
+    """
+    if compression == 'br':
+        return brotli.compress(data)
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=PRECOMPRESS_LEVEL, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def check_precompress(precompress):
+    """ :return: the precompress formats as a tuple, raising an error for unknown or unavailable ones. """
+    precompress = tuple(precompress or ())
+    for compression in precompress:
+        if compression not in PRECOMPRESS_FORMATS:
+            raise ValueError("Unknown precompression {}, expected gz or br".format(compression))
+        if compression == 'br' and brotli is None:
+            raise ImportError("Writing .br pages needs the brotli package (pip install brotli)")
+    return precompress
+
+
+class PageWriter():
+    """
+    Output layer of the HTMLCreator. Directories are created once each, with a single makedirs call, and
+    remembered so no page write checks for its directory again. Pages are encoded up front and written by a
+    pool of threads with a single unbuffered write each, so on slow or network file systems the latency of the
+    open/write/close calls overlaps with rendering. At most PENDING_WRITES pages wait in memory: write() blocks
+    when the queue is full. Precompressed siblings, e.g. page.html.gz, are compressed by the same threads.
+    """
+
+    def __init__(self, threads=WRITER_THREADS, pending=PENDING_WRITES, replace=False, precompress=()):
+        """
+        :param threads: number of writer threads.
+        :param pending: maximum number of queued pages.
+        :param replace: unlink existing files before writing them, e.g. pages hard-linked into a staging
+        directory, so the published copy is never modified.
+        :param precompress: formats of the compressed siblings written next to each page, 'gz' and/or 'br'.
+        """
+        self.threads = threads
+        self.replace = replace
+        self.precompress = check_precompress(precompress)
+        # Formats of stale precompressed siblings to remove next to each page written, e.g. after --precompress
+        # was turned off in an incremental build.
+        self.dropped_precompress = ()
+        self.directories = set()
+        self.failed = 0
+        self._pending = threading.BoundedSemaphore(pending)
+        self._executor = None
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def create_directory(self, directory : str):
+        """ Creates a directory and its parents, unless it was already created through this writer. """
+        if directory not in self.directories:
+            os.makedirs(directory, exist_ok=True)
+            self.directories.add(directory)
+        return directory
+
+    def create_directories(self, directories):
+        """ Creates a whole set of directories up front, e.g. every package directory of a library. """
+        for directory in sorted(set(directories)):
+            self.create_directory(directory)
+
+    def write(self, file : str, text : str):
+        """
+        Queues a page for writing. Its directory must already exist.
+        :param file: path of the file.
+        :param text: content, written as utf-8.
+        """
+        self._submit(self._write_file, file, text.encode('utf-8'))
+
+    def copy_directory(self, source : str, destination : str):
+        """
+        Copies a directory of assets, e.g. the static files, with the writer threads. Files whose copy in
+        destination has the same size and modification time are left alone, so rebuilds do not rewrite them.
+        :param source: directory to copy.
+        :param destination: directory to copy it to, created if needed.
+        :return: number of files queued for copying.
+        """
+        copied = 0
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            directory = self.create_directory(os.path.normpath(os.path.join(destination,
+                                                                            os.path.relpath(dirpath, source))))
+            for file_name in sorted(filenames):
+                path, target = os.path.join(dirpath, file_name), os.path.join(directory, file_name)
+                if not self._is_copy_current(path, target):
+                    self._submit(self._copy_file, path, target)
+                    copied += 1
+        return copied
+
+    @staticmethod
+    def _is_copy_current(path, target):
+        try:
+            source_stat, target_stat = os.stat(path), os.stat(target)
+        except OSError:
+            return False
+        return (source_stat.st_size == target_stat.st_size and
+                int(source_stat.st_mtime) == int(target_stat.st_mtime))
+
+    def _copy_file(self, path, target):
+        try:
+            if self.replace:
+                try:
+                    os.unlink(target)
+                except FileNotFoundError:
+                    pass
+            shutil.copy2(path, target)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print("Could not copy {0} to {1}. Error: {2}".format(path, target, e))
+
+    def _submit(self, function, *args):
+        if self._executor is None:
+            # Threads are only started on the first write, e.g. not in render worker processes.
+            self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        self._pending.acquire()
+        future = self._executor.submit(function, *args)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._release)
+
+    def flush(self):
+        """
+        Waits until every queued page is written.
+        :return: number of pages that could not be written since the writer was created.
+        """
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.result()
+        return self.failed
+
+    def close(self):
+        """ Writes the queued pages and stops the writer threads. """
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _write_file(self, file, data):
+        try:
+            self._write_bytes(file, data)
+            for compression in self.precompress:
+                self._write_bytes('.'.join([file, compression]), compress(data, compression))
+            for compression in self.dropped_precompress:
+                try:
+                    os.unlink('.'.join([file, compression]))
+                except FileNotFoundError:
+                    pass
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print("Could not write page {0}. Error: {1}".format(file, e))
+
+    def _release(self, future):
+        with self._lock:
+            self._futures.discard(future)
+        self._pending.release()
+
+    def _write_bytes(self, file, data):
+        if self.replace:
+            try:
+                os.unlink(file)
+            except FileNotFoundError:
+                pass
+        with open(file, 'wb', buffering=0) as f:
+            f.write(data)
+
+
+class MemoryWriter(PageWriter):
+    """
+    PageWriter that keeps the pages in memory instead of writing them, keyed by their path, e.g. for the
+    documentation server. No directory is created and no thread is started.
+    """
+
+    def __init__(self):
+        super().__init__(threads=1)
+        self.pages = {}
+
+    def create_directory(self, directory : str):
+        return directory
+
+    def write(self, file : str, text : str):
+        self.pages[file] = text
+
+    def take_pages(self):
+        """ :return: dict of page path --> html written since the last call. """
+        pages, self.pages = self.pages, {}
+        return pages
+
+
+class ArchiveWriter(PageWriter):
+    """
+    PageWriter that streams the pages into a single .zip, .tar or .tar.gz bundle instead of loose files. Pages
+    are compressed in the writer threads and only appended to the archive under a lock: zip entries are
+    deflated on their own and written by _ZipStream, and a .tar.gz is written as a series of gzip members
+    compressed in parallel, which gzip readers see as one stream. The bundle is written to a temporary file and
+    renamed into place by close(), so an incomplete archive is never published.
+    """
+
+    def __init__(self, archive_path : str, save_directory : str, threads=WRITER_THREADS, pending=PENDING_WRITES,
+                 precompress=()):
+        """
+        :param archive_path: .zip, .tar, .tar.gz or .tgz file to write.
+        :param save_directory: directory the pages would have been written to; their paths in the archive are
+        relative to it.
+        """
+        super().__init__(threads, pending, precompress=precompress)
+        self.archive_path = archive_path
+        self.save_directory = save_directory
+        self.archive_format = get_archive_format(archive_path)
+        self._archive_lock = threading.Lock()
+        self._digests = {}
+        self._mtime = time.time()
+        self._temp_path = archive_path + '.tmp'
+        directory = os.path.dirname(archive_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self._temp_path, 'wb')
+        self._stream = None
+        if self.archive_format == '.zip':
+            self._archive = _ZipStream(self._file)
+        else:
+            if self.archive_format in ('.tar.gz', '.tgz'):
+                self._stream = _GzipMemberStream(self._file, threads)
+            self._archive = tarfile.open(fileobj=self._stream or self._file, mode='w|', format=tarfile.PAX_FORMAT)
+
+    def create_directory(self, directory : str):
+        """ Nothing to create, archives hold directories implicitly. """
+        self.directories.add(directory)
+        return directory
+
+    def add_directory(self, source : str, name : str):
+        """
+        Adds a directory of assets, e.g. the static files. In a tar, files with the same content are only stored
+        once and linked to from their other paths.
+        :param source: directory to add.
+        :param name: its path in the archive, e.g. static.
+        """
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            for file_name in sorted(filenames):
+                path = os.path.join(dirpath, file_name)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                archive_name = '/'.join([name, os.path.relpath(path, source).replace(os.sep, '/')])
+                self._submit(self._add_asset, archive_name, data)
+
+    def close(self):
+        """ Writes the queued pages, completes the archive and moves it into place. """
+        super().close()
+        self._archive.close()
+        if self._stream is not None:
+            self._stream.close()
+        self._file.close()
+        os.replace(self._temp_path, self.archive_path)
+        logging.info("Wrote {}".format(self.archive_path))
+
+    def discard(self):
+        """ Stops the writer and removes the incomplete archive, e.g. after a failed build. """
+        super().close()
+        for stream in (self._archive, self._stream, self._file):
+            try:
+                if stream is not None:
+                    stream.close()
+            except Exception as e:
+                logging.debug("Could not close {0}. Error: {1}".format(self._temp_path, e))
+        try:
+            os.remove(self._temp_path)
+        except FileNotFoundError:
+            pass
+
+    def _archive_name(self, file):
+        """
+        :param file: page path, built with any directory delimiter.
+        :return: the page's path below save_directory, with '/' separators.
+        """
+        if file.startswith(self.save_directory):
+            name = file[len(self.save_directory):]
+        else:
+            name = os.path.relpath(file, self.save_directory)
+        return '/'.join(part for part in re.split(r'[\\/]', name) if part)
+
+    def _write_file(self, file, data):
+        try:
+            name = self._archive_name(file)
+            self._add(name, data)
+            for compression in self.precompress:
+                self._add('.'.join([name, compression]), compress(data, compression), compressed=True)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print("Could not add page {0} to {1}. Error: {2}".format(file, self.archive_path, e))
+
+    def _add_asset(self, name, data):
+        digest = hashlib.sha1(data).digest()
+        with self._archive_lock:
+            first = self._digests.setdefault(digest, name)
+        if first != name and self.archive_format != '.zip':
+            link = tarfile.TarInfo(name)
+            link.type, link.linkname, link.mtime, link.mode = tarfile.LNKTYPE, first, self._mtime, 0o644
+            with self._archive_lock:
+                self._archive.addfile(link)
+        else:
+            self._add(name, data)
+
+    def _add(self, name, data, compressed=False):
+        """
+        Appends a file to the archive. Zip entries are deflated here, in the calling writer thread, unless already
+        compressed, e.g. a precompressed sibling; only appending them is serialized.
+        """
+        if self.archive_format != '.zip':
+            info = tarfile.TarInfo(name)
+            info.size, info.mtime, info.mode = len(data), self._mtime, 0o644
+            with self._archive_lock:
+                self._archive.addfile(info, io.BytesIO(data))
+            return
+
+        info = zipfile.ZipInfo(name, date_time=time.localtime(self._mtime)[:6])
+        info.external_attr = 0o644 << 16
+        info.file_size, info.CRC = len(data), zlib.crc32(data)
+        if compressed:
+            info.compress_type, payload = zipfile.ZIP_STORED, data
+        else:
+            compressor = zlib.compressobj(ARCHIVE_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+            info.compress_type, payload = zipfile.ZIP_DEFLATED, compressor.compress(data) + compressor.flush()
+        info.compress_size = len(payload)
+        with self._archive_lock:
+            self._archive.add(info, payload)
+
+
+class _ZipStream():
+    """
+    Write-only zip file for entries compressed ahead of time, e.g. by the writer threads, which ZipFile cannot
+    append. Each entry is its ZipInfo.FileHeader followed by the compressed data; close() writes the central
+    directory, with the zip64 records when the archive outgrows the classic format.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.entries = []
+
+    def add(self, info, payload):
+        """
+        :param info: zipfile.ZipInfo with its sizes, CRC and compress_type set.
+        :param payload: data, compressed as info.compress_type says.
+        """
+        info.header_offset = self.file.tell()
+        self.file.write(info.FileHeader())
+        self.file.write(payload)
+        self.entries.append(info)
+
+    def close(self):
+        start = self.file.tell()
+        for info in self.entries:
+            self.file.write(self._central_directory_record(info))
+        end = self.file.tell()
+        size, count = end - start, len(self.entries)
+        if count > ZIP_COUNT_LIMIT or size > ZIP64_LIMIT or start > ZIP64_LIMIT:
+            self.file.write(ZIP64_END_OF_CENTRAL_DIRECTORY.pack(
+                b'PK\x06\x06', ZIP64_END_OF_CENTRAL_DIRECTORY.size - 12, 45, 45, 0, 0, count, count, size, start))
+            self.file.write(ZIP64_LOCATOR.pack(b'PK\x06\x07', 0, end, 1))
+            count, size, start = min(count, ZIP_MAX_SHORT), ZIP_MAX_LONG, ZIP_MAX_LONG
+        self.file.write(ZIP_END_OF_CENTRAL_DIRECTORY.pack(b'PK\x05\x06', 0, 0, count, count, size, start, 0))
+
+    @staticmethod
+    def _central_directory_record(info):
+        try:
+            name, flag_bits = info.filename.encode('ascii'), info.flag_bits
+        except UnicodeEncodeError:
+            name, flag_bits = info.filename.encode('utf-8'), info.flag_bits | 0x800
+
+        sizes = [info.file_size, info.compress_size, info.header_offset]
+        large = [value for value in sizes if value > ZIP64_LIMIT]
+        extra = struct.pack('<2H{}Q'.format(len(large)), 1, 8 * len(large), *large) if large else b''
+        file_size, compress_size, header_offset = (ZIP_MAX_LONG if value > ZIP64_LIMIT else value for value in sizes)
+        # Local headers only get the zip64 extra field for large sizes, see ZipInfo.FileHeader.
+        zip64 = info.file_size > ZIP64_LIMIT or info.compress_size > ZIP64_LIMIT
+        version = 45 if zip64 else 20
+        year, month, day, hour, minute, second = info.date_time
+        return ZIP_CENTRAL_DIRECTORY.pack(
+            b'PK\x01\x02', version, info.create_system, version, 0, flag_bits, info.compress_type,
+            hour << 11 | minute << 5 | second // 2, (year - 1980) << 9 | month << 5 | day, info.CRC,
+            compress_size, file_size, len(name), len(extra), 0, 0, 0, info.external_attr,
+            header_offset) + name + extra
+
+
+class _GzipMemberStream():
+    """
+    Write-only file object for tarfile that gzips its input in GZIP_CHUNK pieces on a thread pool, and writes
+    the resulting gzip members to the file in order.
+    """
+
+    def __init__(self, file, threads=WRITER_THREADS):
+        self.file = file
+        self.threads = threads
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= GZIP_CHUNK:
+            self._compress_buffer()
+        return len(data)
+
+    def close(self):
+        if self.buffer:
+            self._compress_buffer()
+        self._drain(0)
+        self.executor.shutdown()
+
+    def _compress_buffer(self):
+        self.pending.append(self.executor.submit(_gzip_member, bytes(self.buffer)))
+        self.buffer = bytearray()
+        # Keeps a few chunks per thread in flight, writing the finished ones in order.
+        self._drain(self.threads * 2)
+
+    def _drain(self, keep):
+        while self.pending and (len(self.pending) > keep or self.pending[0].done()):
+            self.file.write(self.pending.popleft().result())
+
+
+def _gzip_member(data):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=ARCHIVE_LEVEL, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def get_archive_format(path : str):
+    """ :return: the archive extension of path, one of ARCHIVE_FORMATS. """
+    for extension in ARCHIVE_FORMATS:
+        if path.endswith(extension):
+            return extension
+    raise ValueError("Unknown archive format {}, expected .zip, .tar, .tar.gz or .tgz".format(path))
+
+
+class StagingDirectory():
+    """
+    A build written next to the output directory and published in one step, so readers see either the previous
+    docs or the new ones, never a half written build. On Linux the two directories are exchanged with a single
+    renameat2(RENAME_EXCHANGE) call; elsewhere the output directory is moved aside and the staging directory
+    renamed into its place, which leaves a window of two renames.
+    """
+
+    def __init__(self, directory : str, seed=False):
+        """
+        :param directory: output directory to publish to.
+        :param seed: start from the published docs, hard-linked (or copied where links are not supported) into
+        the staging directory, e.g. for incremental builds that only rewrite changed pages.
+        """
+        self.directory = directory.rstrip('/\\') or directory
+        self.path = self.directory + STAGING_SUFFIX
+        if os.path.exists(self.path):
+            logging.info("Removing the leftover staging directory {}".format(self.path))
+            shutil.rmtree(self.path)
+        if seed and os.path.isdir(self.directory):
+            self._link_tree(self.directory, self.path)
+        else:
+            os.makedirs(self.path)
+
+    def publish(self):
+        """
+        Swaps the staging directory in as the output directory and removes the previous build.
+        :return: the output directory.
+        """
+        if not os.path.exists(self.directory):
+            os.rename(self.path, self.directory)
+        elif self._exchange(self.path, self.directory):
+            shutil.rmtree(self.path)
+        else:
+            previous = self.directory + PREVIOUS_SUFFIX
+            if os.path.exists(previous):
+                shutil.rmtree(previous)
+            os.rename(self.directory, previous)
+            os.rename(self.path, self.directory)
+            shutil.rmtree(previous)
+        logging.info("Published {}".format(self.directory))
+        return self.directory
+
+    def discard(self):
+        """ Removes the staging directory, e.g. after a failed build. """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @staticmethod
+    def _exchange(first, second):
+        """ :return: True if the two paths were atomically exchanged, False if the platform cannot do it. """
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+        except (OSError, AttributeError):
+            return False
+        if renameat2(AT_FDCWD, os.fsencode(first), AT_FDCWD, os.fsencode(second), RENAME_EXCHANGE) != 0:
+            logging.info("Could not exchange {0} and {1} atomically. Error: {2}".format(
+                first, second, os.strerror(ctypes.get_errno())))
+            return False
+        return True
+
+    @staticmethod
+    def _link_tree(source, destination):
+        """ Recreates the directories of source in destination and hard-links its files there. """
+        for dirpath, _, filenames in os.walk(source):
+            target = os.path.join(destination, os.path.relpath(dirpath, source))
+            os.makedirs(target, exist_ok=True)
+            for file_name in filenames:
+                try:
+                    os.link(os.path.join(dirpath, file_name), os.path.join(target, file_name))
+                except OSError:
+                    shutil.copy2(os.path.join(dirpath, file_name), os.path.join(target, file_name))
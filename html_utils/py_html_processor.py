@@ -3,14 +3,27 @@ Author: Reuben Ferrante
 Date:   27/10/2017
 """
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, ModuleLoader
+from concurrent.futures import ProcessPoolExecutor
+from html_utils.build_manifest import BuildManifest, MANIFEST_FILE_NAME
+from html_utils.cross_references import DEFERRED_LINK_PREFIX, SymbolTable
+from html_utils.page_writer import ArchiveWriter, PageWriter, StagingDirectory
+from html_utils.search_index import SearchIndex
+from html_utils.shard_manifest import ShardManifest
+from pydocumenter_utils.profiler import NULL_PROFILER
 from pydocumenter_utils.pydoc_utils import *
+from pydocumenter_utils.type_definitions import ClassDefinition, ModuleDefinition
+import hashlib
 import os
+import time
 
 MODULE_FILE_DIR = 'templates/module.html'
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 PACKAGE_FILE_DIR = 'templates/package.html'
 LIBRARY_STRUCTURE = 'templates/library_structure.html'
+TEMPLATES_DIR = os.path.join(THIS_DIR, 'templates')
+STATIC_DIR = os.path.join(THIS_DIR, 'static')
+SUMMARY_LENGTH = 100
 
 
 class HTMLCreator():
@@ -20,39 +33,390 @@ class HTMLCreator():
     outputs the html documentation in the same format as the python package folder structure.
     """
 
-    def __init__(self, save_directory : str, library=None, directory_delimiter ='\\', split_char='-'):
+    def __init__(self, save_directory : str, library=None, directory_delimiter ='\\', split_char='-',
+                 incremental=False, template_cache_directory=None, jobs=1, profiler=None, search=True,
+                 cross_references=True, split_threshold=None, packages=None, shard=None, atomic=False,
+                 archive=None, precompress=()):
         logging.debug("Created HTML Creator")
         self.directory_delimiter = directory_delimiter
-        self.j2_env = Environment(loader=FileSystemLoader(THIS_DIR),
-                                  trim_blocks=True,
-                                  lstrip_blocks=True)
+        self.template_cache_directory = template_cache_directory
+        self.j2_env = self._create_environment(template_cache_directory)
         self.j2_env.filters['strip_file_extension'] = strip_file_extension
         self.j2_env.globals['css_directory'] = save_directory.replace(self.directory_delimiter, '/')
         self.j2_env.globals['library_title'] = str(library)
+        self.j2_env.globals['search_enabled'] = search
+        self.templates = {name: self.j2_env.get_template(name)
+                          for name in (MODULE_FILE_DIR, PACKAGE_FILE_DIR, LIBRARY_STRUCTURE)}
 
         self.split_char = split_char
         self.library = library
         self.save_directory = save_directory
+        self.incremental = incremental
+        self.jobs = jobs or os.cpu_count() or 1
+        self.manifest = None
+        self.profiler = profiler
+        self.search = search
+        self.search_index = None
+        self.cross_references = cross_references
+        self.symbol_table = None
+        # Pages of a shard linking into other shards, rewritten by merge_shards.
+        self.deferred_pages = []
+        self.split_threshold = split_threshold
+        # Packages to render, e.g. html_utils.static or html_utils-static, with their sub-packages. None renders all.
+        self.packages = set(name.replace('.', split_char) for name in packages) if packages else None
+        # Shard of a sharded build: only the packages it owns are rendered, the other packages hold no content.
+        self.shard = shard
+        self.atomic = atomic
+        self.staging = None
+        # Archive file (.zip, .tar, .tar.gz) to bundle the docs in, instead of writing them to save_directory.
+        self.archive = archive
+        self.precompress = precompress
+        self.writer = PageWriter(precompress=precompress)
+        # Pages and static files of the last build that could not be written.
+        self.failed_pages = 0
+        self._navigation_templates = {}
+
+    @staticmethod
+    def _create_environment(template_cache_directory=None):
+        """
+        Creates the Jinja2 environment. Without a cache directory, templates are compiled from source once per
+        HTMLCreator. With one, the templates are precompiled into Python modules in that directory (refreshed
+        whenever a template changes) and loaded through a ModuleLoader. Python keeps the bytecode of those
+        modules in __pycache__, so later runs and worker processes skip template compilation altogether.
+        :param template_cache_directory: optional directory to keep the compiled templates in.
+        :return: jinja2.Environment
+        """
+        options = dict(trim_blocks=True, lstrip_blocks=True, auto_reload=False)
+        if template_cache_directory is None:
+            return Environment(loader=FileSystemLoader(THIS_DIR), **options)
+
+        compiled_directory = os.path.join(template_cache_directory, 'compiled')
+        digest_file = os.path.join(compiled_directory, 'templates.sha1')
+        templates_digest = BuildManifest.hash_directory(TEMPLATES_DIR)
+        try:
+            with open(digest_file, 'r') as f:
+                up_to_date = f.read() == templates_digest
+        except OSError:
+            up_to_date = False
+
+        if not up_to_date:
+            logging.info("Compiling templates into {}".format(compiled_directory))
+            source_env = Environment(loader=FileSystemLoader(THIS_DIR), **options)
+            source_env.compile_templates(compiled_directory, zip=None,
+                                         filter_func=lambda name: name.startswith('templates/'))
+            with open(digest_file, 'w') as f:
+                f.write(templates_digest)
+
+        return Environment(loader=ModuleLoader(compiled_directory), **options)
 
     def set_library(self, library):
         """ Setter for library. """
         self.library = library
+        self.j2_env.globals['library_title'] = str(library)
+        self._navigation_templates = {}
 
     def create_html_doc(self):
         """
         Main caller after all the Python files are processed by the file parser.
         The folder structure is created and the package is processed. The process is
         recursive, recycling code...
-        :return:
+        :return: number of pages that could not be written.
         """
-        dir = self._create_directory(self.directory_delimiter.join([self.save_directory, str(self.library)]))
-        self.process_package(self.library, dir)
+        timer = self.profiler or NULL_PROFILER
+        self._start_html_doc()
         try:
-            copy_directory_tree_to_destination('html_utils\\static', self.save_directory + '\\static')
-        except FileExistsError as e:
-            logging.info("CSS files already exist.")
-        except Exception as e:
-            print("Error when copying CSS files to directory. Error: {0}".format(e))
+            dir = self._create_directory(self.directory_delimiter.join([self.save_directory, str(self.library)]))
+            self.writer.create_directories(package_directory for _, _, package_directory in self._iter_packages())
+            with timer.phase('render'):
+                if self.jobs > 1:
+                    self.process_pages_in_parallel(self._package_pages(self.library, dir))
+                else:
+                    self.process_package(self.library, dir)
+            with timer.phase('finish'):
+                return self._finish_html_doc()
+        except BaseException:
+            self._abort_html_doc()
+            raise
+
+    def _start_html_doc(self):
+        """
+        Resets the navigation sidebars and the search index, builds the symbol table used for cross references
+        and loads the previous build manifest when running incrementally. With atomic builds, everything is then
+        written to a staging directory, seeded with the published docs when running incrementally.
+        """
+        if self.archive:
+            self.writer = ArchiveWriter(self.archive, self.save_directory, precompress=self.precompress)
+        elif self.atomic:
+            self.staging = StagingDirectory(self.save_directory, seed=self.incremental)
+            self.save_directory = self.staging.path
+            self.writer = PageWriter(replace=self.incremental, precompress=self.precompress)
+        else:
+            self.writer.directories = set()
+            self.writer.failed = 0
+        self.failed_pages = 0
+        self._navigation_templates = {}
+        self.search_index = SearchIndex() if self.search else None
+        self.symbol_table = self._build_symbol_table() if self.cross_references and self.library else None
+        self.deferred_pages = []
+        if self.incremental and not self.archive:
+            self._load_manifest()
+
+    def _load_manifest(self):
+        """ Loads the manifest of the previous build, which the pages rendered next are checked against. """
+        self.manifest = BuildManifest(os.path.join(self.save_directory, MANIFEST_FILE_NAME),
+                                      templates_digest=BuildManifest.hash_directory(TEMPLATES_DIR),
+                                      precompress=self.writer.precompress)
+        # Pages are fingerprinted with the formats of their siblings, so they are all written again when the
+        # formats change, and the siblings of formats turned off are removed as they are.
+        self.writer.dropped_precompress = self.manifest.get_dropped_precompress()
+
+    def _finish_html_doc(self):
+        """
+        Copies the static files and waits for them and the pages to be written, then saves the build manifest and
+        the search index, if any. A shard only saves its ShardManifest, the rest is done once all shards are
+        merged. An atomic build is then published, an archive completed, unless some pages could not be written.
+        :return: number of pages that could not be written.
+        """
+        if self.symbol_table is not None:
+            self.symbol_table.log_summary()
+        if self.archive:
+            if self.search_index is not None:
+                self.search_index.save(self.save_directory, writer=self.writer)
+            self.writer.add_directory(STATIC_DIR, 'static')
+        elif self.shard is None:
+            self.copy_static_files(self.save_directory, self.writer)
+        self.failed_pages = self.writer.flush()
+        if self.failed_pages and (self.archive or self.staging is not None):
+            raise IOError("Could not write {0} pages, {1} was not published".format(
+                self.failed_pages, self.archive or self.staging.directory))
+        if self.failed_pages:
+            logging.error("Could not write {} pages".format(self.failed_pages))
+
+        if self.archive:
+            self.writer.close()
+            self.writer = PageWriter(precompress=self.precompress)
+            return self.failed_pages
+
+        if self.shard is not None:
+            precompress = self.manifest.precompress if self.manifest else self.precompress
+            ShardManifest(self.shard, str(self.library), self.search_index.pages if self.search_index else None,
+                          self.manifest.pages if self.manifest else None,
+                          self.symbol_table.records if self.symbol_table is not None else None,
+                          self.deferred_pages, precompress).save(self.save_directory)
+            self.manifest = None
+        else:
+            if self.manifest is not None:
+                if self.failed_pages:
+                    # The previous manifest is kept, so the next incremental build writes the failed pages again.
+                    logging.info("Not saving the build manifest, as some pages could not be written")
+                elif self.packages is None:
+                    self.manifest.remove_stale_pages(self.save_directory)
+                    self.manifest.save()
+                else:
+                    # The pages of the packages left out were not rendered, they are neither stale nor forgotten.
+                    self.manifest.keep_previous_pages()
+                    self.manifest.save()
+                self.manifest = None
+            if self.search_index is not None:
+                self.search_index.save(self.save_directory)
+
+        if self.staging is not None:
+            self.staging.publish()
+            self.save_directory = self.staging.directory
+            self.staging = None
+            self.writer = PageWriter(precompress=self.precompress)
+        return self.failed_pages
+
+    def _abort_html_doc(self):
+        """
+        Cleans up after a build that raised: the pages still queued are written, then the staging directory of an
+        atomic build, or the temporary file of an archive, is removed so nothing is published.
+        """
+        if isinstance(self.writer, ArchiveWriter):
+            self.writer.discard()
+            self.writer = PageWriter(precompress=self.precompress)
+        elif self.staging is not None:
+            self.writer.close()
+            self.writer = PageWriter(precompress=self.precompress)
+        if self.staging is not None:
+            logging.info("Discarding the staging directory {}".format(self.staging.path))
+            self.staging.discard()
+            self.save_directory = self.staging.directory
+            self.staging = None
+        self.manifest = None
+
+    @staticmethod
+    def copy_static_files(save_directory, writer=None):
+        """
+        Copies the CSS and JavaScript files to the output directory, skipping those already up to date.
+        :param save_directory: output directory.
+        :param writer: PageWriter to copy them with, flushed by the caller. Without one, they are copied before
+        returning.
+        :return: number of files that could not be copied, when no writer is given.
+        """
+        destination = os.path.join(save_directory, 'static')
+        if writer is not None:
+            writer.copy_directory(STATIC_DIR, destination)
+            return 0
+        writer = PageWriter()
+        writer.copy_directory(STATIC_DIR, destination)
+        writer.close()
+        return writer.failed
+
+    def create_html_doc_streaming(self, packages):
+        """
+        Streaming counterpart of create_html_doc. Packages are rendered as they arrive, parents before
+        their sub-packages, e.g. from pydoc.iter_content. Once a package's pages are written its modules are
+        replaced by name-only ModuleDefinitions, so only the package structure and module names are kept for
+        navigation and memory stays proportional to the largest package.
+        :param packages: iterable of LibraryDefinition followed by its PackageDefinitions, sub-packages of each
+        yielded package already created.
+        :return: number of pages that could not be written.
+        """
+        timer = self.profiler or NULL_PROFILER
+        self._start_html_doc()
+        # Packages arrive before the rest of the library is parsed, so there is nothing to link against.
+        self.symbol_table = None
+        try:
+            return self._render_streaming(packages, timer)
+        except BaseException:
+            self._abort_html_doc()
+            raise
+
+    def _render_streaming(self, packages, timer):
+        """ Body of create_html_doc_streaming, between _start_html_doc and _finish_html_doc. """
+        package_directories = {}
+
+        for package in packages:
+            if self.library is None:
+                self.set_library(package)
+            if package is self.library:
+                save_directory = self._create_directory(self.directory_delimiter.join([self.save_directory,
+                                                                                       str(self.library)]))
+            else:
+                save_directory = package_directories[package.get_parent()]
+
+            with timer.phase('render'):
+                main_package_dir, html_directory_link, package_page = self._package_page(package, save_directory)
+                package_directories[str(package)] = main_package_dir
+
+                for module in package.get_modules():
+                    for page in self._selected_pages(package, self._module_pages(module, main_package_dir,
+                                                                                 html_directory_link, package)):
+                        self._process_page(*page)
+                for page in self._selected_pages(package, [package_page]):
+                    self._process_page(*page)
+
+            package.modules = [ModuleDefinition(module.get_name(), '', None, [], [], module.get_parent())
+                               for module in package.get_modules()]
+
+        with timer.phase('finish'):
+            return self._finish_html_doc()
+
+    def refresh_package(self, package, modules=None):
+        """
+        Re-renders a single package page and some of its module pages, e.g. after a file changed in watch mode.
+        The library structure is not re-walked. Pages of packages left out of the selection are only indexed.
+        When running incrementally, the build manifest is updated with the pages written.
+        :param package: PackageDefinition or the LibraryDefinition.
+        :param modules: modules to re-render, all of the package's modules by default.
+        :return: Nothing.
+        """
+        if self.incremental and not self.archive:
+            self._load_manifest()
+        failed = self.writer.failed
+        save_directory = self._get_package_save_directory(package)
+        main_package_dir, html_directory_link, package_page = self._package_page(package, save_directory)
+        for module in package.get_modules() if modules is None else modules:
+            if self.symbol_table is not None:
+                self.symbol_table.add_module(module, self._dotted_name(package),
+                                             self._get_page_url(main_package_dir, module.get_name()),
+                                             self._get_part_urls(module, main_package_dir))
+            for page in self._selected_pages(package, self._module_pages(module, main_package_dir,
+                                                                         html_directory_link, package)):
+                self._process_page(*page)
+        for page in self._selected_pages(package, [package_page]):
+            self._process_page(*page)
+        if self.manifest is not None:
+            if self.writer.flush() > failed:
+                logging.info("Not saving the build manifest, as some pages could not be written")
+            else:
+                # The pages of the rest of the library were not rendered again, they are kept as they are.
+                self.manifest.keep_previous_pages()
+                self.manifest.save()
+            self.manifest = None
+        else:
+            self.writer.flush()
+        if self.search_index is not None:
+            self.search_index.save(self.save_directory)
+
+    def render_pages(self, package, modules=None):
+        """
+        Renders the page of a package, or the pages of some of its modules, on their own, e.g. for the
+        documentation server, whose writer keeps the pages in memory.
+        :param package: PackageDefinition or the LibraryDefinition.
+        :param modules: modules whose pages to render; the package page is rendered when None.
+        :return: Nothing.
+        """
+        save_directory = self._get_package_save_directory(package)
+        main_package_dir, html_directory_link, package_page = self._package_page(package, save_directory)
+        if modules is None:
+            self._process_page(*package_page)
+        for module in modules or ():
+            self.process_module(module, main_package_dir, html_directory_link, package)
+
+    def _build_symbol_table(self):
+        """
+        Walks the library once and maps the qualified name of every package, module, class and function to
+        its page url and anchor.
+        :return: SymbolTable
+        """
+        # A shard only knows the classes and functions of its own packages. It records its symbols for the shard
+        # manifest, and references into the other shards' modules are resolved when merging.
+        symbol_table = SymbolTable(str(self.library), record=self.shard is not None)
+        for package, save_directory, main_package_dir in self._iter_packages():
+            package_name = self._dotted_name(package)
+            complete = self.shard is None or self.shard.owns(package.get_name())
+            symbol_table.add_package(package_name, self._get_page_url(save_directory, package.get_name()))
+            for module in package.get_modules():
+                symbol_table.add_module(module, package_name, self._get_page_url(main_package_dir, module.get_name()),
+                                        self._get_part_urls(module, main_package_dir), complete)
+        return symbol_table
+
+    def _iter_packages(self):
+        """
+        Walks the library's package structure without rendering anything.
+        :return: generator of (package, directory its page is saved in, directory of its own pages)
+        """
+        stack = [(self.library, self.directory_delimiter.join([self.save_directory, str(self.library)]))]
+        while stack:
+            package, save_directory = stack.pop()
+            main_package_dir = self._get_package_directory(package, save_directory)
+            yield package, save_directory, main_package_dir
+            stack.extend((sub_package, main_package_dir) for sub_package in package.get_subpackages().values())
+
+    def _dotted_name(self, package):
+        """ Package name as imported in Python, e.g. html_utils-static --> html_utils.static. '' for the library. """
+        if package is self.library:
+            return ''
+        return package.get_name().replace(self.split_char, '.')
+
+    def _get_package_save_directory(self, package):
+        """
+        Gets the directory a package page is saved in, i.e. its parent's output directory.
+        :param package:
+        :return: directory str.
+        """
+        library_name = str(self.library)
+        if package is self.library:
+            return self.directory_delimiter.join([self.save_directory, library_name])
+
+        parents = []
+        parent = package.get_parent()
+        while parent not in ('', library_name):
+            parents.append(parent)
+            parent = self.library.get_package(parent).get_parent()
+        return self.directory_delimiter.join([self.save_directory, library_name, library_name] + parents[::-1])
 
     def process_module(self, module, save_directory, html_directory_link, package):
         """
@@ -65,6 +429,25 @@ class HTMLCreator():
         :param package:
         :return: Nothing.
         """
+        for page in self._module_pages(module, save_directory, html_directory_link, package):
+            self._process_page(*page)
+
+    def process_package(self, package, save_directory):
+        """
+        A recursive function that goes through an entire package and documents its modules.
+        All templates are subsequently called from the respective module/package.
+        :param package: Package type.
+        :param save_directory: Directory for the project to be saved in.
+        :return: Nothing.
+        """
+        for page in self._package_pages(package, save_directory):
+            self._process_page(*page)
+
+    def _module_page(self, module, save_directory, html_directory_link, package):
+        """
+        Builds the template context of a module page.
+        :return: (template name, save directory, file name, context)
+        """
         #parent_directory_link = self._get_module_html_and_parent_llink(package)
         navigation_template, main_library_link, css_link = self._create_library_navigation_template(package, module=module)
 
@@ -74,12 +457,18 @@ class HTMLCreator():
         parent = module.get_parent()
         imports = module.get_imports()
         functions = module.get_functions()
+        if self.symbol_table is not None:
+            import_links, type_links = self.symbol_table.resolve_module(module, self._dotted_name(package))
+        else:
+            import_links, type_links = [(reference, None) for reference in imports or []], {}
 
-        template = self.j2_env.get_template(MODULE_FILE_DIR).render(
+        context = dict(
             file_title=name,
             parent=parent,
             doc_string=doc_string,
             imports=imports,
+            import_links=import_links,
+            type_links=type_links,
             functions=functions,
             classes=classes,
             library_structure=navigation_template,
@@ -89,17 +478,139 @@ class HTMLCreator():
             main_library_link=main_library_link + str(self.library),
             css_link=css_link
         )
-        self._save_template_to_html(save_directory, name, template)
+        return MODULE_FILE_DIR, save_directory, name, context
 
-    def process_package(self, package, save_directory):
+    def _module_pages(self, module, save_directory, html_directory_link, package):
         """
-        A recursive function that goes through an entire package and documents its modules.
-        All templates are subsequently called from the respective module/package.
+        Builds the page of a module. A module with more than split_threshold classes, methods and functions is
+        split: its page lists the symbols in a table of contents and links to part pages holding the details,
+        each with at most split_threshold symbols (or a single larger class).
+        :return: generator of (template name, save directory, file name, context)
+        """
+        page = self._module_page(module, save_directory, html_directory_link, package)
+        parts = self._split_module(module)
+        if parts is None:
+            yield page
+            return
+
+        template_name, _, name, context = page
+        part_names = [self._get_part_name(name, number) for number in range(1, len(parts) + 1)]
+        toc = []
+        for part_name, (classes, functions) in zip(part_names, parts):
+            toc.extend((class_definition.get_name(), 'class', part_name,
+                        self._summary(class_definition.get_docstring()), len(class_definition.get_functions()))
+                       for class_definition in classes)
+            toc.extend((function.get_name(), 'function', part_name, self._summary(function.get_docstring()), None)
+                       for function in functions)
+
+        yield template_name, save_directory, name, dict(context, classes=[], functions=[], toc=toc,
+                                                        part_names=part_names)
+        for number, (part_name, (classes, functions)) in enumerate(zip(part_names, parts), 1):
+            yield template_name, save_directory, part_name, dict(context, classes=classes, functions=functions,
+                                                                 part=number, part_names=part_names)
+
+    def _split_module(self, module):
+        """
+        :param module: ModuleDefinition
+        :return: None if the module fits on one page, else a list of (classes, functions) parts.
+        """
+        classes, functions = module.get_classes(), module.get_functions()
+        if not self.split_threshold or \
+                len(functions) + sum(1 + len(c.get_functions()) for c in classes) <= self.split_threshold:
+            return None
+
+        parts, part_classes, part_functions, size = [], [], [], 0
+        for definition in list(classes) + list(functions):
+            is_class = isinstance(definition, ClassDefinition)
+            definition_size = 1 + len(definition.get_functions()) if is_class else 1
+            if size and size + definition_size > self.split_threshold:
+                parts.append((part_classes, part_functions))
+                part_classes, part_functions, size = [], [], 0
+            (part_classes if is_class else part_functions).append(definition)
+            size += definition_size
+        parts.append((part_classes, part_functions))
+        return parts
+
+    def _get_part_urls(self, module, save_directory):
+        """
+        :return: None if the module is not split, else dict of class/function name --> url of its part page.
+        """
+        parts = self._split_module(module)
+        if parts is None:
+            return None
+        part_urls = {}
+        for number, (classes, functions) in enumerate(parts, 1):
+            url = self._get_page_url(save_directory, self._get_part_name(module.get_name(), number))
+            part_urls.update((definition.get_name(), url) for definition in list(classes) + list(functions))
+        return part_urls
+
+    @staticmethod
+    def _get_part_name(module_name, number):
+        """ File name of a part page of a split module, e.g. big_module.py-part2 """
+        return '{0}-part{1}'.format(module_name, number)
+
+    @staticmethod
+    def _summary(doc_string):
+        doc_string = ' '.join(str(doc_string or '').split())
+        return doc_string if len(doc_string) <= SUMMARY_LENGTH else doc_string[:SUMMARY_LENGTH - 3] + '...'
+
+    def _package_pages(self, package, save_directory):
+        """
+        Recursively walks a package and yields the pages of its sub-packages, its modules and the package
+        itself, in that order. Output directories are created on the way.
         :param package: Package type.
         :param save_directory: Directory for the project to be saved in.
-        :return: Nothing.
+        :return: generator of (template name, save directory, file name, context)
+        """
+        main_package_dir, html_directory_link, package_page = self._package_page(package, save_directory)
+
+        sub_packages = package.get_subpackages()
+        for _, sub_package in iter(sub_packages.items()):
+            yield from self._package_pages(sub_package, main_package_dir)
+
+        pages = (page for module in package.get_modules()
+                 for page in self._module_pages(module, main_package_dir, html_directory_link, package))
+        yield from self._selected_pages(package, pages)
+        yield from self._selected_pages(package, [package_page])
+
+    def _selected_pages(self, package, pages):
+        """
+        Filters the pages of a package down to the packages selected for rendering. Pages of the packages left
+        out are only added to the search index, so the index still covers the whole library, except in a sharded
+        build where each shard indexes its own pages.
+        :param package: Package type the pages belong to.
+        :param pages: iterable of (template name, save directory, file name, context)
+        :return: generator of the pages to render.
+        """
+        if self._is_selected(package):
+            yield from pages
+        elif self.shard is None:
+            for page in pages:
+                self._index_page(*page)
+
+    def _is_selected(self, package):
         """
-        main_package_dir = self._create_directory(self.directory_delimiter.join([save_directory, str(package).split('.')[-1]]))
+        :param package: Package type.
+        :return: True if the package, or one of its parents, is in self.packages, or no packages were selected,
+        and the package belongs to the shard being built, if any.
+        """
+        if self.shard is not None and not self.shard.owns(package.get_name()):
+            return False
+        if self.packages is None or str(self.library) in self.packages:
+            return True
+        if package is self.library:
+            return False
+        name = package.get_name()
+        return any(name == selected or name.startswith(selected + self.split_char) for selected in self.packages)
+
+    def _package_page(self, package, save_directory):
+        """
+        Creates the package's output directory and builds the template context of its page.
+        :param package: Package type.
+        :param save_directory: Directory the package page is saved in.
+        :return: package output directory, package html link, (template name, save directory, file name, context)
+        """
+        main_package_dir = self._create_directory(self._get_package_directory(package, save_directory))
         parent = None
         try:
             parent = package.get_parent()
@@ -109,20 +620,12 @@ class HTMLCreator():
         html_directory_link, parent_directory_link = self._get_package_html_and_parent_link(package, main_package_dir)
         navigation_template, main_library_link, css_link = self._create_library_navigation_template(package)
 
-        sub_packages = package.get_subpackages()
-        for _, sub_package in iter(sub_packages.items()):
-            self.process_package(sub_package, main_package_dir)
-
-        p_modules = package.get_modules()
-        for module in p_modules:
-            self.process_module(module, main_package_dir, html_directory_link, package)
-
         p_name = package.get_name()
 
-        template = self.j2_env.get_template(PACKAGE_FILE_DIR).render(
+        context = dict(
             file_title=p_name,
-            modules=p_modules,
-            sub_packages=package.get_subpackages(),
+            modules=[str(module) for module in package.get_modules()],
+            sub_packages=list(package.get_subpackages()),
             parent=parent,
             doc_string=package.get_docstring(),
             library_structure=navigation_template,
@@ -133,7 +636,127 @@ class HTMLCreator():
             main_library_link=main_library_link + str(self.library),
             css_link=css_link
         )
-        self._save_template_to_html(save_directory, p_name, template)
+        return main_package_dir, html_directory_link, (PACKAGE_FILE_DIR, save_directory, p_name, context)
+
+    def _get_package_directory(self, package, save_directory):
+        """ Directory holding a package's module pages and sub-package directories. """
+        return self.directory_delimiter.join([save_directory, str(package).split('.')[-1]])
+
+    def _get_page_url(self, save_directory, file_name):
+        """ Url of a page relative to the output directory, e.g. MyProject/MyProject/Package1/module.py.html """
+        file = self._get_html_file_path(save_directory, file_name)
+        return os.path.relpath(file, self.save_directory).replace(os.sep, '/')
+
+    def process_pages_in_parallel(self, pages):
+        """
+        Renders pages in a process pool and hands the html to the PageWriter, so rendering scales with the number
+        of cores and disk latency overlaps with rendering.
+        :param pages: iterable of (template name, save directory, file name, context), e.g. from _package_pages.
+        :return: Nothing.
+        """
+        pending = []
+        for page in pages:
+            self._index_page(*page)
+            if self._needs_render(*page):
+                pending.append(page)
+        pages = pending
+        if not pages:
+            return
+
+        logging.info("Rendering {0} pages with {1} processes".format(len(pages), self.jobs))
+        chunksize = max(1, len(pages) // (self.jobs * 4))
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_render_worker,
+                                 initargs=(self.save_directory, str(self.library), self.directory_delimiter,
+                                           self.template_cache_directory, self.search)) as renderer:
+            rendered = renderer.map(_render_page, [(template_name, context) for template_name, _, _, context in pages],
+                                    chunksize=chunksize)
+            for (_, save_directory, file_name, _), (template, seconds) in zip(pages, rendered):
+                if self.profiler is not None:
+                    self._record_render(save_directory, file_name, seconds)
+                self._save_template_to_html(save_directory, file_name, template)
+
+    def _process_page(self, template_name, save_directory, file_name, context):
+        """
+        Renders a page and saves it. In incremental mode the page is skipped when its render inputs did not
+        change since the previous build.
+        :return: Nothing.
+        """
+        self._index_page(template_name, save_directory, file_name, context)
+        if self._needs_render(template_name, save_directory, file_name, context):
+            start = time.perf_counter()
+            template = self.templates[template_name].render(**context)
+            if self.profiler is not None:
+                self._record_render(save_directory, file_name, time.perf_counter() - start)
+            self._save_template_to_html(save_directory, file_name, template)
+
+    def _record_render(self, save_directory, file_name, seconds):
+        """ Reports the render time of a page to the profiler, keyed by the page's path in the output. """
+        file = self._get_html_file_path(save_directory, file_name)
+        self.profiler.record('render', os.path.relpath(file, self.save_directory), seconds)
+
+    def _index_page(self, template_name, save_directory, file_name, context):
+        """ Adds the symbols shown on a page to the search index, if any. """
+        if self.search_index is None:
+            return
+        url = self._get_page_url(save_directory, file_name)
+        package_name = str(context['parent'] or '').replace(self.split_char, '.')
+        if template_name == MODULE_FILE_DIR:
+            # The parts of a split module only index their classes and functions, the module is on its main page.
+            self.search_index.add_module_page(url, context['file_title'], package_name, context['doc_string'],
+                                              context['classes'], context['functions'],
+                                              module_symbol=not context.get('part'))
+        elif template_name == PACKAGE_FILE_DIR:
+            qualified_name = context['file_title'].replace(self.split_char, '.')
+            self.search_index.add_package_page(url, qualified_name.split('.')[-1], qualified_name,
+                                               context['doc_string'])
+
+    def _needs_render(self, template_name, save_directory, file_name, context):
+        """
+        Records the page in the build manifest when running incrementally, and in the deferred pages when it
+        links into other shards. Those pages are always rendered again, as merging rewrote their links.
+        :return: False if the page on disk was rendered from the same inputs, True otherwise.
+        """
+        deferred = any(url and url.startswith(DEFERRED_LINK_PREFIX) for _, url in context.get('import_links', ()))
+        if self.manifest is None and not deferred:
+            return True
+
+        file = self._get_html_file_path(save_directory, file_name)
+        page_key = os.path.relpath(file, self.save_directory)
+        if deferred:
+            self.deferred_pages.append(page_key)
+        if self.manifest is None:
+            return True
+        fingerprint = self._page_fingerprint(template_name, context)
+        self.manifest.pages[page_key] = fingerprint
+        if not deferred and self.manifest.is_unchanged(page_key, fingerprint) and os.path.exists(file):
+            (self.profiler or NULL_PROFILER).count('unchanged_pages')
+            return False
+        return True
+
+    def _page_fingerprint(self, template_name, context):
+        """
+        Hashes everything a page is rendered from: the templates, the page's module or package content,
+        its links and its navigation sidebar, and the formats of its precompressed siblings.
+        :param template_name:
+        :param context: template context.
+        :return: hex digest str.
+        """
+        data = []
+        for key, value in sorted(context.items()):
+            if key in ('classes', 'functions'):
+                value = [self._definition_fingerprint(definition) for definition in value]
+            elif key in ('modules', 'sub_packages'):
+                value = [str(definition) for definition in value]
+            data.append((key, value))
+        return hashlib.sha1(repr((self.manifest.templates_digest, self.manifest.precompress, template_name,
+                                  data)).encode()).hexdigest()
+
+    def _definition_fingerprint(self, definition):
+        """ Nested tuple of everything shown for a class or function. """
+        if isinstance(definition, ClassDefinition):
+            return (definition.get_name(), definition.get_docstring(),
+                    [self._definition_fingerprint(function) for function in definition.get_functions()])
+        return definition.get_name(), definition.get_docstring(), list(definition.get_parameters())
 
     def _get_package_html_and_parent_link(self, package, main_package_dir):
         """
@@ -203,39 +826,62 @@ class HTMLCreator():
     def _create_library_navigation_template(self, package, module=None):
         """
         Gets the links to the package and module and creates the appropriate html file.
+        The sidebar only depends on the library's top level and the relative link, so it is rendered
+        once per distinct link (i.e. per page depth) and reused.
         :param package: package type
         :param module: default=None.
         :return: template, main_library_link, css_link
         """
         navigation_link, main_library_link, css_link = self._get_navigation_link(package, module)
 
-        template = self.j2_env.get_template(LIBRARY_STRUCTURE).render(
-            title=self.library.get_name(),
-            navigation_content=[(self.library.get_subpackages(), 'Packages'),
-                                (self.library.get_modules(), 'Modules')],
-            directory_link=navigation_link
-        )
+        template = self._navigation_templates.get(navigation_link)
+        if template is None:
+            template = self.templates[LIBRARY_STRUCTURE].render(
+                title=self.library.get_name(),
+                navigation_content=[(self.library.get_subpackages(), 'Packages'),
+                                    (self.library.get_modules(), 'Modules')],
+                directory_link=navigation_link
+            )
+            self._navigation_templates[navigation_link] = template
         return template, main_library_link, css_link
 
-    def _save_template_to_html(self, main_directory, file_name, template):
-        """ Saves the created html template to disk. """
+    def _get_html_file_path(self, main_directory, file_name):
+        """ Full path of the html file a page is saved to. """
         if '.html' not in file_name[-5:]:
             file_name = ''.join([file_name, '.html'])
 
         if self.directory_delimiter not in main_directory[-len(self.directory_delimiter):]:
             main_directory = ''.join([main_directory, self.directory_delimiter])
 
-        file = ''.join([main_directory, file_name])
-        try:
-            with open(file, "w") as f:
-                f.write(template)
-            return True # Success
-        except Exception as e:
-            logging.ERROR("Error when writing template to file in HTMLCreator. {}".format(e))
-            return False # Failed
+        return ''.join([main_directory, file_name])
+
+    def _save_template_to_html(self, main_directory, file_name, template):
+        """ Queues the created html template to be written to disk. """
+        self.writer.write(self._get_html_file_path(main_directory, file_name), template)
 
     def _create_directory(self, directory):
-        """ Creates a new directory if it doesnt exist. """
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        return directory
\ No newline at end of file
+        """ Creates a new directory if it was not created yet. """
+        return self.writer.create_directory(directory)
+
+
+_render_worker = None
+
+
+def _init_render_worker(save_directory, library_title, directory_delimiter, template_cache_directory, search=True):
+    """ Process pool initializer: each render worker keeps one HTMLCreator, and so one Jinja2 environment. """
+    global _render_worker
+    _render_worker = HTMLCreator(save_directory, directory_delimiter=directory_delimiter,
+                                 template_cache_directory=template_cache_directory, search=search)
+    _render_worker.j2_env.globals['library_title'] = library_title
+
+
+def _render_page(job):
+    """
+    Renders a single page in a render worker.
+    :param job: (template name, context)
+    :return: html str, seconds spent rendering.
+    """
+    template_name, context = job
+    start = time.perf_counter()
+    template = _render_worker.templates[template_name].render(**context)
+    return template, time.perf_counter() - start
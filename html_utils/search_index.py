@@ -0,0 +1,230 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from array import array
+from pydocumenter_utils.pydoc_utils import strip_file_extension
+import heapq
+import json
+import logging
+import os
+import re
+
+SEARCH_DIRECTORY = 'search'
+INDEX_VERSION = 1
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 40
+SUMMARY_LENGTH = 80
+SYMBOLS_PER_CHUNK = 100
+SHARD_POSTINGS = 20000
+MAX_TEXT_POSTINGS = 1000
+# Rank of each kind of symbol when choosing which docstring matches of a very common word are kept.
+KIND_RANKS = {'package': 4, 'module': 3, 'class': 2, 'function': 1, 'method': 0}
+
+WORD_PATTERN = re.compile(r'[a-z0-9_]+')
+NAME_PART_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+STOP_WORDS = frozenset(('an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'if', 'in', 'is', 'it', 'of',
+                        'on', 'or', 'the', 'this', 'to', 'with', 'self', 'cls'))
+
+
+class SearchIndex():
+    """
+    Client-side search index over the names, parameters and docstrings of the packages, modules, classes and
+    functions of a library. Symbols are collected per page while the html is generated; save() then writes:
+    - search/index.js: shard keys and symbol count.
+    - search/shard_<prefix>.js: sorted tokens starting with <prefix> and their delta-encoded postings. A
+    prefix holding too many postings is split into longer prefixes, so shards stay small however large the
+    library is, and a query only loads the shards its prefix falls in. A token found in more than
+    MAX_TEXT_POSTINGS docstrings only keeps the best of those matches (see _text_rank), and is listed as
+    capped in its shard so the search box can say so.
+    - search/symbols_<n>.js: name, kind, qualified name, url and summary of SYMBOLS_PER_CHUNK symbols each.
+    Every file is a script calling pydocSearch.register, so the index also loads from file:// urls.
+    """
+
+    def __init__(self):
+        self.pages = {}
+
+    def add_package_page(self, url, name, qualified_name, doc_string):
+        """
+        Indexes a package page, replacing whatever was indexed for that url before.
+        :param url: page url relative to the output directory.
+        :param name: package name, e.g. static.
+        :param qualified_name: dotted package name, e.g. html_utils.static.
+        """
+        self.pages[url] = [self._symbol(name, 'package', qualified_name, doc_string)]
+
+    def add_module_page(self, url, name, package_name, doc_string, classes, functions, module_symbol=True):
+        """
+        Indexes a module page together with its classes, methods and functions, replacing whatever was indexed
+        for that url before.
+        :param url: page url relative to the output directory.
+        :param name: module file name.
+        :param package_name: dotted name of the module's package, empty for top level modules.
+        :param module_symbol: False to only index the classes and functions, e.g. on a part of a split module.
+        """
+        module_name = strip_file_extension(name)
+        qualified_name = '.'.join(part for part in (package_name, module_name) if part)
+        symbols = [self._symbol(module_name, 'module', qualified_name, doc_string)] if module_symbol else []
+        for class_definition in classes:
+            class_name = '.'.join([qualified_name, class_definition.get_name()])
+            symbols.append(self._symbol(class_definition.get_name(), 'class', class_name,
+                                        class_definition.get_docstring(), anchor=class_definition.get_name()))
+            symbols.extend(self._function_symbol(function, 'method', class_name, class_definition.get_name() + '.')
+                           for function in class_definition.get_functions())
+        symbols.extend(self._function_symbol(function, 'function', qualified_name) for function in functions)
+        self.pages[url] = symbols
+
+    def save(self, save_directory, writer=None):
+        """
+        Writes the index to save_directory/search. Files whose content did not change are not rewritten and
+        files left over from a previous, larger index are removed.
+        :param save_directory: output directory.
+        :param writer: optional PageWriter to write the files through instead, e.g. into an archive.
+        :return: number of indexed symbols.
+        """
+        directory = os.path.join(save_directory, SEARCH_DIRECTORY)
+
+        records, postings, text_postings, capped = [], {}, {}, set()
+        for url in sorted(self.pages):
+            for name, kind, qualified_name, anchor, summary, name_tokens, text_tokens in self.pages[url]:
+                symbol_id = len(records)
+                records.append((name, kind, qualified_name, url + '#' + anchor if anchor else url, summary))
+                for token in name_tokens:
+                    postings.setdefault(token, array('I')).append(symbol_id << 1 | 1)
+                summary_words = set(WORD_PATTERN.findall(summary.lower())) if text_tokens else ()
+                for token in text_tokens:
+                    # Very common docstring words match most of the library: only the best matches are kept, the
+                    # worst one kept sitting at the top of the heap.
+                    heap = text_postings.setdefault(token, [])
+                    rank = self._text_rank(symbol_id, kind, token in summary_words, len(text_tokens))
+                    if len(heap) < MAX_TEXT_POSTINGS:
+                        heapq.heappush(heap, rank)
+                    else:
+                        capped.add(token)
+                        heapq.heappushpop(heap, rank)
+        for token, heap in text_postings.items():
+            kept = [(0xFFFFFFFF - (rank & 0xFFFFFFFF)) << 1 for rank in heap]
+            postings[token] = array('I', sorted(list(postings.get(token, ())) + kept))
+
+        files = {}
+        shard_keys = []
+        for key, tokens in self._shards(postings):
+            shard_keys.append(key)
+            shard = dict(t=tokens, p=[self._delta_encode(postings[token]) for token in tokens])
+            if capped.intersection(tokens):
+                shard['c'] = [i for i, token in enumerate(tokens) if token in capped]
+            files['shard_{}.js'.format(key)] = self._script('shard:' + key, shard)
+        for chunk in range(0, len(records), SYMBOLS_PER_CHUNK):
+            files['symbols_{}.js'.format(chunk // SYMBOLS_PER_CHUNK)] = self._script(
+                'symbols:{}'.format(chunk // SYMBOLS_PER_CHUNK), records[chunk:chunk + SYMBOLS_PER_CHUNK])
+        files['index.js'] = self._script('index', dict(version=INDEX_VERSION, shards=sorted(shard_keys),
+                                                       chunk=SYMBOLS_PER_CHUNK, symbols=len(records),
+                                                       min_length=MIN_TOKEN_LENGTH))
+
+        if writer is not None:
+            writer.create_directory(directory)
+            for file_name, content in files.items():
+                writer.write(os.path.join(directory, file_name), content)
+        else:
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            for file_name, content in files.items():
+                self._write_if_changed(os.path.join(directory, file_name), content)
+            for file_name in os.listdir(directory):
+                if file_name not in files and file_name.endswith('.js'):
+                    os.remove(os.path.join(directory, file_name))
+        logging.info("Search index: {0} symbols, {1} tokens in {2} shards".format(len(records), len(postings),
+                                                                                len(shard_keys)))
+        if capped:
+            logging.info("Search index: {0} common docstring words capped at their {1} best matches".format(
+                len(capped), MAX_TEXT_POSTINGS))
+        return len(records)
+
+    @staticmethod
+    def _text_rank(symbol_id, kind, in_summary, token_count):
+        """
+        Ranks a docstring match, higher is better: a word of the summary shown in the results first, then packages,
+        modules and classes before functions and methods, then shorter docstrings, then lower symbol ids.
+        :param token_count: number of docstring and parameter tokens of the symbol.
+        :return: int, whose lower 32 bits give back the symbol id.
+        """
+        rank = in_summary << 11 | KIND_RANKS[kind] << 8 | 0xFF - min(token_count, 0xFF)
+        return rank << 32 | 0xFFFFFFFF - symbol_id
+
+    def _function_symbol(self, function, kind, parent_name, anchor_prefix=''):
+        parameters = set()
+        for parameter in function.get_parameters():
+            parameters.update(self._name_tokens(parameter.split(':')[0].strip()))
+        return self._symbol(function.get_name(), kind, '.'.join([parent_name, function.get_name()]),
+                            function.get_docstring(), parameters, anchor_prefix + function.get_name())
+
+    def _symbol(self, name, kind, qualified_name, doc_string, extra_tokens=(), anchor=''):
+        """ :return: (name, kind, qualified name, anchor on the page, summary, name tokens, other tokens) """
+        doc_string = ' '.join(str(doc_string or '').split())
+        name_tokens = self._name_tokens(name)
+        text_tokens = set(extra_tokens)
+        text_tokens.update(word for word in WORD_PATTERN.findall(doc_string.lower())
+                           if MIN_TOKEN_LENGTH <= len(word) <= MAX_TOKEN_LENGTH and word not in STOP_WORDS)
+        return (name, kind, qualified_name, anchor, doc_string[:SUMMARY_LENGTH], tuple(sorted(name_tokens)),
+                tuple(sorted(text_tokens - name_tokens)))
+
+    @staticmethod
+    def _name_tokens(name):
+        """ The lower case name and its words, e.g. parseHTMLFile_v2 --> parsehtmlfile_v2, parse, html, file, v2. """
+        tokens = {name.lower()}
+        for part in name.split('_'):
+            tokens.add(part.lower())
+            tokens.update(word.lower() for word in NAME_PART_PATTERN.findall(part))
+        return {token for token in tokens
+                if MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH and token not in STOP_WORDS}
+
+    @staticmethod
+    def _shards(postings):
+        """
+        Groups the tokens by their first MIN_TOKEN_LENGTH characters, splitting groups with more than
+        SHARD_POSTINGS postings by one more character until they fit. Tokens as long as the key stay in the
+        key's own shard.
+        :return: generator of (shard key, sorted tokens).
+        """
+        groups = {}
+        for token in postings:
+            groups.setdefault(token[:MIN_TOKEN_LENGTH], []).append(token)
+        stack = list(groups.items())
+        while stack:
+            key, tokens = stack.pop()
+            if (sum(len(postings[token]) for token in tokens) <= SHARD_POSTINGS or
+                    all(len(token) <= len(key) for token in tokens)):
+                yield key, sorted(tokens)
+                continue
+            sub_groups = {}
+            for token in tokens:
+                sub_groups.setdefault(token[:len(key) + 1], []).append(token)
+            stack.extend(sub_groups.items())
+
+    @staticmethod
+    def _delta_encode(token_postings):
+        """ Postings are (symbol id << 1 | name match) in id order; ids are stored as gaps to keep shards small. """
+        encoded, previous = [], 0
+        for posting in token_postings:
+            encoded.append(((posting >> 1) - previous) << 1 | posting & 1)
+            previous = posting >> 1
+        return encoded
+
+    @staticmethod
+    def _script(key, data):
+        return 'pydocSearch.register({0}, {1});\n'.format(json.dumps(key), json.dumps(data, separators=(',', ':')))
+
+    @staticmethod
+    def _write_if_changed(file, content):
+        try:
+            with open(file, 'r') as f:
+                if f.read() == content:
+                    return
+        except OSError:
+            pass
+        # Replaced rather than rewritten, as the file may be hard-linked from the published docs.
+        temp_file = file + '.tmp'
+        with open(temp_file, 'w') as f:
+            f.write(content)
+        os.replace(temp_file, file)
@@ -0,0 +1,178 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.build_manifest import BuildManifest, MANIFEST_FILE_NAME
+from html_utils.cross_references import SymbolTable
+from html_utils.page_writer import PRECOMPRESS_FORMATS, compress
+from html_utils.search_index import SearchIndex
+from pydocumenter_utils.sharding import Shard
+import json
+import logging
+import os
+import re
+import shutil
+
+SHARD_MANIFEST_PREFIX = '.yaypd_shard'
+SHARD_MANIFEST_PATTERN = re.compile(r'^\.yaypd_shard_(\d+)_of_(\d+)\.json$')
+
+
+class ShardManifest():
+    """
+    What one shard of a sharded build produced, saved next to its pages: the search index symbols of the
+    pages it rendered, in incremental builds their fingerprints, and the cross reference symbols of its packages
+    with the pages linking into other shards. The search index and build manifest of the whole site are only
+    written once every shard is done, by merge_shards, which also resolves the links between shards.
+    """
+
+    def __init__(self, shard, library_name='', search_pages=None, pages=None, symbols=None, deferred_pages=None,
+                 precompress=()):
+        """
+        :param shard: Shard
+        :param library_name:
+        :param search_pages: SearchIndex.pages of the shard, None when search is disabled.
+        :param pages: BuildManifest.pages of the shard, None when not building incrementally.
+        :param symbols: SymbolTable.records of the shard, None without cross references.
+        :param deferred_pages: pages with links into other shards, relative to the output directory.
+        :param precompress: formats of the precompressed siblings of the pages, see BuildManifest.
+        """
+        self.shard = shard
+        self.library_name = library_name
+        self.search_pages = search_pages
+        self.pages = pages
+        self.symbols = symbols
+        self.deferred_pages = deferred_pages or []
+        self.precompress = tuple(precompress or ())
+
+    def save(self, save_directory : str):
+        """
+        Writes the manifest to save_directory. Manifests left over from builds with another number of shards
+        are removed, so they are not merged.
+        """
+        for file_name in os.listdir(save_directory):
+            match = SHARD_MANIFEST_PATTERN.match(file_name)
+            if match and int(match.group(2)) != self.shard.count:
+                os.remove(os.path.join(save_directory, file_name))
+
+        path = os.path.join(save_directory, self.shard.file_name(SHARD_MANIFEST_PREFIX))
+        temp_path = path + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(dict(shard=[self.shard.index, self.shard.count], library=self.library_name,
+                               search=self.search_pages, pages=self.pages, symbols=self.symbols,
+                               deferred=self.deferred_pages, precompress=self.precompress), f,
+                          separators=(',', ':'))
+            os.replace(temp_path, path)
+        except Exception as e:
+            print("Could not save the shard manifest {0}. Error: {1}".format(path, e))
+
+    @classmethod
+    def load(cls, path : str):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(Shard(*data['shard']), data['library'], data['search'], data['pages'], data.get('symbols'),
+                   data.get('deferred'), data.get('precompress'))
+
+
+def merge_shards(save_directory : str, shard_directories=()):
+    """
+    Stitches the shards of a sharded build into one site: copies the output of shards built elsewhere into
+    save_directory, resolves the links between shards, then writes the search index and build manifest of the
+    whole site and removes the pages of modules and packages that no longer exist.
+    :param save_directory: Output directory of the site, possibly also used by some of the shards.
+    :param shard_directories: Output directories of shards built on other machines or paths.
+    :return: list of the merged ShardManifests.
+    """
+    for directory in shard_directories:
+        if os.path.abspath(directory) == os.path.abspath(save_directory):
+            continue
+        for dirpath, _, filenames in os.walk(directory):
+            destination = os.path.join(save_directory, os.path.relpath(dirpath, directory))
+            if not os.path.exists(destination):
+                os.makedirs(destination)
+            for file_name in filenames:
+                shutil.copy2(os.path.join(dirpath, file_name), os.path.join(destination, file_name))
+
+    manifests = sorted((ShardManifest.load(os.path.join(save_directory, file_name))
+                        for file_name in os.listdir(save_directory) if SHARD_MANIFEST_PATTERN.match(file_name)),
+                       key=lambda manifest: manifest.shard.index)
+    if not manifests:
+        raise ValueError("No shard manifests found in {}".format(save_directory))
+    count = manifests[0].shard.count
+    manifests = [manifest for manifest in manifests if manifest.shard.count == count]
+    missing = sorted(set(range(1, count + 1)) - set(manifest.shard.index for manifest in manifests))
+    if missing:
+        raise ValueError("Cannot merge {0}: shard(s) {1} of {2} missing".format(
+            save_directory, ', '.join(str(index) for index in missing), count))
+
+    if any(manifest.symbols is not None for manifest in manifests):
+        resolve_deferred_links(save_directory, manifests)
+
+    if any(manifest.search_pages is not None for manifest in manifests):
+        search_index = SearchIndex()
+        for manifest in manifests:
+            search_index.pages.update(manifest.search_pages or {})
+        search_index.save(save_directory)
+
+    if any(manifest.pages is not None for manifest in manifests):
+        build_manifest = BuildManifest(os.path.join(save_directory, MANIFEST_FILE_NAME),
+                                       precompress=set().union(*(manifest.precompress for manifest in manifests)))
+        for manifest in manifests:
+            build_manifest.pages.update(manifest.pages or {})
+        build_manifest.remove_stale_pages(save_directory)
+        build_manifest.save()
+
+    logging.info("Merged {0} shards of {1}".format(count, manifests[0].library_name))
+    return manifests
+
+
+def merge_symbols(manifests):
+    """
+    Rebuilds the symbol table of the whole library from the shards' records. Every shard records every package
+    and module in the same order, and the classes and functions of a module are taken from the shard owning it.
+    :param manifests: ShardManifests of every shard.
+    :return: SymbolTable
+    """
+    records = [manifest.symbols for manifest in manifests if manifest.symbols is not None]
+    if len(set(len(shard_records) for shard_records in records)) > 1:
+        raise ValueError("Cannot merge the symbols of shards built from different versions of the library")
+    merged = []
+    for shard_records in zip(*records):
+        modules = [record for record in shard_records if record[0] == 'module' and record[5]]
+        merged.append(modules[0] if modules else shard_records[0])
+    return SymbolTable.from_records(manifests[0].library_name, merged)
+
+
+def resolve_deferred_links(save_directory, manifests):
+    """
+    Rewrites the links between shards of the pages that have some with the symbols of every shard, so they are
+    the same as in an unsharded build. Precompressed siblings of the pages are written again.
+    :param save_directory: Output directory of the merged site.
+    :param manifests: ShardManifests of every shard.
+    :return: Nothing.
+    """
+    symbol_table = merge_symbols(manifests)
+    for manifest in manifests:
+        for page_key in manifest.deferred_pages:
+            path = os.path.join(save_directory, page_key)
+            try:
+                with open(path, 'r', encoding='utf-8', newline='') as f:
+                    html, replaced = symbol_table.resolve_deferred_links(f.read())
+                if not replaced:
+                    continue
+                data = html.encode('utf-8')
+                for compression in PRECOMPRESS_FORMATS:
+                    if os.path.exists('.'.join([path, compression])):
+                        _replace_file('.'.join([path, compression]), compress(data, compression))
+                _replace_file(path, data)
+            except Exception as e:
+                print("Could not resolve the links of {0}. Error: {1}".format(path, e))
+    symbol_table.log_summary()
+
+
+def _replace_file(path, data):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
@@ -0,0 +1,226 @@
+/*
+    Search box of the generated docs. Reads the sharded index written by html_utils/search_index.py:
+    only the shards covering the typed prefix and the symbol chunks of the shown results are loaded.
+    A short prefix can cover many shards: they are loaded MAX_SHARDS at a time, the next batch when more
+    results are asked for, and the results say when shards are still left to load. Tokens found in too many
+    docstrings only keep their best matches in the index; the results say so when a term matched one of them.
+    Index files are scripts calling pydocSearch.register, so the docs can be searched from file:// as well.
+*/
+var pydocSearch = (function () {
+    var MAX_RESULTS = 20;
+    var MAX_SHARDS = 16;
+    var DEBOUNCE_MS = 150;
+
+    var root = '';
+    var loaded = {};
+    var pending = {};
+    var query_number = 0;
+
+    function register(key, data) {
+        loaded[key] = data;
+        if (pending[key]) {
+            pending[key].resolve(data);
+        }
+    }
+
+    function load(key, file) {
+        if (loaded.hasOwnProperty(key)) {
+            return Promise.resolve(loaded[key]);
+        }
+        if (!pending[key]) {
+            var callbacks = {};
+            callbacks.promise = new Promise(function (resolve, reject) {
+                callbacks.resolve = resolve;
+                var script = document.createElement('script');
+                script.src = root + 'search/' + file;
+                script.onerror = function () {
+                    delete pending[key];
+                    reject(new Error('Could not load ' + script.src));
+                };
+                document.head.appendChild(script);
+            });
+            pending[key] = callbacks;
+        }
+        return pending[key].promise;
+    }
+
+    function lowerBound(tokens, term) {
+        var low = 0, high = tokens.length;
+        while (low < high) {
+            var middle = (low + high) >> 1;
+            if (tokens[middle] < term) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+        return low;
+    }
+
+    // Resolves to {scores: {symbol id: score}, complete: bool, capped: bool} of the symbols with a token starting
+    // with term. The shards whose key is a prefix of term, holding its exact matches, are always loaded, and at
+    // most max_shards of the shards holding only longer tokens; complete is false if some of those were left out.
+    // capped is true if a matching token only kept its best docstring matches.
+    function matchTerm(index, term, max_shards) {
+        var keys = index.shards.filter(function (key) {
+            return term.indexOf(key) === 0;
+        });
+        var longer = index.shards.filter(function (key) {
+            return key.length > term.length && key.indexOf(term) === 0;
+        });
+        keys = keys.concat(longer.slice(0, max_shards));
+        return Promise.all(keys.map(function (key) {
+            return load('shard:' + key, 'shard_' + key + '.js');
+        })).then(function (shards) {
+            var scores = {};
+            var capped = false;
+            shards.forEach(function (shard) {
+                for (var i = lowerBound(shard.t, term); i < shard.t.length && shard.t[i].indexOf(term) === 0; i++) {
+                    var exact = shard.t[i] === term;
+                    if (shard.c && shard.c.indexOf(i) >= 0) {
+                        capped = true;
+                    }
+                    var id = 0;
+                    shard.p[i].forEach(function (value) {
+                        id += value >> 1;
+                        var score = (value & 1 ? 4 : 1) * (exact ? 3 : 1);
+                        if (!(scores[id] >= score)) {
+                            scores[id] = score;
+                        }
+                    });
+                }
+            });
+            return {scores: scores, complete: longer.length <= max_shards, capped: capped};
+        });
+    }
+
+    // Resolves to {records, more, capped} for the given number of pages of results: the best [name, kind,
+    // qualified name, url, summary] records matching every term of query, whether asking for another page could
+    // show more, either because there are more results or because shards were left out, and whether a term
+    // matched a word too common for all of its docstring matches to be indexed.
+    function search(query, pages) {
+        pages = pages || 1;
+        return load('index', 'index.js').then(function (index) {
+            var terms = (query.toLowerCase().match(/[a-z0-9_]+/g) || []).filter(function (term) {
+                return term.length >= index.min_length;
+            });
+            if (!terms.length) {
+                return {records: [], more: false, capped: false};
+            }
+            return Promise.all(terms.map(function (term) {
+                return matchTerm(index, term, MAX_SHARDS * pages);
+            })).then(function (matches) {
+                var term_scores = matches.map(function (match) { return match.scores; });
+                var complete = matches.every(function (match) { return match.complete; });
+                var capped = matches.some(function (match) { return match.capped; });
+                var ranked = Object.keys(term_scores[0]).filter(function (id) {
+                    return term_scores.every(function (scores) { return scores.hasOwnProperty(id); });
+                }).map(function (id) {
+                    var score = term_scores.reduce(function (total, scores) { return total + scores[id]; }, 0);
+                    return [score, +id];
+                }).sort(function (a, b) {
+                    return b[0] - a[0] || a[1] - b[1];
+                });
+                var more = !complete || ranked.length > MAX_RESULTS * pages;
+                ranked = ranked.slice(0, MAX_RESULTS * pages);
+
+                var chunks = {};
+                ranked.forEach(function (result) { chunks[Math.floor(result[1] / index.chunk)] = true; });
+                return Promise.all(Object.keys(chunks).map(function (chunk) {
+                    return load('symbols:' + chunk, 'symbols_' + chunk + '.js');
+                })).then(function () {
+                    return {
+                        records: ranked.map(function (result) {
+                            return loaded['symbols:' + Math.floor(result[1] / index.chunk)][result[1] % index.chunk];
+                        }),
+                        more: more,
+                        capped: capped
+                    };
+                });
+            });
+        });
+    }
+
+    function showResults(list, results, showMore) {
+        var records = results.records;
+        list.innerHTML = '';
+        records.forEach(function (record) {
+            var item = document.createElement('li');
+            var link = document.createElement('a');
+            link.href = root + record[3];
+            link.textContent = record[0];
+            var kind = document.createElement('small');
+            kind.textContent = ' ' + record[1] + ' ' + record[2];
+            link.appendChild(kind);
+            link.title = record[4];
+            item.appendChild(link);
+            list.appendChild(item);
+        });
+        if (results.capped) {
+            var note = document.createElement('li');
+            var text = document.createElement('small');
+            text.className = 'pydoc-search-capped';
+            text.textContent = 'Common word: only its best docstring matches are indexed.';
+            note.appendChild(text);
+            list.appendChild(note);
+        }
+        if (results.more) {
+            var more = document.createElement('li');
+            var button = document.createElement('a');
+            button.href = '#';
+            button.className = 'pydoc-search-more';
+            button.textContent = records.length ? 'More results...' : 'Search more of the index...';
+            button.addEventListener('click', function (event) {
+                event.preventDefault();
+                showMore();
+            });
+            more.appendChild(button);
+            list.appendChild(more);
+        } else if (!records.length) {
+            var empty = document.createElement('li');
+            empty.textContent = 'No results';
+            list.appendChild(empty);
+        }
+    }
+
+    function init() {
+        var input = document.getElementById('pydoc-search');
+        var list = document.getElementById('pydoc-search-results');
+        if (!input || !list) {
+            return;
+        }
+        root = input.getAttribute('data-root') || '';
+        var timer = null;
+
+        function update(pages) {
+            var number = ++query_number;
+            if (!input.value.trim()) {
+                list.innerHTML = '';
+                return;
+            }
+            search(input.value, pages).then(function (results) {
+                if (number === query_number) {
+                    showResults(list, results, function () { update(pages + 1); });
+                }
+            }, function (error) {
+                list.innerHTML = '';
+                if (window.console) {
+                    console.log(error);
+                }
+            });
+        }
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () { update(1); }, DEBOUNCE_MS);
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+
+    return {register: register, search: search};
+})();
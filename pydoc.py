@@ -3,14 +3,27 @@ Author: Reuben Ferrante
 Date:   27/10/2017
 """
 
+from html_utils.doc_server import DocServer, serve, DEFAULT_HOST, DEFAULT_MAX_PAGES, DEFAULT_PORT
+from html_utils.page_writer import PRECOMPRESS_FORMATS
 from html_utils.py_html_processor import HTMLCreator
+from html_utils.shard_manifest import merge_shards
+from python_file_parser.directory_file_searcher import DirectoryScanner, DEFAULT_EXCLUDES
 from python_file_parser.file_parser import FileParser
+from python_file_parser.file_watcher import create_watcher
+from python_file_parser.parse_cache import ParseCache, CACHE_FILE_NAME
+from pydocumenter_utils.model_serializer import ModelWriter, iter_model_packages, load_library, read_model_header
+from pydocumenter_utils.profiler import BuildProfiler, NULL_PROFILER
+from pydocumenter_utils.sharding import Shard, SHARD_WEIGHTS, get_package_weight
 from pydocumenter_utils.type_definitions import *
 from pydocumenter_utils.pydoc_utils import *
+from concurrent.futures import ProcessPoolExecutor
+import functools
 import os
 import logging
 import argparse
 import re
+import sys
+import time
 
 format = dict(format='%(asctime)s - %(message)s\t', datefmt='%d/%m/%Y %I:%M:%S %p')
 logger = logging.getLogger()
@@ -18,52 +31,318 @@ logger = logging.getLogger()
 logging.basicConfig(level=logging.INFO, **format)
 logger.setLevel(logging.INFO)
 
+PROFILE_FILE_NAME = 'yaypd_profile.json'
+COMMANDS = ('parse', 'render', 'build', 'merge', 'serve')
 
-def get_content(parser, path: str, split_char='-', delimiter=os.sep):
+
+def get_content(parser, path: str, split_char='-', delimiter=os.sep, jobs=1, cache=None, scanner=None,
+                module_paths=None, profiler=None, shard=None, shard_weight='files'):
     """
     Walks the entire directory and returns a LibraryDefinition with the correct parent-child hierarchical
     package structure.
     :param path: Absolute path to search in.
     :param split_char: File name delimiter to split by.
+    :param jobs: Number of processes used to parse the files. 1 parses in this process, 0 uses all cores.
+    :param cache: Optional ParseCache; unchanged files are taken from it instead of being parsed.
+    :param scanner: Optional DirectoryScanner, e.g. with extra exclude patterns.
+    :param module_paths: Optional dict, filled with .py file path --> PackageDefinition it belongs to.
+    :param profiler: Optional BuildProfiler; times the walk, the parsing of each file and the assembly.
+    :param shard: Optional Shard. The whole library is walked, but only the files of the packages assigned to
+    the shard are parsed; the modules of the other packages only get their names, e.g. for navigation.
+    :param shard_weight: 'files' or 'bytes', what the packages are balanced on between shards.
     :return: LibraryDefinition
     """
+    packages, batches = [], []
+    timer = profiler or NULL_PROFILER
+    with timer.phase('walk'):
+        for package, files, parent_name in _walk_library(path, split_char, delimiter, scanner=scanner):
+            packages.append(package)
+            batches.append((files, parent_name))
+            if module_paths is not None:
+                module_paths.update((file.path, package) for file in files)
+
+    owned = [True] * len(packages)
+    if shard is not None:
+        shard.assign({package.get_name(): get_package_weight(files, shard_weight)
+                      for package, (files, _) in zip(packages, batches)})
+        owned = [shard.owns(package.get_name()) for package in packages]
+        logging.info("Shard {0}: {1} of {2} packages".format(shard, sum(owned), len(packages)))
+
+    with timer.phase('parse'):
+        parsed = _parse_batches(parser, [batch if own else ([], batch[1]) for batch, own in zip(batches, owned)],
+                                jobs, cache, profiler)
+    with timer.phase('assembly'):
+        for package, modules_list, own, (files, parent_name) in zip(packages, parsed, owned, batches):
+            if not own:
+                modules_list = [ModuleDefinition(file.name, '', None, [], [], parent_name) for file in files]
+            _set_package_modules(package, modules_list)
+
+    return packages[0] if packages else None
+
+def iter_content(parser, path: str, split_char='-', delimiter=os.sep, cache=None, scanner=None, profiler=None):
+    """
+    Streaming version of get_content. Walks the directory top-down and yields each package (the
+    LibraryDefinition first) as soon as its modules are parsed. The sub-packages of a yielded package are
+    already created, so its page can be rendered straight away; only the modules of one directory are parsed
+    at a time.
+    :param path: Absolute path to search in.
+    :param split_char: File name delimiter to split by.
+    :param cache: Optional ParseCache.
+    :param scanner: Optional DirectoryScanner.
+    :param profiler: Optional BuildProfiler; times the parsing of each file.
+    :return: generator of LibraryDefinition/PackageDefinition.
+    """
+    timer = profiler or NULL_PROFILER
+    for package, files, parent_name in _walk_library(path, split_char, delimiter, create_sub_packages=True,
+                                                     scanner=scanner):
+        with timer.phase('parse'):
+            modules_list = _parse_batches(parser, [(files, parent_name)], cache=cache, profiler=profiler)[0]
+        _set_package_modules(package, modules_list)
+        yield package
+
+def get_lazy_content(parser, path: str, split_char='-', delimiter=os.sep, cache=None, scanner=None):
+    """
+    Lazy version of get_content. Walks the directory and returns the package structure straight away, without
+    parsing any file: every module is a LazyModuleDefinition, parsed the first time its contents are read, e.g.
+    when rendering its page or looking up one of its classes. Package descriptions are read from their modules
+    on first access as well.
+    :param path: Absolute path to search in.
+    :param split_char: File name delimiter to split by.
+    :param cache: Optional ParseCache; unchanged files are taken from it when they are first read.
+    :param scanner: Optional DirectoryScanner.
+    :return: LazyLibraryDefinition
+    """
+    loader = functools.partial(_load_module, parser, cache)
+    library = None
+    for package, files, parent_name in _walk_library(path, split_char, delimiter, scanner=scanner,
+                                                     library_class=LazyLibraryDefinition):
+        library = library or package
+        package.modules = [LazyModuleDefinition(file.name, file.path, loader, parent_name) for file in files]
+    return library
 
+def _load_module(parser, cache, path, parent_package):
+    """ Loader of the LazyModuleDefinitions made by get_lazy_content. """
+    module = cache.get(path, parent_package) if cache else None
+    if module is None:
+        module, digest = parser.parse_file(path, parent_package)
+        if cache:
+            cache.put(path, module, digest=digest)
+    return module
+
+def _walk_library(path: str, split_char='-', delimiter=os.sep, create_sub_packages=False, scanner=None,
+                  library_class=LibraryDefinition):
+    """
+    Scans the directory top-down and builds the package structure.
+    :param path: Absolute path to search in.
+    :param split_char: File name delimiter to split by.
+    :param create_sub_packages: Also create the sub-packages of a directory before it is yielded.
+    :param scanner: Optional DirectoryScanner.
+    :param library_class: LibraryDefinition or LazyLibraryDefinition.
+    :return: generator of (LibraryDefinition/PackageDefinition, ScannedFile list, parent package name)
+    """
     logging.debug("Searching directory")
     library_name = path.split(delimiter)[-1]
+    scanner = scanner or DirectoryScanner()
 
     main_library = None
-    for (dirpath, dirnames, filenames) in os.walk(path):
+    for directory in scanner.scan(path):
+        parent_name = split_char.join(directory.relative_parts)
+
+        if main_library is None:
+            main_library = library_class(library_name=library_name)
+            package = main_library
+        else:
+            # The parent's name is passed on, so directory names containing split_char are not split.
+            package = main_library.create_package(package_name=parent_name, split_char=split_char,
+                                                  parent_name=split_char.join(directory.relative_parts[:-1]))
 
-        library_name_end_index = substring_occurrences(dirpath, library_name, include_end=True)[0][-1] + len(delimiter)
-        parent_name = str.replace(dirpath[library_name_end_index:], delimiter, split_char)
+        if create_sub_packages:
+            for sub_directory in directory.dirnames:
+                main_library.create_package(package_name=split_char.join(directory.relative_parts + (sub_directory,)),
+                                            split_char=split_char, parent_name=parent_name)
 
-        if "pycache" in dirpath:
-            continue
+        yield package, directory.files, parent_name
 
-        if parent_name == library_name or parent_name == '':
-            main_library = LibraryDefinition(library_name=str.replace(dirpath[dirpath.find(library_name):], delimiter, split_char))
-            package = main_library
+def _set_package_modules(package, modules_list):
+    """ Sets the parsed modules of a package, and its description from the modules' @PACKAGEDESC. """
+    package.modules = modules_list
+    package.doc_string = get_modules_package_docstring(modules_list)
+
+def _parse_batches(parser, batches, jobs=1, cache=None, profiler=None):
+    """
+    Parses the files of every directory, either in this process or in a process pool. Each directory is sent
+    to the pool as a single task, and results are returned in the same order as the batches. Files found in
+    the cache are not parsed again.
+    :param parser: FileParser
+    :param batches: list of (ScannedFile list, parent package name), one entry per directory.
+    :param jobs: Number of processes, 0 uses all cores.
+    :param cache: Optional ParseCache.
+    :param profiler: Optional BuildProfiler; records the time spent on each parsed file.
+    :return: list of ModuleDefinition lists.
+    """
+    results, pending = [], []
+    for files, parent_name in batches:
+        modules = [cache.get(file.path, parent_name, file.stat) for file in files] if cache else [None] * len(files)
+        results.append(modules)
+        pending.append(([file for file, module in zip(files, modules) if module is None], parent_name))
+
+    jobs = jobs or os.cpu_count() or 1
+    paths = [([file.path for file in files], parent_name) for files, parent_name in pending]
+    parse_modules = parser.parse_modules if profiler is None else parser.parse_modules_timed
+    # With a cache, workers also return the digest of what they parsed, so the files are not read again.
+    parse_modules = functools.partial(parse_modules, digests=cache is not None)
+    if jobs == 1 or sum(len(files) for files, _ in paths) < 2:
+        parsed = [parse_modules(files, parent_name) for files, parent_name in paths]
+    else:
+        logging.info("Parsing with {} processes".format(jobs))
+        chunksize = max(1, len(paths) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parsed = list(executor.map(parse_modules, *zip(*paths), chunksize=chunksize))
+
+    if profiler is not None:
+        profiler.count('cached_files', sum(len(files) for files, _ in batches) - sum(len(f) for f, _ in paths))
+        for (files, _), (_, timings) in zip(paths, parsed):
+            for file, seconds in zip(files, timings):
+                profiler.record('parse', file, seconds)
+        parsed = [modules for modules, _ in parsed]
+
+    for modules, (files, _), parsed_modules in zip(results, pending, parsed):
+        missing = [i for i, module in enumerate(modules) if module is None]
+        for i, file, module in zip(missing, files, parsed_modules):
+            if cache:
+                module, digest = module
+                cache.put(file.path, module, file.stat, digest)
+            modules[i] = module
+    return results
+
+def export_packages(packages, writer):
+    """
+    Writes each package to the model file as it streams past, before it is rendered and its modules dropped.
+    :param packages: generator of LibraryDefinition/PackageDefinition, e.g. from iter_content.
+    :param writer: ModelWriter
+    :return: generator of the same packages.
+    """
+    for package in packages:
+        writer.write_package(package)
+        yield package
+
+def parse_to_model(parser, path: str, model_path: str, split_char='-', jobs=1, cache=None, scanner=None,
+                   stream=False, profiler=None):
+    """
+    Parses a library into a model file (see pydocumenter_utils.model_serializer), without rendering anything.
+    :param path: Absolute path of the library.
+    :param model_path: .jsonl or .msgpack file to write.
+    :param split_char: File name delimiter to split by.
+    :param jobs: Number of processes used to parse the files, ignored when streaming.
+    :param cache: Optional ParseCache, ignored when streaming.
+    :param scanner: Optional DirectoryScanner.
+    :param stream: Write each package as soon as it is parsed and drop its modules, keeping memory bounded.
+    :param profiler: Optional BuildProfiler.
+    :return: Nothing.
+    """
+    with ModelWriter(model_path, split_char=split_char) as writer:
+        if stream:
+            for package in export_packages(iter_content(parser, path, split_char=split_char, scanner=scanner,
+                                                        profiler=profiler), writer):
+                # Only the package structure is needed to place the packages still to come.
+                package.modules = []
         else:
-            package = main_library.create_package(package_name=parent_name, split_char=split_char)
-
-        package_description = ''
-        modules_list = []
-        for file in filenames:
-            if ".py" in file:
-                directory = ''.join([dirpath, delimiter, file])
-                imports = parser.find_imports(directory)
-                classes, functions, module_description, temp_package_description = parser.find_classes_and_functions(
-                    directory)
-                classes.sort(key=lambda x: x.get_name())
-                functions.sort(key=lambda x: x.get_name())
-                if temp_package_description is not '':
-                    package_description = ''.join([package_description, temp_package_description])
-                modules_list.append(
-                    ModuleDefinition(file, module_description, imports, classes, functions, parent_name))
-        package.modules = modules_list
-        package.doc_string = package_description
-
-    return main_library
+            library = get_content(parser, path, split_char=split_char, jobs=jobs, cache=cache, scanner=scanner,
+                                  profiler=profiler)
+            with (profiler or NULL_PROFILER).phase('export'):
+                writer.write_library(library)
+
+def render_model(model_path: str, save_directory: str, stream=False, profiler=None, shard=None, **options):
+    """
+    Renders the docs of a model file written by the parse command or by --export, without parsing any source.
+    :param model_path: .jsonl or .msgpack file.
+    :param save_directory: Path where to output the docs.
+    :param stream: Render each package as it is read from the model and drop its modules afterwards. Imports and
+    annotations are not linked.
+    :param profiler: Optional BuildProfiler.
+    :param shard: Optional Shard to only render the packages assigned to it, balanced on their number of
+    modules. Not supported when streaming.
+    :param options: Other HTMLCreator options, e.g. packages to only render some of the packages.
+    :return: HTMLCreator
+    """
+    header = read_model_header(model_path)
+    if header is None or header.get('type') != 'library':
+        raise ValueError("{} is not a YAYPD model file".format(model_path))
+
+    options = dict(options, split_char=header.get('split_char', '-'), profiler=profiler)
+    if stream:
+        if shard is not None:
+            raise ValueError("Rendering a shard cannot be streamed")
+        options.pop('jobs', None)
+        html_creator = HTMLCreator(save_directory, **options)
+        html_creator.create_html_doc_streaming(iter_model_packages(model_path))
+    else:
+        with (profiler or NULL_PROFILER).phase('load'):
+            library = load_library(model_path)
+        if shard is not None:
+            shard.assign({package.get_name(): len(package.get_modules()) + 1 for package in _iter_packages(library)})
+        html_creator = HTMLCreator(save_directory, library, shard=shard, **options)
+        html_creator.create_html_doc()
+    return html_creator
+
+def _iter_packages(library):
+    """ :return: generator of the library and all its packages, parents first. """
+    stack = [library]
+    while stack:
+        package = stack.pop()
+        yield package
+        stack.extend(package.get_subpackages().values())
+
+def watch(parser, html_creator, path: str, split_char='-', cache=None, scanner=None, module_paths=None):
+    """
+    Keeps the library and the HTMLCreator resident and rebuilds the docs whenever a file changes. An edited
+    module is re-parsed on its own and only its page and its package's page are re-rendered. Added or removed
+    files and directories re-walk the library (unchanged files come from the cache) and rebuild the docs.
+    Runs until interrupted.
+    :param parser: FileParser
+    :param html_creator: HTMLCreator whose library was already rendered once.
+    :param path: Absolute path of the library.
+    :param split_char: File name delimiter to split by.
+    :param cache: Optional ParseCache.
+    :param scanner: Optional DirectoryScanner.
+    :param module_paths: .py file path --> PackageDefinition, as filled by get_content. The library is parsed
+    again when it is not given.
+    :return: Nothing.
+    """
+    library = html_creator.library
+    if module_paths is None:
+        module_paths = {}
+        library = get_content(parser, path, split_char=split_char, cache=cache, scanner=scanner,
+                              module_paths=module_paths)
+        html_creator.set_library(library)
+    watcher = create_watcher(path, scanner)
+    logging.info("Watching {} for changes".format(path))
+    try:
+        while True:
+            changed = watcher.wait_for_changes()
+            start = time.time()
+            if any(file not in module_paths or not os.path.isfile(file) for file in changed):
+                module_paths.clear()
+                library = get_content(parser, path, split_char=split_char, cache=cache, scanner=scanner,
+                                      module_paths=module_paths)
+                html_creator.set_library(library)
+                html_creator.create_html_doc()
+            else:
+                for file in sorted(changed):
+                    package = module_paths[file]
+                    module, digest = parser.parse_file(file, package.get_name() if package is not library else '')
+                    if cache:
+                        cache.put(file, module, digest=digest)
+                    modules = [module if m.get_name() == module.get_name() else m for m in package.get_modules()]
+                    _set_package_modules(package, modules)
+                    html_creator.refresh_package(package, [module])
+            if cache:
+                cache.save()
+            logging.info("Rebuilt {0} changed path(s) in {1:.3f}s".format(len(changed), time.time() - start))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
 
 def get_correct_path(path):
     path = os.path.join(*re.split('//|/|\\\\', path)).strip()
@@ -73,33 +352,275 @@ def get_correct_path(path):
             path = os.path.join(path[:i+1], os.sep, path[i+1:])
     return path
 
+def shard_argument(spec):
+    """ argparse type of --shard. """
+    try:
+        return Shard.parse(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def get_scanner(args):
+    """ :return: DirectoryScanner with the excludes given on the command line. """
+    return DirectoryScanner(excludes=args.exclude,
+                            default_excludes=() if args.no_default_excludes else DEFAULT_EXCLUDES)
+
+def create_argument_parser():
+    """ Command line of the parse, render, build and merge commands. """
+    source_options = argparse.ArgumentParser(add_help=False)
+    source_options.add_argument('-i', '--library_path', type=str,
+                                help = 'Python project/package/module path, e.g. C:/MyProject')
+    source_options.add_argument('-c', '--split_char', type=str,
+                                help='Separation character to add to the output folder\'s name to'
+                                     'represent a directory structure, e.g. MyProject/blog/main.py'
+                                     ' --> blog-main.html',
+                                default='-')
+    source_options.add_argument('-j', '--jobs', type=int,
+                                help='Number of processes used to parse the library. 0 uses all cores.',
+                                default=1)
+    source_options.add_argument('--no-cache', action='store_true',
+                                help='Parse every file again instead of reusing the parse cache kept in the output '
+                                     'path.')
+    source_options.add_argument('-x', '--exclude', type=str, action='append',
+                                help='.gitignore-style pattern of files or directories to skip, e.g. "tests/" or '
+                                     '"*_pb2.py". Can be given several times. .gitignore files are honored as well.')
+    source_options.add_argument('--no-default-excludes', action='store_true',
+                                help='Also walk the directories skipped by default: __pycache__, version control and '
+                                     'tool caches, *.egg-info, and build, dist, venv and node_modules at the library '
+                                     'root.')
+    source_options.add_argument('--fast', action='store_true',
+                                help='Parse a skeleton of every file, without the function bodies, instead of its '
+                                     'whole syntax tree. 2-3 times faster, but files with a syntax error inside a '
+                                     'function body are documented instead of skipped.')
+
+    html_options = argparse.ArgumentParser(add_help=False)
+    html_options.add_argument('-o', '--output_path', type=str,
+                              help='Path where to output the docs. Folder doesn\'t need to exist.')
+    html_options.add_argument('--incremental', action='store_true',
+                              help='Only render and write the pages whose content changed since the previous build, '
+                                   'and delete the pages of removed modules and packages.')
+    html_options.add_argument('--template-cache', type=str,
+                              help='Directory to keep precompiled html templates in, so later runs skip template '
+                                   'compilation.')
+    html_options.add_argument('--render-jobs', type=int,
+                              help='Number of processes used to render the html pages. 0 uses all cores. Defaults to '
+                                   '--jobs when building, 1 when rendering.')
+    html_options.add_argument('-p', '--package', type=str, action='append',
+                              help='Only write the pages of this package and its sub-packages, e.g. html_utils or '
+                                   'html_utils.static. Can be given several times. Navigation, links and the search '
+                                   'index still cover the whole library.')
+    html_options.add_argument('--split-threshold', type=int,
+                              help='Split the page of any module with more than this many classes, methods and '
+                                   'functions into a table of contents and part pages of at most this many symbols '
+                                   'each.')
+    html_options.add_argument('--no-search', action='store_true',
+                              help='Do not build the search index, and leave the search box out of the pages.')
+    html_options.add_argument('--atomic', action='store_true',
+                              help='Write the docs to a staging directory next to the output path and swap it in '
+                                   'once complete, so the published docs are never seen half written.')
+    html_options.add_argument('--archive', type=str,
+                              help='Write the docs into a single .zip, .tar or .tar.gz file, with the static files, '
+                                   'instead of the output directory. A relative path is taken from the output path.')
+    html_options.add_argument('--precompress', type=str, action='append', choices=PRECOMPRESS_FORMATS,
+                              help='Also write a compressed copy next to every page, e.g. index.html.gz, for web '
+                                   'servers that serve precompressed files. Can be given twice, br needs brotli.')
+    html_options.add_argument('--shard', type=shard_argument, metavar='K/N',
+                              help='Only build shard K of N: the packages are split into N shards of about the same '
+                                   'size, the same way on every machine, and only those of shard K are parsed and '
+                                   'rendered. Run the merge command once all shards are done.')
+
+    profile_options = argparse.ArgumentParser(add_help=False)
+    profile_options.add_argument('--profile', type=str, nargs='?', const=PROFILE_FILE_NAME,
+                                 help='Print the wall/CPU time of each phase, the slowest files and pages and the '
+                                      'peak memory, and save them as JSON. The file defaults to {} in the output '
+                                      'path.'.format(PROFILE_FILE_NAME))
+    profile_options.add_argument('--profile-top', type=int, default=20,
+                                 help='Number of slowest files and pages listed by --profile.')
+    profile_options.add_argument('--profile-pstats', type=str,
+                                 help='Also run the build under cProfile and dump its stats to this file, e.g. for '
+                                      'python -m pstats or snakeviz.')
+
+    parser = argparse.ArgumentParser(description='YAYPD! Yet Another Python Documenter',
+                                     epilog='Without a command, build is run, e.g. pydoc.py -i C:/MyProject -o '
+                                            'C:/Docs. Run pydoc.py <command> -h for the options of a command.')
+    commands = parser.add_subparsers(dest='command', metavar='{parse,render,build,merge,serve}')
+
+    parse_parser = commands.add_parser('parse', parents=[source_options, profile_options],
+                                       help='Parse a library into a model file, without rendering it.')
+    parse_parser.add_argument('-m', '--model', type=str, required=True,
+                              help='Model file to write, as JSON Lines (.jsonl) or msgpack (.msgpack, needs the '
+                                   'msgpack package). The parse cache and profile are kept next to it.')
+    parse_parser.add_argument('--stream', action='store_true',
+                              help='Write each package as soon as it is parsed and drop its module contents '
+                                   'afterwards, keeping memory bounded on very large libraries. Parsing runs serially '
+                                   'and the parse cache is not used.')
+
+    render_parser = commands.add_parser('render', parents=[html_options, profile_options],
+                                        help='Render the docs of a model file, without parsing any source.')
+    render_parser.add_argument('-m', '--model', type=str, required=True,
+                               help='Model file written by the parse command or by build --export.')
+    render_parser.add_argument('--stream', action='store_true',
+                               help='Render each package as it is read from the model and drop its module contents '
+                                    'afterwards, keeping memory bounded on very large libraries. Rendering runs '
+                                    'serially and imports are not linked.')
+
+    build_parser = commands.add_parser('build', parents=[source_options, html_options, profile_options],
+                                       help='Parse a library and render its docs (the default).')
+    build_parser.add_argument('--stream', action='store_true',
+                              help='Render each package as soon as it is parsed and drop its module contents '
+                                   'afterwards, keeping memory bounded on very large libraries. Parsing and rendering '
+                                   'run serially and the parse cache is not used.')
+    build_parser.add_argument('--watch', action='store_true',
+                              help='After the first build, keep running and update the docs whenever a file changes.')
+    build_parser.add_argument('--export', type=str,
+                              help='Also write the parsed library to this file, as JSON Lines (.jsonl) or msgpack '
+                                   '(.msgpack, needs the msgpack package), e.g. for other tools to read.')
+    build_parser.add_argument('--shard-by', type=str, choices=SHARD_WEIGHTS, default='files',
+                              help='What shards are balanced on: the number of files or their size in bytes.')
+
+    merge_parser = commands.add_parser('merge', parents=[profile_options],
+                                       help='Merge the shards of a sharded build into one site.')
+    merge_parser.add_argument('-o', '--output_path', type=str,
+                              help='Path of the site. Shards may have been built into it directly.')
+    merge_parser.add_argument('shard_paths', type=str, nargs='*',
+                              help='Output paths of shards built elsewhere, copied into the output path first.')
+
+    serve_parser = commands.add_parser('serve', parents=[source_options],
+                                       help='Serve the docs over HTTP for local use, parsing and rendering each page '
+                                            'when it is requested.')
+    serve_parser.add_argument('--host', type=str, default=DEFAULT_HOST,
+                              help='Interface to listen on. Defaults to this machine only.')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                              help='Port to listen on, 0 picks a free one.')
+    serve_parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_PAGES,
+                              help='Number of rendered pages kept in memory. A cached page is rendered again once '
+                                   'its source files change.')
+    serve_parser.add_argument('--split-threshold', type=int,
+                              help='Split the page of any module with more than this many classes, methods and '
+                                   'functions into a table of contents and part pages.')
+    serve_parser.add_argument('--template-cache', type=str,
+                              help='Directory to keep precompiled html templates in.')
+    return parser
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='YAYPD! Yet Another Python Documenter')
-    parser.add_argument('-i', '--library_path', type=str,
-                        help = 'Python project/package/module path, e.g. C:/MyProject')
-    parser.add_argument('-o', '--output_path', type=str,
-                        help='Path where to output the docs. Folder doesn\'t need to exist.')
-    parser.add_argument('-c', '--split_char', type=str,
-                        help='Separation character to add to the output folder\'s name to'
-                              'represent a directory structure, e.g. MyProject/blog/main.py'
-                              ' --> blog-main.html',
-                        default='-')
-    args = parser.parse_args()
-
-    logger.info("Parsing library: {}".format(args.library_path))
-    logger.info("Generating Documentation in: {}".format(args.output_path))
-    logger.info("File separator: {}".format(args.split_char))
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['build'] + argv
+    argument_parser = create_argument_parser()
+    args = argument_parser.parse_args(argv)
+    if args.command == 'build' and args.shard is not None and (args.stream or args.watch or args.export):
+        argument_parser.error('--shard cannot be combined with --stream, --watch or --export')
+    if args.command in ('render', 'build') and args.shard is not None and args.atomic:
+        argument_parser.error('--shard cannot be combined with --atomic, shards share the output path')
+    if args.command in ('render', 'build') and args.archive and (args.incremental or args.atomic or
+                                                                 args.shard is not None or
+                                                                 getattr(args, 'watch', False)):
+        argument_parser.error('--archive cannot be combined with --incremental, --atomic, --shard or --watch')
 
     # Checks for path errors
-    args.library_path = get_correct_path(args.library_path)
-    args.output_path = get_correct_path(args.output_path)
+    if args.command in ('parse', 'build', 'serve'):
+        logger.info("Parsing library: {}".format(args.library_path))
+        logger.info("File separator: {}".format(args.split_char))
+        logger.info("Parsing jobs: {}".format(args.jobs))
+        args.library_path = get_correct_path(args.library_path)
+        assert isinstance(args.library_path, str)
+        assert os.path.isdir(args.library_path)
+    if args.command == 'serve':
+        # Nothing is parsed up front, the docs are rendered as they are browsed.
+        serve(DocServer(args.library_path, FileParser(fast=args.fast),
+                        get_scanner(args), split_char=args.split_char, max_pages=args.cache_size,
+                        split_threshold=args.split_threshold, template_cache_directory=args.template_cache),
+              host=args.host, port=args.port)
+        sys.exit(0)
+    if args.command != 'parse':
+        logger.info("Generating Documentation in: {}".format(args.output_path))
+        args.output_path = get_correct_path(args.output_path)
+        assert isinstance(args.output_path, str)
+    if args.command in ('parse', 'render'):
+        args.model = get_correct_path(args.model)
+    output_directory = os.path.dirname(args.model) if args.command == 'parse' else args.output_path
+
+    profiler = None
+    if args.profile or args.profile_pstats:
+        profiler = BuildProfiler(top=args.profile_top, pstats_path=args.profile_pstats)
+        profiler.start()
+
+    if args.command in ('render', 'build'):
+        html_options = dict(incremental=args.incremental, template_cache_directory=args.template_cache,
+                            search=not args.no_search, split_threshold=args.split_threshold, packages=args.package,
+                            atomic=args.atomic, precompress=tuple(args.precompress or ()))
+        if args.archive:
+            html_options['archive'] = os.path.join(args.output_path, args.archive)
+
+    cache = None
+    if args.command in ('parse', 'build'):
+        parser = FileParser(fast=args.fast)
+        scanner = get_scanner(args)
+        # The parse cache is a single blob holding every parsed module, which would defeat streaming.
+        if not (args.no_cache or args.stream):
+            cache_file_name = CACHE_FILE_NAME
+            if getattr(args, 'shard', None) is not None:
+                # Shards building into the same output path each keep their own cache.
+                cache_file_name = args.shard.file_name(*os.path.splitext(CACHE_FILE_NAME))
+            with (profiler or NULL_PROFILER).phase('cache_load'):
+                cache = ParseCache(os.path.join(output_directory, cache_file_name), parser.version)
+
+    html_creator = None
+    module_paths = None
+    failed = 0
+    if args.command == 'parse':
+        logger.info("Writing model: {}".format(args.model))
+        parse_to_model(parser, args.library_path, args.model, split_char=args.split_char, jobs=args.jobs,
+                       cache=cache, scanner=scanner, stream=args.stream, profiler=profiler)
+    elif args.command == 'render':
+        logger.info("Rendering model: {}".format(args.model))
+        html_creator = render_model(args.model, args.output_path, stream=args.stream, profiler=profiler,
+                                    shard=args.shard, jobs=1 if args.render_jobs is None else args.render_jobs,
+                                    **html_options)
+    elif args.command == 'merge':
+        with (profiler or NULL_PROFILER).phase('merge'):
+            merge_shards(args.output_path, args.shard_paths)
+            failed = HTMLCreator.copy_static_files(args.output_path)
+    else:
+        writer = ModelWriter(args.export, split_char=args.split_char) if args.export else None
+        if args.stream:
+            html_creator = HTMLCreator(args.output_path, split_char=args.split_char, profiler=profiler,
+                                       **html_options)
+            packages = iter_content(parser, args.library_path, split_char=args.split_char, scanner=scanner,
+                                    profiler=profiler)
+            html_creator.create_html_doc_streaming(export_packages(packages, writer) if writer else packages)
+        else:
+            module_paths = {}
+            library = get_content(parser, args.library_path, split_char=args.split_char, jobs=args.jobs,
+                                  cache=cache, scanner=scanner, module_paths=module_paths, profiler=profiler,
+                                  shard=args.shard, shard_weight=args.shard_by)
+            if writer:
+                with (profiler or NULL_PROFILER).phase('export'):
+                    writer.write_library(library)
+            html_creator = HTMLCreator(args.output_path, library, split_char=args.split_char,
+                                       jobs=args.jobs if args.render_jobs is None else args.render_jobs,
+                                       profiler=profiler, shard=args.shard, **html_options)
+            html_creator.create_html_doc()
+        if writer:
+            writer.close()
+    if cache:
+        with (profiler or NULL_PROFILER).phase('cache_save'):
+            cache.save()
 
-    assert isinstance(args.library_path, str)
-    assert isinstance(args.output_path, str)
-    assert os.path.isdir(args.library_path)
+    if profiler:
+        profiler.stop()
+        if args.profile:
+            profiler.save(os.path.join(output_directory, args.profile))
+        # Watch mode rebuilds are not profiled.
+        if html_creator is not None:
+            html_creator.profiler = None
 
-    # Start parsing
-    parser = FileParser()
-    library = get_content(parser, args.library_path, split_char=args.split_char)
+    if html_creator is not None:
+        failed = html_creator.failed_pages
+    if failed:
+        logger.error("{} files could not be written, the docs are incomplete".format(failed))
 
-    html_creator = HTMLCreator(args.output_path, library, split_char=args.split_char).create_html_doc()
+    if args.command == 'build' and args.watch:
+        watch(parser, html_creator, args.library_path, split_char=args.split_char, cache=cache, scanner=scanner,
+              module_paths=module_paths)
+    if failed:
+        sys.exit(1)
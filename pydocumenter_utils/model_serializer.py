@@ -0,0 +1,196 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from pydocumenter_utils.type_definitions import *
+import json
+import os
+
+try:
+    import msgpack
+except ImportError: # Optional, only needed for .msgpack files.
+    msgpack = None
+
+MODEL_VERSION = 1
+JSON_LINES = 'jsonl'
+MSGPACK = 'msgpack'
+
+
+def get_model_format(path : str, model_format=None):
+    """
+    :param path: model file path, e.g. docs/model.jsonl or docs/model.msgpack
+    :param model_format: 'jsonl' or 'msgpack'. Taken from the file extension when None.
+    :return: 'jsonl' or 'msgpack'
+    """
+    model_format = model_format or (MSGPACK if path.endswith('.msgpack') else JSON_LINES)
+    if model_format not in (JSON_LINES, MSGPACK):
+        raise ValueError("Unknown model format {}".format(model_format))
+    if model_format == MSGPACK and msgpack is None:
+        raise ImportError("Reading or writing .msgpack models needs the msgpack package (pip install msgpack)")
+    return model_format
+
+
+class ModelWriter():
+    """
+    Serializes a LibraryDefinition as a stream of records, one per line in JSON Lines or one msgpack object
+    each: the library first, then every package followed by its modules. A package always comes after its
+    parent, so the tree can be rebuilt in a single pass. Records are written as they are produced, the model
+    is never held in memory as a whole.
+    """
+
+    def __init__(self, path : str, model_format=None, split_char='-'):
+        self.path = path
+        self.split_char = split_char
+        self.model_format = get_model_format(path, model_format)
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.file = open(path, 'wb')
+        self.packer = msgpack.Packer(use_bin_type=True) if self.model_format == MSGPACK else None
+        self.library_name = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def write_library(self, library):
+        """ Writes a whole, fully parsed library. """
+        stack = [library]
+        while stack:
+            package = stack.pop()
+            self.write_package(package)
+            stack.extend(reversed(list(package.get_subpackages().values())))
+
+    def write_package(self, package):
+        """
+        Writes a package and its modules, e.g. as packages stream out of pydoc.iter_content. The first package
+        written must be the LibraryDefinition.
+        :param package: LibraryDefinition or PackageDefinition whose parent was already written.
+        """
+        sub_packages = list(package.get_subpackages())
+        if self.library_name is None:
+            self.library_name = package.get_name()
+            self._write(dict(type='library', version=MODEL_VERSION, name=package.get_name(),
+                             doc=package.get_docstring(), split_char=self.split_char, sub_packages=sub_packages))
+        else:
+            self._write(dict(type='package', name=package.get_name(), parent=package.get_parent(),
+                             doc=package.get_docstring(), sub_packages=sub_packages))
+        package_name = '' if package.get_name() == self.library_name else package.get_name()
+        for module in package.get_modules():
+            self._write(self._module_record(module, package_name))
+
+    def _module_record(self, module, package_name):
+        return dict(type='module', package=package_name, name=module.get_name(), parent=module.get_parent(),
+                    doc=module.get_docstring(), package_doc=module.get_package_docstring(),
+                    imports=list(module.get_imports()) if module.get_imports() else None,
+                    classes=[dict(name=c.get_name(), doc=c.get_docstring(),
+                                  functions=[self._function_record(f) for f in c.get_functions()])
+                             for c in module.get_classes()],
+                    functions=[self._function_record(f) for f in module.get_functions()])
+
+    @staticmethod
+    def _function_record(function):
+        return dict(name=function.get_name(), doc=function.get_docstring(),
+                    parameters=list(function.get_parameters()))
+
+    def _write(self, record):
+        if self.packer is not None:
+            self.file.write(self.packer.pack(record))
+        else:
+            self.file.write(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+            self.file.write(b'\n')
+
+
+def iter_model_records(path : str, model_format=None):
+    """
+    Reads a model file record by record.
+    :param path: file written by ModelWriter.
+    :param model_format: 'jsonl' or 'msgpack'. Taken from the file extension when None.
+    :return: generator of record dicts.
+    """
+    model_format = get_model_format(path, model_format)
+    with open(path, 'rb') as f:
+        if model_format == MSGPACK:
+            yield from msgpack.Unpacker(f, raw=False)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def read_model_header(path : str, model_format=None):
+    """
+    :param path: file written by ModelWriter.
+    :param model_format: 'jsonl' or 'msgpack'. Taken from the file extension when None.
+    :return: the library record, e.g. with the split_char the package names were built with, or None.
+    """
+    records = iter_model_records(path, model_format)
+    try:
+        return next(records, None)
+    finally:
+        records.close()
+
+
+def iter_model_packages(path : str, model_format=None):
+    """
+    Rebuilds the library from a model file, yielding the LibraryDefinition and then each package as soon as
+    its modules are read, so a model can be rendered as a stream, e.g. with HTMLCreator.create_html_doc_streaming.
+    As with pydoc.iter_content, the sub-packages of a yielded package are already created.
+    :param path: file written by ModelWriter.
+    :param model_format: 'jsonl' or 'msgpack'. Taken from the file extension when None.
+    :return: generator of LibraryDefinition/PackageDefinition.
+    """
+    library, package = None, None
+    for record in iter_model_records(path, model_format):
+        record_type = record['type']
+        if record_type == 'module':
+            package.modules.append(_load_module(record))
+            continue
+
+        if package is not None:
+            yield package
+        if record_type == 'library':
+            if record.get('version') != MODEL_VERSION:
+                raise ValueError("{0} holds model version {1}, expected {2}".format(path, record.get('version'),
+                                                                                   MODEL_VERSION))
+            library = package = LibraryDefinition(library_name=record['name'], library_docstring=record['doc'])
+        elif record_type == 'package':
+            package = library.create_package(record['name'], parent_name=record['parent'])
+            package.doc_string = record['doc']
+        # The library's sub-packages are top level, even when one of them is named like the library.
+        parent_name = package.get_name() if package is not library else ''
+        for sub_package in record.get('sub_packages', ()):
+            library.create_package(sub_package, parent_name=parent_name)
+    if package is not None:
+        yield package
+
+
+def load_library(path : str, model_format=None):
+    """
+    Rebuilds a whole LibraryDefinition from a model file, without parsing any source.
+    :param path: file written by ModelWriter.
+    :param model_format: 'jsonl' or 'msgpack'. Taken from the file extension when None.
+    :return: LibraryDefinition, or None for an empty file.
+    """
+    library = None
+    for package in iter_model_packages(path, model_format):
+        library = library or package
+    return library
+
+
+def _load_module(record):
+    classes = [ClassDefinition(c['name'], [_load_function(f) for f in c['functions']], c['doc'])
+               for c in record['classes']]
+    return ModuleDefinition(record['name'], record['doc'], record['imports'], classes,
+                            [_load_function(f) for f in record['functions']], record['parent'],
+                            package_docstring=record['package_doc'])
+
+
+def _load_function(record):
+    return FunctionDefinition(record['name'], record['parameters'], record['doc'])
@@ -0,0 +1,165 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import cProfile
+import heapq
+import json
+import logging
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+    import tracemalloc
+
+
+class BuildProfiler():
+    """
+    Collects the wall and CPU time of each build phase, the slowest files and pages, counters and the peak
+    memory of a run. Optionally runs cProfile over the whole build and dumps its pstats.
+    """
+
+    def __init__(self, top=20, pstats_path=None):
+        """
+        :param top: number of slowest items kept per category, e.g. the 20 slowest files to parse.
+        :param pstats_path: if given, the build also runs under cProfile and its stats are dumped there.
+        """
+        self.top = top
+        self.pstats_path = pstats_path
+        self.phases = OrderedDict()
+        self.slowest = {}
+        self.counts = OrderedDict()
+        self.cprofile = cProfile.Profile() if pstats_path else None
+        self.start_time = time.perf_counter()
+        if resource is None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times a phase. Phases that run more than once, e.g. in watch mode, are accumulated.
+        :param name: phase name, e.g. 'parse'.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, dict(wall_s=0.0, cpu_s=0.0, runs=0))
+            totals['wall_s'] += time.perf_counter() - wall
+            totals['cpu_s'] += time.process_time() - cpu
+            totals['runs'] += 1
+
+    def record(self, category, name, seconds):
+        """
+        Records the time spent on one item and keeps the slowest self.top of each category.
+        :param category: e.g. 'parse' or 'render'.
+        :param name: file or page name.
+        :param seconds: time spent.
+        """
+        self.count(category)
+        items = self.slowest.setdefault(category, [])
+        if len(items) < self.top:
+            heapq.heappush(items, (seconds, name))
+        elif seconds > items[0][0]:
+            heapq.heapreplace(items, (seconds, name))
+
+    def count(self, name, amount=1):
+        """ Adds to a counter, e.g. the number of cached files. """
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def start(self):
+        """ Starts cProfile, if enabled. """
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self):
+        """ Stops cProfile, if enabled, and dumps its stats. """
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.pstats_path)
+            logging.info("cProfile stats written to {}".format(self.pstats_path))
+
+    @staticmethod
+    def peak_memory():
+        """
+        :return: dict of peak resident memory in bytes of this process and of its finished child processes
+        (e.g. the parse and render pools). Python allocations only where the resource module is missing.
+        """
+        if resource is None:
+            return dict(self_bytes=tracemalloc.get_traced_memory()[1], children_bytes=0)
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        unit = 1 if sys.platform == 'darwin' else 1024
+        return dict(self_bytes=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+                    children_bytes=resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit)
+
+    def report(self):
+        """ :return: JSON serialisable dict of everything recorded. """
+        return dict(total_wall_s=time.perf_counter() - self.start_time,
+                    phases=self.phases,
+                    counts=self.counts,
+                    slowest={category: [dict(name=name, seconds=seconds)
+                                        for seconds, name in sorted(items, reverse=True)]
+                             for category, items in self.slowest.items()},
+                    peak_memory=self.peak_memory())
+
+    def format_report(self, report=None):
+        """ :return: human readable version of report(). """
+        report = report or self.report()
+        lines = ['Build profile ({:.3f}s)'.format(report['total_wall_s']),
+                 '  {0:<20}{1:>12}{2:>12}{3:>8}'.format('phase', 'wall (s)', 'cpu (s)', 'runs')]
+        for name, totals in report['phases'].items():
+            lines.append('  {0:<20}{1:>12.3f}{2:>12.3f}{3:>8}'.format(name, totals['wall_s'], totals['cpu_s'],
+                                                                    totals['runs']))
+        if report['counts']:
+            lines.append('  counts: ' + ', '.join('{0}={1}'.format(name, count)
+                                                 for name, count in report['counts'].items()))
+        for category, items in report['slowest'].items():
+            lines.append('  slowest {0} ({1}):'.format(category, len(items)))
+            lines.extend('    {0:>10.4f}s  {1}'.format(item['seconds'], item['name']) for item in items)
+        memory = report['peak_memory']
+        lines.append('  peak memory: {0:.1f} MB (children {1:.1f} MB)'.format(memory['self_bytes'] / 2 ** 20,
+                                                                           memory['children_bytes'] / 2 ** 20))
+        return '\n'.join(lines)
+
+    def save(self, path):
+        """
+        Prints the report and writes it to a JSON file.
+        :param path: JSON file path.
+        :return: the report dict.
+        """
+        report = self.report()
+        print(self.format_report(report))
+        try:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            logging.info("Profile written to {}".format(path))
+        except Exception as e:
+            print("Could not save the profile {0}. Error: {1}".format(path, e))
+        return report
+
+
+class NullProfiler():
+    """ Stands in for a BuildProfiler when profiling is off, so callers don't have to check. """
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def record(self, category, name, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
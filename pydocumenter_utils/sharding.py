@@ -0,0 +1,88 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+import heapq
+
+SHARD_WEIGHTS = ('files', 'bytes')
+
+
+class Shard():
+    """
+    Shard K of N of a library build. The packages of the library (the library itself included, for its top level
+    modules) are partitioned into N shards of about the same weight, and shard K only parses and renders the
+    packages assigned to it. The partition only depends on the package names and weights, so every worker
+    computes the same one without talking to the others.
+    """
+
+    def __init__(self, index : int, count : int):
+        """
+        :param index: K, from 1 to count.
+        :param count: N, number of shards.
+        """
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError("Invalid shard {0}/{1}, expected K/N with 1 <= K <= N".format(index, count))
+        self.index = index
+        self.count = count
+        self.packages = set()
+
+    def __str__(self):
+        return '{0}/{1}'.format(self.index, self.count)
+
+    @classmethod
+    def parse(cls, spec : str):
+        """
+        :param spec: 'K/N', e.g. 2/8
+        :return: Shard
+        """
+        try:
+            index, count = (int(part) for part in spec.split('/'))
+        except ValueError:
+            raise ValueError("Invalid shard {}, expected K/N, e.g. 2/8".format(spec))
+        return cls(index, count)
+
+    def assign(self, weights : dict):
+        """
+        Takes the packages of this shard from the partition of the whole library.
+        :param weights: every package name --> weight, e.g. its number of files.
+        :return: set of the package names owned by this shard.
+        """
+        self.packages = partition(weights, self.count)[self.index - 1]
+        return self.packages
+
+    def owns(self, package_name : str):
+        return package_name in self.packages
+
+    def file_name(self, prefix : str, extension='.json'):
+        """ Per-shard file name, e.g. .yaypd_shard_2_of_8.json """
+        return '{0}_{1}_of_{2}{3}'.format(prefix, self.index, self.count, extension)
+
+
+def partition(weights : dict, count : int):
+    """
+    Splits packages into count sets of about equal total weight: the heaviest package goes to the lightest shard
+    first (longest processing time first). Ties are broken by name and shard number, so the result is the same
+    whatever the order of weights.
+    :param weights: package name --> weight.
+    :param count: number of shards.
+    :return: list of count sets of package names.
+    """
+    shards = [set() for _ in range(count)]
+    loads = [(0, index) for index in range(count)]
+    for name, weight in sorted(weights.items(), key=lambda item: (-item[1], item[0])):
+        load, index = heapq.heappop(loads)
+        shards[index].add(name)
+        heapq.heappush(loads, (load + weight, index))
+    return shards
+
+
+def get_package_weight(files, weight='files'):
+    """
+    :param files: ScannedFile list of a package's directory.
+    :param weight: 'files' counts the package page and its module pages, 'bytes' sums the size of its files.
+    :return: int
+    """
+    if weight == 'bytes':
+        return sum(file.stat.st_size for file in files)
+    return len(files) + 1
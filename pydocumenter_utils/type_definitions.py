@@ -3,15 +3,44 @@ Author: Reuben Ferrante
 Date:   27/10/2017
 """
 
+from functools import lru_cache
 import abc
+import sys
+
+# Parameter tuples are shared between all functions with the same signature, e.g. (self,) or (self, other). Only
+# the most recently used signatures are kept, so a long running process, e.g. watch mode or the documentation
+# server, does not hold on to the signatures of every library it ever parsed.
+SHARED_PARAMETERS_SIZE = 1 << 14
+
+
+def share_parameters(parameters):
+    """
+    Returns the shared tuple holding the given parameters, with every parameter string interned.
+    :param parameters: iterable of parameter str.
+    :return: tuple
+    """
+    return _shared_parameters(tuple(sys.intern(parameter) for parameter in parameters or ()))
+
+
+@lru_cache(maxsize=SHARED_PARAMETERS_SIZE)
+def _shared_parameters(parameters):
+    return parameters
+
+
+def _intern(string):
+    return sys.intern(string) if type(string) is str else string
+
 
 class ObjectDefinition(abc.ABC):
-    ''' Abstract class from which the other classes derive from. It has the basic definitions for getters. '''
+    ''' Abstract class from which the other classes derive from. It has the basic definitions for getters.
+    All definitions use __slots__ and interned names, since there is one object per function in the library. '''
+
+    __slots__ = ('name', 'doc_string', 'parent')
 
     def __init__(self, name, doc_string, parent):
-        self.name = name
+        self.name = _intern(name)
         self.doc_string = doc_string
-        self.parent = parent or ''
+        self.parent = _intern(parent or '')
 
     def get_docstring(self):
         return self.doc_string
@@ -29,6 +58,8 @@ class ObjectDefinition(abc.ABC):
 class ClassDefinition(ObjectDefinition):
     ''' Derives from  ObjectDefinition. Extends with the necessary getters. '''
 
+    __slots__ = ('functions',)
+
     def __init__(self, class_name, function_list : list, class_doc_string='', parent_module=None):
         super().__init__(class_name, class_doc_string, parent_module)
         self.functions = function_list
@@ -39,9 +70,18 @@ class ClassDefinition(ObjectDefinition):
 class FunctionDefinition(ObjectDefinition):
     ''' Derives from  ObjectDefinition. Extends with the necessary getters. '''
 
+    __slots__ = ('parameters',)
+
     def __init__(self, func_name, func_parameters, func_docstring='', parent_module=None):
         super().__init__(func_name, func_docstring, parent_module)
-        self.parameters = func_parameters
+        self.parameters = share_parameters(func_parameters)
+
+    def __setstate__(self, state):
+        # Unpickled functions (parse cache, worker processes) share their parameter tuples again.
+        _, slots = state
+        for slot, value in slots.items():
+            setattr(self, slot, value)
+        self.parameters = share_parameters(self.parameters)
 
     def get_parameters(self):
         return self.parameters
@@ -49,12 +89,16 @@ class FunctionDefinition(ObjectDefinition):
 class ModuleDefinition(ObjectDefinition):
     ''' Derives from  ObjectDefinition. Extends with the necessary getters. '''
 
-    def __init__(self, module_name, module_docstring, imports, classes, functions, parent_package=None, child=None):
+    __slots__ = ('classes', 'functions', 'child', 'imports', 'package_doc_string')
+
+    def __init__(self, module_name, module_docstring, imports, classes, functions, parent_package=None, child=None,
+                 package_docstring=''):
         super().__init__(module_name, module_docstring, parent_package)
         self.classes = classes
         self.functions = functions
         self.child = child
-        self.imports = imports
+        self.imports = tuple(_intern(i) for i in imports) if imports else imports
+        self.package_doc_string = package_docstring
 
     def get_classes(self):
         return self.classes
@@ -68,9 +112,71 @@ class ModuleDefinition(ObjectDefinition):
     def get_imports(self):
         return self.imports
 
+    def get_package_docstring(self):
+        ''' Package description (@PACKAGEDESC) found inside this module, if any. '''
+        return self.package_doc_string
+
+class LazyModuleDefinition(ModuleDefinition):
+    ''' ModuleDefinition of a file that is only parsed when its contents are first read, through get_classes(),
+    get_functions(), get_imports(), get_docstring() or get_package_docstring(). The parse result is kept, and the
+    name and parent are known without parsing. '''
+
+    __slots__ = ('path', 'loader')
+
+    def __init__(self, module_name, path, loader, parent_package=None):
+        """
+        :param module_name: file name, e.g. module.py
+        :param path: .py file path.
+        :param loader: callable(path, parent_package) returning the parsed ModuleDefinition, e.g.
+        FileParser.parse_module.
+        :param parent_package: name of the package the module belongs to.
+        """
+        super().__init__(module_name, '', None, [], [], parent_package)
+        self.path = path
+        self.loader = loader
+
+    def is_loaded(self):
+        return self.loader is None
+
+    def load(self):
+        """
+        Parses the module, unless it was already parsed.
+        :return: self
+        """
+        if self.loader is not None:
+            loader, self.loader = self.loader, None
+            module = loader(self.path, self.parent)
+            self.doc_string = module.get_docstring()
+            self.imports = module.get_imports()
+            self.classes = module.get_classes()
+            self.functions = module.get_functions()
+            self.child = module.get_child()
+            self.package_doc_string = module.get_package_docstring()
+        return self
+
+    def get_docstring(self):
+        return self.load().doc_string
+
+    def get_classes(self):
+        return self.load().classes
+
+    def get_functions(self):
+        return self.load().functions
+
+    def get_child(self):
+        return self.load().child
+
+    def get_imports(self):
+        return self.load().imports
+
+    def get_package_docstring(self):
+        return self.load().package_doc_string
+
 class PackageDefinition(ObjectDefinition):
     ''' Derives from  ObjectDefinition. Extends with the necessary getters. '''
 
+    __slots__ = ('modules', 'sub_packages')
+
     def __init__(self, package_name = '', modules = None, package_docstring='', parent_library=None):
         super().__init__(package_name, package_docstring, parent_library)
         self.modules = modules or []
@@ -90,10 +196,22 @@ class LibraryDefinition(ObjectDefinition):
     ''' Derives from  ObjectDefinition. Extends with the necessary getters. Also creates new packages according to
     their tree structure. E.g. if B is a sub-package of A, B will be defined in the sub-packages dict of A. '''
 
+    __slots__ = ('packages', 'modules', '_package_index')
+
+    # Type of the packages made by create_package.
+    package_class = PackageDefinition
+
     def __init__(self, library_name = '', packages = None, modules = None, library_docstring='', parent=None):
         super().__init__(library_name, library_docstring, parent)
         self.packages = packages or {}
         self.modules = modules or []
+        # Flat index of every package in the tree, keyed by its full name, e.g. A-B-C.
+        self._package_index = {}
+        stack = list(self.packages.values())
+        while stack:
+            package = stack.pop()
+            self._package_index[package.get_name()] = package
+            stack.extend(package.get_subpackages().values())
 
     def get_subpackages(self):
         return self.packages
@@ -101,51 +219,90 @@ class LibraryDefinition(ObjectDefinition):
     def get_modules(self):
         return self.modules
 
-    def create_package(self, package_name, split_char='.'):
+    def get_package(self, package_name):
         """
-        Creates a package inside the correct package structure. Sub packages are handled automatically.
-        :param package_name:
-        :param split_char: Character used to split between packages and sub-packages, e.g. A-B or A.B.
-        :return: created PackageDefinition.
+        Looks up a package anywhere in the tree by its full name.
+        :param package_name: e.g. A-B-C
+        :return: PackageDefinition or None.
         """
-        def _create_package_definition(package_name, parent_library):
-            self.packages[package_name] = PackageDefinition(package_name=package_name, parent_library=parent_library)
-            return self.packages[package_name]
-
-        if self.packages.get(package_name) != None:
-            return self.packages[package_name]
-        else:
-            # Output files in the same directory structure as the library
-            possible_parent_package = split_char.join(package_name.split(split_char)[:-1])
-            package = self._get_sub_package(self.packages, package_name, possible_parent_package, split_char)
-            if package != None:
-                return package
-            else:
-                return _create_package_definition(package_name=package_name, parent_library=self.name)
+        return self._package_index.get(package_name)
 
-
-    def _get_sub_package(self, package, package_name, parent_package_name, split_char='.'):
+    def create_package(self, package_name, split_char='.', parent_name=None):
         """
-        Fetches the correct sub-package from the package hierarchical structure.
-        :param package:
-        :param package_name:
-        :param parent_package_name:
-        :param split_char:
-        :return: PackageDefinition.
+        Creates a package inside the correct package structure. Sub packages are handled automatically, and
+        missing intermediate parents are created on the way.
+        :param package_name: Full package name, e.g. A-B-C.
+        :param split_char: Character used to split between packages and sub-packages, e.g. A-B or A.B.
+        :param parent_name: Full name of the parent package, if known ('' for a top level package). When None, it
+        is taken from the package name, e.g. A-B for A-B-C. The library name only stands for the top level when no
+        package has that name, as a top level package may be named like its library.
+        :return: created PackageDefinition, or the existing one.
         """
-        if package.get(parent_package_name) != None:
-            package[parent_package_name].sub_packages[package_name] = PackageDefinition(package_name=package_name, parent_library=parent_package_name)
-            return package[parent_package_name].sub_packages[package_name]
-        else:
-            if parent_package_name == self.name:
-                return None
+        package = self._package_index.get(package_name)
+        if package is not None:
+            return package
+
+        # Walk up until an existing parent (or the top level) is found, then create the missing packages top-down.
+        missing = []
+        while True:
+            if parent_name is None:
+                parent_name = package_name.rpartition(split_char)[0]
+            if parent_name == '' or parent_name in self._package_index:
+                missing.append((package_name, parent_name))
+                break
+            if parent_name in (self.name, package_name):
+                missing.append((package_name, ''))
+                break
+            missing.append((package_name, parent_name))
+            package_name, parent_name = parent_name, None
+
+        for package_name, parent_name in reversed(missing):
+            if parent_name == '':
+                package = self.package_class(package_name=package_name, parent_library=self.name)
+                self.packages[package_name] = package
             else:
-                temp_package = None
-                for i in range(1, 100):
-                    temp_package = package.get(split_char.join(parent_package_name.split(split_char)[:-i]))
-                    if temp_package != None:
-                        break
-                if temp_package is None:
-                    return None
-                else:
-                    return self._get_sub_package(temp_package.sub_packages, package_name, parent_package_name, split_char)
\ No newline at end of file
+                package = self.package_class(package_name=package_name, parent_library=parent_name)
+                self._package_index[parent_name].sub_packages[package_name] = package
+            self._package_index[package_name] = package
+        return package
+
+
+def get_modules_package_docstring(modules):
+    """
+    :param modules: ModuleDefinitions of a package.
+    :return: the package description, made of the modules' @PACKAGEDESC.
+    """
+    return ''.join(module.get_package_docstring() for module in modules)
+
+
+class LazyPackageDefinition(PackageDefinition):
+    ''' PackageDefinition of a LazyLibraryDefinition. Unless it is set, its description is taken from its modules
+    when first read, which parses them. '''
+
+    __slots__ = ()
+
+    def __init__(self, package_name = '', modules = None, package_docstring=None, parent_library=None):
+        super().__init__(package_name, modules, package_docstring, parent_library)
+
+    def get_docstring(self):
+        if self.doc_string is None:
+            self.doc_string = get_modules_package_docstring(self.modules)
+        return self.doc_string
+
+
+class LazyLibraryDefinition(LibraryDefinition):
+    ''' LibraryDefinition whose package structure is known up front, e.g. from a directory scan, while its modules
+    are LazyModuleDefinitions parsed on first access, e.g. as built by pydoc.get_lazy_content. Callers only pay for
+    the modules they read. '''
+
+    __slots__ = ()
+
+    package_class = LazyPackageDefinition
+
+    def __init__(self, library_name = '', packages = None, modules = None, library_docstring=None, parent=None):
+        super().__init__(library_name, packages, modules, library_docstring, parent)
+
+    def get_docstring(self):
+        if self.doc_string is None:
+            self.doc_string = get_modules_package_docstring(self.modules)
+        return self.doc_string
@@ -5,6 +5,198 @@ Date:   27/10/2017
 
 import os
 import logging
+import re
+from collections import namedtuple
+
+# Directories that never hold library code; pruned before descending into them. Build output, virtualenvs and
+# node_modules are only skipped at the library root, as packages deeper down may have those names, e.g.
+# pip/_internal/operations/build.
+DEFAULT_EXCLUDES = ('__pycache__', '.git', '.hg', '.svn', '.idea', '.tox', '.nox', '.venv', '.mypy_cache',
+                    '.pytest_cache', '.ruff_cache', '*.egg-info', '/venv/', '/node_modules/', '/build/', '/dist/')
+GITIGNORE_FILE = '.gitignore'
+
+ScannedFile = namedtuple('ScannedFile', ['name', 'path', 'stat'])
+ScannedDirectory = namedtuple('ScannedDirectory', ['path', 'relative_parts', 'dirnames', 'files'])
+
+
+# Patterns match case-insensitively where file names do, e.g. on Windows.
+PATTERN_FLAGS = re.IGNORECASE if os.path.normcase('A') == 'a' else 0
+
+
+def translate_pattern(pattern : str):
+    """
+    Translates a .gitignore-style pattern to a regex matching '/'-joined path parts. As in git, '*', '?' and
+    '[...]' never match a '/', while a '**' segment spans directories: '**/' matches zero or more directories
+    and a trailing '/**' everything below, e.g. docs/*.py only matches the files directly in docs.
+    :param pattern: pattern without its leading '!' and its leading or trailing '/'.
+    :return: compiled regex, to be matched with fullmatch.
+    """
+    regex, i = [], 0
+    while i < len(pattern):
+        character = pattern[i]
+        if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/') and \
+                (i + 2 == len(pattern) or pattern[i + 2] == '/'):
+            if i + 2 == len(pattern):
+                regex.append('.*')
+                i += 2
+            else:
+                regex.append('(?:.*/)?')
+                i += 3
+            continue
+        if character == '*':
+            regex.append('[^/]*')
+            while pattern.startswith('*', i + 1):
+                i += 1
+        elif character == '?':
+            regex.append('[^/]')
+        elif character == '[':
+            negate = pattern.startswith('!', i + 1)
+            start = i + 1 + negate
+            # A ']' right after the '[' or '[!' is part of the set.
+            end = pattern.find(']', start + 1)
+            if end < 0:
+                regex.append(re.escape(character))
+            else:
+                characters = re.sub(r'([\\\[\]^])', r'\\\1', pattern[start:end])
+                regex.append(('[^/' if negate else '[') + characters + ']')
+                i = end
+        else:
+            regex.append(re.escape(character))
+        i += 1
+    return re.compile(''.join(regex), PATTERN_FLAGS)
+
+
+class IgnoreRules():
+    """
+    A small .gitignore-style matcher. Patterns are matched against the entry name, or against the path
+    relative to where the pattern was defined when the pattern contains a '/', one path segment per '/' (see
+    translate_pattern). A trailing '/' only matches directories, a leading '!' re-includes an entry, and the
+    last matching pattern wins.
+    """
+
+    def __init__(self, patterns=(), base_parts=()):
+        self.rules = []
+        self.add_patterns(patterns, base_parts)
+
+    def add_patterns(self, patterns, base_parts=()):
+        """
+        :param patterns: iterable of gitignore-style pattern str.
+        :param base_parts: relative path parts of the directory the patterns apply to.
+        :return: self
+        """
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            negate = pattern.startswith('!')
+            pattern = pattern[1:] if negate else pattern
+            directory_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            anchored = '/' in pattern
+            self.rules.append((tuple(base_parts), translate_pattern(pattern.lstrip('/')), negate, directory_only,
+                               anchored))
+        return self
+
+    def add_gitignore(self, gitignore_path, base_parts=()):
+        """ Adds the patterns of a .gitignore file, relative to the directory it is in. """
+        try:
+            with open(gitignore_path, 'r') as f:
+                return self.add_patterns(f.read().splitlines(), base_parts)
+        except (OSError, UnicodeDecodeError) as e:
+            logging.debug("Could not read {0}. Error: {1}".format(gitignore_path, e))
+            return self
+
+    def copy(self):
+        rules = IgnoreRules()
+        rules.rules = list(self.rules)
+        return rules
+
+    def is_ignored(self, relative_parts, is_directory):
+        """
+        :param relative_parts: tuple of the entry's path parts, relative to the scanned root.
+        :param is_directory: bool
+        :return: True if the entry is excluded.
+        """
+        ignored = False
+        for base_parts, pattern, negate, directory_only, anchored in self.rules:
+            if directory_only and not is_directory:
+                continue
+            if relative_parts[:len(base_parts)] != base_parts or len(relative_parts) == len(base_parts):
+                continue
+            path = '/'.join(relative_parts[len(base_parts):]) if anchored else relative_parts[-1]
+            if pattern.fullmatch(path):
+                ignored = not negate
+        return ignored
+
+
+class DirectoryScanner():
+    """
+    Walks a library top-down with os.scandir. Excluded directories (DEFAULT_EXCLUDES, virtualenvs, .gitignore
+    and user supplied patterns) are pruned before descending into them. Only *.py files are returned, each with
+    its os.stat result, so later stages such as the parse cache need no extra stat calls. Entries are sorted by
+    name, so the output does not depend on the file system's ordering.
+    """
+
+    def __init__(self, excludes=None, use_gitignore=True, default_excludes=DEFAULT_EXCLUDES):
+        """
+        :param excludes: extra gitignore-style patterns.
+        :param use_gitignore: honor the .gitignore files of the library.
+        :param default_excludes: patterns skipped by default, () to walk every directory.
+        """
+        self.ignore_rules = IgnoreRules(default_excludes).add_patterns(excludes or ())
+        self.use_gitignore = use_gitignore
+
+    def scan(self, path : str):
+        """
+        :param path: library root.
+        :return: generator of ScannedDirectory(path, relative_parts, dirnames, files), parents before children.
+        """
+        stack = [(path, (), self.ignore_rules)]
+        while stack:
+            directory, relative_parts, ignore_rules = stack.pop()
+            scanned, ignore_rules = self.scan_directory(directory, relative_parts, ignore_rules)
+            if scanned is None:
+                continue
+
+            yield scanned
+            stack.extend((os.path.join(directory, name), relative_parts + (name,), ignore_rules)
+                         for name in reversed(scanned.dirnames))
+
+    def scan_directory(self, directory : str, relative_parts=(), ignore_rules=None):
+        """
+        Scans a single directory, without descending into its sub-directories, e.g. to scan a library lazily.
+        :param directory: directory path.
+        :param relative_parts: tuple of the directory's path parts, relative to the library root.
+        :param ignore_rules: IgnoreRules in effect in the directory's parent, the scanner's own rules by default.
+        :return: ScannedDirectory or None if the directory cannot be read, IgnoreRules in effect in the directory.
+        """
+        ignore_rules = ignore_rules or self.ignore_rules
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError as e:
+            logging.info("Could not scan {0}. Error: {1}".format(directory, e))
+            return None, ignore_rules
+
+        if self.use_gitignore and any(entry.name == GITIGNORE_FILE for entry in entries):
+            ignore_rules = ignore_rules.copy().add_gitignore(os.path.join(directory, GITIGNORE_FILE), relative_parts)
+
+        dirnames, files = [], []
+        for entry in entries:
+            entry_parts = relative_parts + (entry.name,)
+            if entry.is_dir(follow_symlinks=False):
+                if not (ignore_rules.is_ignored(entry_parts, True) or self._is_virtualenv(entry.path)):
+                    dirnames.append(entry.name)
+            elif entry.name.endswith('.py') and entry.is_file() and not ignore_rules.is_ignored(entry_parts, False):
+                files.append(ScannedFile(entry.name, entry.path, entry.stat()))
+
+        return ScannedDirectory(directory, relative_parts, dirnames, files), ignore_rules
+
+    @staticmethod
+    def _is_virtualenv(directory):
+        """ Virtualenvs can have any name, but always hold a pyvenv.cfg. """
+        return os.path.exists(os.path.join(directory, 'pyvenv.cfg'))
+
 
 class DirectorySearcher():
     """
@@ -24,23 +216,18 @@ class DirectorySearcher():
         logging.debug("Searching directory")
         files = {}
         main_package_name = path.split(delimiter)[-1]
-        FIRST_RUN_FLAG = True
         module_names = None
         naked_files = None
 
-        for (dirpath, dirnames, filenames) in os.walk(path):
-            if FIRST_RUN_FLAG:
-                module_names = dirnames
-                if '__pycache__' in module_names:
-                    module_names.remove('__pycache__')
+        for directory in DirectoryScanner().scan(path):
+            filenames = [file.name for file in directory.files]
+            if module_names is None:
+                module_names = directory.dirnames
                 naked_files = filenames
-                FIRST_RUN_FLAG = False
 
-            if "pycache" in dirpath:
-                continue
-            package_name = str.replace(dirpath[dirpath.find(main_package_name):], delimiter, '.')
+            package_name = '.'.join((main_package_name,) + directory.relative_parts)
             files.update(cls._get_directory_files(filenames=filenames,
-                                                  path=dirpath,
+                                                  path=directory.path,
                                                   delimiter=delimiter,
                                                   package_name=package_name))
         return files, module_names, naked_files
@@ -57,7 +244,7 @@ class DirectorySearcher():
         """
         files = {}
         for file in filenames:
-            if ".py" in file:
+            if file.endswith(".py"):
                 # Add package name, package description, dir, modules, functions
                 # (description, modules, classes, functions are None until they are updated)
                 files[package_name +
@@ -6,11 +6,104 @@ Date:   27/10/2017
 import ast
 from pydocumenter_utils.type_definitions import *
 from python_file_parser.filetags import *
+from python_file_parser.parse_cache import hash_source
+from python_file_parser.skeleton_extractor import get_skeleton
+import io
+import os
 import re
 import logging
+import time
+
+# Bump whenever the parser output changes, so persisted parse caches are invalidated.
+PARSER_VERSION = 3
 
 class FileParser():
 
+    def __init__(self, fast=False):
+        """
+        :param fast: take the definitions from a skeleton of each module (see skeleton_extractor) instead of its
+        whole syntax tree, e.g. with --fast. Modules the skeleton cannot be built for are parsed as a whole. A syntax
+        error inside a function body is not noticed by the skeleton, so such a module is documented instead of
+        skipped.
+        """
+        self.fast = fast
+
+    @property
+    def version(self):
+        """
+        Version of the parser output, e.g. for the parse cache. The skeleton and the whole tree do not give the same
+        results for every file, so they have different versions.
+        :return: tuple
+        """
+        return PARSER_VERSION, 'skeleton' if self.fast else 'ast'
+
+    def parse_module(self, directory, parent_package=None):
+        """
+        Parses a .py file in a single pass: the file is read once and "ast" runs once, on its skeleton when fast
+        is set, else on the whole module. Imports, classes, functions and descriptions are all taken from that pass.
+        :param directory: file path.
+        :param parent_package: name of the package the module belongs to.
+        :return: ModuleDefinition. Classes and functions are sorted by name.
+        """
+        return self.parse_file(directory, parent_package)[0]
+
+    def parse_file(self, directory, parent_package=None):
+        """
+        Same as parse_module, also hashing the bytes that were parsed, e.g. for the parse cache, so the file does
+        not need to be read again.
+        :param directory: file path.
+        :param parent_package: name of the package the module belongs to.
+        :return: ModuleDefinition, hash_source digest str or None if the file could not be read.
+        """
+        classes, functions, module_description, package_description, imports = [], [], '', '', None
+        digest = None
+        try:
+            with open(directory, 'rb') as f:
+                data = f.read()
+            digest = hash_source(data)
+            # Decoded as open(directory, 'r') would, with the locale encoding and universal newlines.
+            source = io.TextIOWrapper(io.BytesIO(data)).read()
+            definitions = self._find_definitions_in_skeleton(source) if self.fast else None
+            if definitions is None:
+                tree = ast.parse(source)
+                definitions = self._find_definitions_in_tree(tree) + (self.__find_imports_in_tree(tree),)
+            classes, functions, module_description, package_description, imports = definitions
+        except Exception as e:
+            print("Could not process file {0}. Error: {1}".format(directory, e))
+
+        classes.sort(key=lambda x: x.get_name())
+        functions.sort(key=lambda x: x.get_name())
+        return ModuleDefinition(os.path.basename(directory), module_description, imports, classes, functions,
+                                parent_package, package_docstring=package_description), digest
+
+    def parse_modules(self, directories, parent_package=None, digests=False):
+        """
+        Parses a batch of .py files that belong to the same package. Used as the unit of work when parsing
+        in a process pool, so a whole directory is sent and returned in one go.
+        :param directories: list of file paths.
+        :param parent_package: name of the package the modules belong to.
+        :param digests: return (ModuleDefinition, digest) pairs, as parse_file does, instead of the modules.
+        :return: list of ModuleDefinition, in the same order as directories.
+        """
+        parse = self.parse_file if digests else self.parse_module
+        return [parse(directory, parent_package) for directory in directories]
+
+    def parse_modules_timed(self, directories, parent_package=None, digests=False):
+        """
+        Same as parse_modules, also timing each file. Used when profiling, including in a process pool.
+        :param directories: list of file paths.
+        :param parent_package: name of the package the modules belong to.
+        :param digests: return (ModuleDefinition, digest) pairs, as parse_file does, instead of the modules.
+        :return: list of ModuleDefinition, list of seconds spent on each file.
+        """
+        parse = self.parse_file if digests else self.parse_module
+        modules, timings = [], []
+        for directory in directories:
+            start = time.perf_counter()
+            modules.append(parse(directory, parent_package))
+            timings.append(time.perf_counter() - start)
+        return modules, timings
+
     def find_imports(self, directory):
         """
         Find all imports that are used in a .py file.
@@ -78,14 +171,21 @@ class FileParser():
         :return: set containing all the modules for a given file.
         """
 
+        return self._find_definitions_in_tree(ast.parse(file_content.read()))
+
+    def _find_definitions_in_tree(self, tree):
+        """
+        Builds the ClassDefinitions and FunctionDefinitions from an already parsed module.
+        :param tree: ast.Module
+        :return: lists classes, functions, module_description, package_description
+        """
         classes = []
         functions = []
         module_description = ''
         next_class_descriptor = ''
         package_description = ''
 
-        p = ast.parse(file_content.read())
-        for obj in p.body:
+        for obj in tree.body:
             if isinstance(obj, ast.Expr):
                 if hasattr(obj.value, 's'):
                     if FILE_DESCRIPTOR in obj.value.s:
@@ -107,6 +207,24 @@ class FileParser():
 
         return classes, functions, module_description, package_description
 
+    def _find_definitions_in_skeleton(self, source):
+        """
+        Builds the definitions from the skeleton of a module, which leaves out the function bodies, so only a
+        fraction of the module goes through "ast".
+        :param source: content of a .py file.
+        :return: classes, functions, module_description, package_description, imports, or None if the module has
+        to be parsed as a whole. Errors reading the definitions are raised as they would be for the whole module.
+        """
+        skeleton = get_skeleton(source)
+        if skeleton is None:
+            return None
+        try:
+            tree, imports_tree = ast.parse(skeleton[0]), ast.parse(skeleton[1])
+        except SyntaxError:
+            # Parsing the whole module gives the same result or reports the actual error.
+            return None
+        return self._find_definitions_in_tree(tree) + (self.__find_imports_in_tree(imports_tree),)
+
   
     def __get_class_functions_and_description(self, obj, next_class_descriptor):
         """
@@ -155,6 +273,24 @@ class FileParser():
                     parameters.append(''.join([arg_obj.arg, ' : ', arg_obj.annotation.id]))
         return parameters
 
+    @staticmethod
+    def __find_imports_in_tree(tree):
+        """
+        Collects the imports of a parsed module from its ast.Import and ast.ImportFrom nodes, in the same
+        format as find_imports, e.g. "from a import b as c" --> a.b
+        :param tree: ast.Module
+        :return: sorted list of imports, or None if there are none.
+        """
+        modules = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                main_mod = ''.join(['.' * node.level, node.module or ''])
+                separator = '.' if node.module else ''
+                modules.update(''.join([main_mod, separator, alias.name]) for alias in node.names)
+        return sorted(modules) if modules else None
+
     @staticmethod
     def __find_modules(file_content):
         """
@@ -0,0 +1,184 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from python_file_parser.directory_file_searcher import DirectoryScanner, GITIGNORE_FILE
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+POLL_INTERVAL = 0.5
+DEBOUNCE_INTERVAL = 0.05
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def create_watcher(path : str, scanner=None):
+    """
+    Returns an inotify based watcher where inotify is available (Linux), and a polling watcher otherwise.
+    :param path: library root.
+    :param scanner: Optional DirectoryScanner; excluded directories are not watched.
+    :return: InotifyWatcher or PollingWatcher
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(path, scanner)
+        except OSError as e:
+            logging.info("inotify is not available, falling back to polling. Error: {}".format(e))
+    return PollingWatcher(path, scanner)
+
+
+class InotifyWatcher():
+    """
+    Watches every directory of a library through inotify. New directories are watched as they appear. Events on
+    files and directories excluded by the scanner's ignore rules are dropped, so they do not trigger a rebuild.
+    A changed .gitignore counts as a change to its directory, which is then watched again with the new rules.
+    """
+
+    def __init__(self, path : str, scanner=None):
+        self.scanner = scanner or DirectoryScanner()
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor --> (directory path, its parts relative to the library root, IgnoreRules in effect in it)
+        self.directories = {}
+        self._watch_tree(path)
+
+    def wait_for_changes(self, timeout=None):
+        """
+        Blocks until something changes, then collects the events that follow within DEBOUNCE_INTERVAL.
+        :param timeout: seconds, None waits forever.
+        :return: set of changed paths: .py files and directories.
+        """
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            changed.update(self._read_events())
+            ready, _, _ = select.select([self.fd], [], [], DEBOUNCE_INTERVAL)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+    def _watch_tree(self, path, relative_parts=(), ignore_rules=None):
+        """
+        Watches a directory and the sub-directories the scanner does not exclude.
+        :param path: directory path.
+        :param relative_parts: tuple of the directory's path parts, relative to the library root.
+        :param ignore_rules: IgnoreRules in effect in the directory's parent, e.g. for a directory created later.
+        """
+        stack = [(path, relative_parts, ignore_rules)]
+        while stack:
+            directory, relative_parts, ignore_rules = stack.pop()
+            scanned, ignore_rules = self.scanner.scan_directory(directory, relative_parts, ignore_rules)
+            if scanned is None:
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                logging.info("Could not watch {0}. Error: {1}".format(directory, os.strerror(ctypes.get_errno())))
+            else:
+                self.directories[wd] = (directory, relative_parts, ignore_rules)
+            stack.extend((os.path.join(directory, name), relative_parts + (name,), ignore_rules)
+                         for name in scanned.dirnames)
+
+    def _rewatch_tree(self, wd):
+        """
+        Stops watching a directory and its sub-directories and watches them again, e.g. after its .gitignore
+        changed, so their IgnoreRules are read again and newly excluded or included directories are (un)watched.
+        :param wd: watch descriptor of the directory.
+        """
+        directory, relative_parts, _ = self.directories[wd]
+        parent_rules = None
+        for watched_wd, (_, parts, ignore_rules) in list(self.directories.items()):
+            if relative_parts and parts == relative_parts[:-1]:
+                parent_rules = ignore_rules
+            elif parts[:len(relative_parts)] == relative_parts:
+                self.libc.inotify_rm_watch(self.fd, watched_wd)
+                del self.directories[watched_wd]
+        self._watch_tree(directory, relative_parts, parent_rules)
+
+    def _read_events(self):
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if wd not in self.directories:
+                continue
+            directory, relative_parts, ignore_rules = self.directories[wd]
+            if mask & IN_DELETE_SELF:
+                del self.directories[wd]
+                changed.add(directory)
+            elif mask & IN_ISDIR:
+                path = os.path.join(directory, name)
+                if ignore_rules.is_ignored(relative_parts + (name,), True):
+                    continue
+                changed.add(path)
+                if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                    self._watch_tree(path, relative_parts + (name,), ignore_rules)
+            elif name == GITIGNORE_FILE:
+                changed.add(directory)
+                self._rewatch_tree(wd)
+            elif name.endswith('.py') and not ignore_rules.is_ignored(relative_parts + (name,), False):
+                changed.add(os.path.join(directory, name))
+        return changed
+
+
+class PollingWatcher():
+    """
+    Fallback watcher: rescans the library every POLL_INTERVAL seconds and compares mtimes and sizes.
+    """
+
+    def __init__(self, path : str, scanner=None, interval=POLL_INTERVAL):
+        self.path = path
+        self.scanner = scanner or DirectoryScanner()
+        self.interval = interval
+        self.snapshot = self._take_snapshot()
+
+    def wait_for_changes(self, timeout=None):
+        """
+        :param timeout: seconds, None waits forever.
+        :return: set of changed paths: .py files and directories.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while deadline is None or time.time() < deadline:
+            time.sleep(self.interval)
+            snapshot = self._take_snapshot()
+            changed = {path for path in set(snapshot) | set(self.snapshot)
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+        return set()
+
+    def close(self):
+        pass
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for directory in self.scanner.scan(self.path):
+            snapshot[directory.path] = 'directory'
+            for file in directory.files:
+                snapshot[file.path] = (file.stat.st_mtime, file.stat.st_size)
+        return snapshot
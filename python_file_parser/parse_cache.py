@@ -0,0 +1,129 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+
+CACHE_FILE_NAME = '.yaypd_parse_cache.pickle'
+
+
+def hash_source(data : bytes):
+    """ :return: content hash of a .py file, as stored in the cache. """
+    return hashlib.sha1(data).hexdigest()
+
+
+class ParseCache():
+    """
+    Persistent cache of parsed modules, saved as a single pickle blob in the output directory.
+    Each .py file maps to (mtime, size, content hash, ModuleDefinition). A file whose mtime and size did not
+    change is a hit straight away; otherwise its content hash is compared before it is sent to the parser.
+    The whole cache is dropped when the parser version changes, e.g. FileParser.version, which also tells the
+    skeleton and the whole tree parsers apart.
+    """
+
+    def __init__(self, cache_path : str, parser_version, max_entries=500000):
+        self.cache_path = cache_path
+        self.parser_version = parser_version
+        self.max_entries = max_entries
+        self.entries = {}
+        self.run = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, path : str, parent_package=None, stat=None):
+        """
+        Returns the cached ModuleDefinition of a file if the file did not change.
+        :param path: .py file path.
+        :param parent_package: name of the package the module belongs to.
+        :param stat: optional os.stat_result of the file, to avoid statting it again.
+        :return: ModuleDefinition or None.
+        """
+        entry = self.entries.get(path)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        mtime, size, digest, module, _ = entry
+        try:
+            stat = stat or os.stat(path)
+            if (stat.st_mtime, stat.st_size) != (mtime, size):
+                if stat.st_size != size or self._hash_file(path) != digest:
+                    self.misses += 1
+                    return None
+        except OSError:
+            self.misses += 1
+            return None
+
+        self.entries[path] = (stat.st_mtime, stat.st_size, digest, module, self.run)
+        module.parent = parent_package or ''
+        self.hits += 1
+        return module
+
+    def put(self, path : str, module, stat=None, digest=None):
+        """
+        Stores a freshly parsed module.
+        :param path: .py file path.
+        :param module: ModuleDefinition
+        :param stat: optional os.stat_result of the file.
+        :param digest: hash_source of the bytes the module was parsed from, e.g. from FileParser.parse_file. The
+        file is read and hashed again without it, which may not match what was parsed if it changed since.
+        """
+        try:
+            stat = stat or os.stat(path)
+            digest = digest or self._hash_file(path)
+            self.entries[path] = (stat.st_mtime, stat.st_size, digest, module, self.run)
+        except OSError as e:
+            logging.debug("Could not cache {0}. Error: {1}".format(path, e))
+
+    def save(self):
+        """
+        Evicts the entries of deleted files, trims the cache to max_entries (least recently used first) and
+        writes it to disk.
+        """
+        for path, entry in list(self.entries.items()):
+            if entry[-1] != self.run and not os.path.exists(path):
+                del self.entries[path]
+
+        if len(self.entries) > self.max_entries:
+            by_last_use = sorted(self.entries, key=lambda p: self.entries[p][-1], reverse=True)
+            for path in by_last_use[self.max_entries:]:
+                del self.entries[path]
+
+        directory = os.path.dirname(self.cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        temp_path = self.cache_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump((self.parser_version, self.run, self.entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+        except Exception as e:
+            print("Could not save the parse cache {0}. Error: {1}".format(self.cache_path, e))
+        logging.info("Parse cache: {0} hits, {1} misses, {2} entries".format(self.hits, self.misses,
+                                                                          len(self.entries)))
+
+    def _load(self):
+        """ Loads the cache blob. A missing, unreadable or outdated cache simply starts empty. """
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'rb') as f:
+                parser_version, run, entries = pickle.load(f)
+        except Exception as e:
+            logging.info("Ignoring unreadable parse cache {0}. Error: {1}".format(self.cache_path, e))
+            return
+
+        if parser_version == self.parser_version:
+            self.entries = entries
+            self.run = run + 1
+
+    @staticmethod
+    def _hash_file(path):
+        with open(path, 'rb') as f:
+            return hash_source(f.read())
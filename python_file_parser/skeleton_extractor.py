@@ -0,0 +1,293 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+import bisect
+import re
+
+# Everything the scanner has to see to follow the structure of a module: strings, comments, brackets, the ':'
+# ending a header (not the one of ':='), the ';' between statements, line continuations and newlines (with the blank
+# lines following them). The lookahead
+# lets the regex engine skip over names, numbers and operators without trying every alternative. A quote left over
+# by the string patterns means the scanner lost track of the source, e.g. an unterminated string.
+_TOKEN_PATTERN = re.compile(r'''(?=["'\#()\[\]{}:;\\\n])(?:
+    ("""[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""|\'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*\'\'\'
+     |"[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*')
+  | (\#[^\n]*)
+  | ([(\[{])
+  | ([)\]}])
+  | (:(?!=))
+  | (;)
+  | (\\\n)
+  | (\n(?:[ \t\f]*\n)*)
+  | (["']))''', re.S | re.X)
+_STRING, _COMMENT, _OPEN, _CLOSE, _COLON, _SEMICOLON, _CONTINUATION, _NEWLINE, _QUOTE = range(1, 10)
+
+_INDENTATION = re.compile(r'[ \t\f]*')
+_WORD = re.compile(r'\w+')
+_STRING_START = re.compile(r'[rRbBuUfF]{0,2}["\']')
+# Starts with the literal, so the regex engine searches for it quickly; the word boundary before it is checked
+# separately.
+_IMPORT = re.compile(r'import\b')
+_IMPORT_STATEMENT = re.compile(r'\s*(?:import|from)\b')
+# The prefix of an f-string, right before its opening quote.
+_F_STRING_PREFIX = re.compile(r'(?<!\w)[rRbB]?[fF][rRbB]?$')
+# Top level expression statements that FileParser reads the value of, or that make it fail: strings, numbers,
+# '...' and the other constants. Parenthesized expressions are kept as well, they may hold a string.
+_CONSTANT_WORDS = ('True', 'False', 'None')
+# Statements that are not kept at the top level even with a ';', since their bodies are not top level statements.
+_COMPOUND_WORDS = ('if', 'elif', 'else', 'try', 'except', 'finally', 'for', 'while', 'with', 'async', 'match',
+                   'case')
+
+
+class LogicalLine():
+    """ A statement line of a module, possibly spanning several physical lines. """
+
+    __slots__ = ('start', 'first', 'end', 'indent', 'colon', 'semicolon')
+
+    def __init__(self, start, first, end, indent, colon, semicolon):
+        self.start = start # offset of the physical line it starts on
+        self.first = first # offset of its first character
+        self.end = end # offset of the newline ending it
+        self.indent = indent
+        self.colon = colon # offset of its first ':' outside brackets, or None
+        self.semicolon = semicolon # offset of its first ';' outside brackets, or None
+
+
+def get_skeleton(source : str):
+    """
+    Cuts a module down to what FileParser reads from it, without building its syntax tree: the top level
+    description strings, the headers and docstrings of the top level functions and classes, and the headers and
+    docstrings of the methods. Every other statement, e.g. all the function bodies, is dropped. Parsing the
+    skeleton with ast gives the same classes, functions and descriptions as parsing the whole module.
+    :param source: content of a .py file.
+    :return: (skeleton source, source of every import statement of the module), or None if the module has to be
+    parsed as a whole, e.g. when the scanner cannot follow its strings.
+    """
+    lines = _get_logical_lines(source)
+    if lines is None:
+        return None
+    skeleton = _Skeleton(source, lines)
+    if not skeleton.build():
+        return None
+    imports = _get_import_statements(source, lines)
+    if imports is None:
+        return None
+    return ''.join(skeleton.parts), '\n'.join(imports)
+
+
+def _get_logical_lines(source):
+    """
+    Splits a module into its logical lines, leaving out blank and comment lines.
+    :return: list of LogicalLine, None if the source cannot be followed.
+    """
+    lines = []
+    depth, colon, semicolon = 0, None, None
+    line_start = 0
+    for match in _TOKEN_PATTERN.finditer(source):
+        kind = match.lastindex
+        if kind == _NEWLINE:
+            if depth:
+                continue
+            end = match.start()
+            first = _INDENTATION.match(source, line_start).end()
+            if first < end and source[first] != '#':
+                lines.append(LogicalLine(line_start, first, end, _get_indent(source, line_start, first), colon,
+                                         semicolon))
+            line_start = source.rfind('\n', end, match.end()) + 1
+            colon, semicolon = None, None
+        elif kind == _OPEN:
+            depth += 1
+        elif kind == _CLOSE:
+            depth -= 1
+            if depth < 0:
+                return None
+        elif kind == _COLON:
+            if not depth and colon is None:
+                colon = match.start()
+        elif kind == _SEMICOLON:
+            if not depth and semicolon is None:
+                semicolon = match.start()
+        elif kind == _STRING:
+            start = match.start()
+            if source[start - 1] in 'fFrRbB' and _F_STRING_PREFIX.search(source, max(start - 2, 0), start) and \
+                    not _has_balanced_fields(match.group()):
+                # A quote nested in a replacement field (allowed from Python 3.12) ends the string too early.
+                return None
+        elif kind == _QUOTE:
+            return None
+
+    if depth:
+        return None
+    first = _INDENTATION.match(source, line_start).end()
+    if first < len(source) and source[first] != '#':
+        lines.append(LogicalLine(line_start, first, len(source), _get_indent(source, line_start, first), colon,
+                                 semicolon))
+    return lines
+
+
+def _get_indent(source, start, first):
+    if first == start:
+        return 0
+    indentation = source[start:first]
+    return len(indentation.expandtabs(8)) if '\t' in indentation else first - start
+
+
+def _has_balanced_fields(text):
+    """ :return: True if every replacement field of an f-string is closed, e.g. f"{a:>{b}}" but not f"{x['" or f"}" """
+    depth, index = 0, 0
+    while index < len(text):
+        character = text[index]
+        if not depth and text.startswith(character * 2, index):
+            index += 2 # {{ or }}
+            continue
+        if character == '{':
+            depth += 1
+        elif character == '}':
+            if not depth:
+                return False
+            depth -= 1
+        index += 1
+    return depth == 0
+
+
+class _Skeleton():
+    """ Builds the skeleton of a module from its logical lines. """
+
+    def __init__(self, source, lines):
+        self.source = source
+        self.lines = lines
+        self.parts = []
+
+    def build(self):
+        """ :return: False if the module has to be parsed as a whole. """
+        source, lines = self.source, self.lines
+        decorators = []
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            if line.indent:
+                # Inside a compound statement that is left out, e.g. if __name__ == "__main__":
+                index += 1
+                continue
+            first_character = source[line.first]
+            if first_character == '@':
+                decorators.append(line)
+                index += 1
+                continue
+
+            word = _get_word(source, line)
+            if word in ('def', 'class'):
+                self._add_lines(decorators)
+                index = self._add_definition(index, word == 'class')
+                if index is None:
+                    return False
+            else:
+                if (line.semicolon is not None and word not in _COMPOUND_WORDS) or first_character in '(.0123456789' \
+                        or word in _CONSTANT_WORDS or _STRING_START.match(source, line.first):
+                    self._add_lines([line])
+                index += 1
+            decorators = []
+        return True
+
+    def _add_definition(self, index, is_class):
+        """
+        Adds the header and docstring of a function or class, and the methods of a class.
+        :return: index of the line after its body, None if the module has to be parsed as a whole.
+        """
+        source, lines = self.source, self.lines
+        line = lines[index]
+        if line.colon is None:
+            return None
+        self.parts.append(source[line.start:line.colon + 1])
+
+        inline_body = source[line.colon + 1:line.end].strip()
+        if inline_body and inline_body[0] != '#':
+            # e.g. def f(): pass, where a docstring would be the first statement on the same line.
+            if _STRING_START.match(inline_body) or inline_body[0] == '(':
+                return None
+            self.parts.append(' pass\n')
+            return index + 1
+
+        end = index + 1
+        while end < len(lines) and lines[end].indent > line.indent:
+            end += 1
+        if end == index + 1:
+            return None
+
+        body = lines[index + 1]
+        self.parts.append('\n')
+        has_docstring = source[body.first] == '(' or _STRING_START.match(source, body.first) is not None
+        if has_docstring:
+            statement_end = body.semicolon if body.semicolon is not None else body.end
+            self.parts.extend((source[body.start:statement_end], '\n'))
+        else:
+            self.parts.extend((source[body.start:body.first], 'pass\n'))
+        if not is_class:
+            return end
+
+        decorators = []
+        child = index + 2 if has_docstring else index + 1
+        while child < end:
+            line = lines[child]
+            if line.indent != body.indent:
+                child += 1
+                continue
+            if source[line.first] == '@':
+                decorators.append(line)
+                child += 1
+                continue
+            if _get_word(source, line) == 'def':
+                self._add_lines(decorators)
+                child = self._add_definition(child, False)
+                if child is None:
+                    return None
+            else:
+                child += 1
+            decorators = []
+        return end
+
+    def _add_lines(self, lines):
+        for line in lines:
+            self.parts.extend((self.source[line.start:line.end], '\n'))
+
+
+def _get_word(source, line):
+    match = _WORD.match(source, line.first)
+    return match.group() if match else None
+
+
+def _get_import_statements(source, lines):
+    """
+    Finds the import statements anywhere in a module, e.g. inside functions or on the same line as an if or try.
+    :return: list of import statement str, None if the module has to be parsed as a whole.
+    """
+    starts = [line.start for line in lines]
+    statements = []
+    last_line = None
+    for match in _IMPORT.finditer(source):
+        start = match.start()
+        if start and (source[start - 1].isalnum() or source[start - 1] == '_'):
+            continue
+        index = bisect.bisect_right(starts, start) - 1
+        if index < 0 or index == last_line or start >= lines[index].end:
+            continue
+        last_line = index
+        line = lines[index]
+        # Statements start at the beginning of the line, after a ';' or after the ':' of a one line if, try, etc.
+        boundaries = [line.first]
+        depth = 0
+        for token in _TOKEN_PATTERN.finditer(source, line.first, line.end):
+            kind = token.lastindex
+            if kind == _OPEN:
+                depth += 1
+            elif kind == _CLOSE:
+                depth -= 1
+            elif kind in (_COLON, _SEMICOLON) and not depth:
+                boundaries.append(token.end())
+        boundaries.append(line.end + 1)
+        for start, end in zip(boundaries, boundaries[1:]):
+            if _IMPORT_STATEMENT.match(source, start, end):
+                statements.append(source[start:end - 1].strip())
+    return statements
@@ -0,0 +1,27 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.cross_references import SymbolTable
+from pydocumenter_utils.type_definitions import ClassDefinition, FunctionDefinition, ModuleDefinition
+import unittest
+
+
+class SymbolTableTest(unittest.TestCase):
+
+    def test_module_added_again_drops_its_old_symbols(self):
+        symbol_table = SymbolTable('lib')
+        symbol_table.add_module(ModuleDefinition('models.py', '', None, [ClassDefinition('Old', [])],
+                                                 [FunctionDefinition('old', ())]), 'package', 'models.html')
+        symbol_table.add_module(ModuleDefinition('models.py', '', None, [ClassDefinition('New', [])], []),
+                                'package', 'models.html')
+
+        self.assertEqual(symbol_table.resolve('package.models.New'), 'models.html#New')
+        self.assertNotIn('package.models.Old', symbol_table.symbols)
+        self.assertNotIn('package.models.old', symbol_table.symbols)
+        self.assertEqual(symbol_table.resolve('package.models.Old'), 'models.html')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from python_file_parser.directory_file_searcher import DirectoryScanner, IgnoreRules
+from tests.test_type_definitions import write_file
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class DefaultExcludesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ('build/setup_output.py', 'dist/lib.py', 'node_modules/tool.py', '__pycache__/cached.py',
+                     'pkg/operations/build/wheel.py', 'pkg/dist/files.py', 'pkg/module.py'):
+            write_file(os.path.join(self.directory, *name.split('/')))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def scan(self, scanner):
+        return sorted('/'.join(directory.relative_parts + (file.name,))
+                      for directory in scanner.scan(self.directory) for file in directory.files)
+
+    def test_build_output_is_only_skipped_at_the_root(self):
+        self.assertEqual(self.scan(DirectoryScanner()),
+                         ['pkg/dist/files.py', 'pkg/module.py', 'pkg/operations/build/wheel.py'])
+
+    def test_no_default_excludes(self):
+        self.assertEqual(self.scan(DirectoryScanner(default_excludes=())),
+                         ['__pycache__/cached.py', 'build/setup_output.py', 'dist/lib.py', 'node_modules/tool.py',
+                          'pkg/dist/files.py', 'pkg/module.py', 'pkg/operations/build/wheel.py'])
+
+
+class IgnoreRulesTest(unittest.TestCase):
+
+    def assertIgnored(self, patterns, path, ignored=True, is_directory=False, base_parts=()):
+        rules = IgnoreRules(patterns, base_parts)
+        self.assertEqual(rules.is_ignored(tuple(path.split('/')), is_directory), ignored, (patterns, path))
+
+    def test_wildcards_do_not_match_across_directories(self):
+        self.assertIgnored(['docs/*.py'], 'docs/a.py')
+        self.assertIgnored(['docs/*.py'], 'docs/a/b.py', False)
+        self.assertIgnored(['docs/?.py'], 'docs/a.py')
+        self.assertIgnored(['a?b.py'], 'a/b.py', False)
+        self.assertIgnored(['pkg/[!a]*.py'], 'pkg/b.py')
+        self.assertIgnored(['pkg/[!a]*.py'], 'pkg/a.py', False)
+
+    def test_double_asterisk_spans_directories(self):
+        self.assertIgnored(['docs/**/*.py'], 'docs/a.py')
+        self.assertIgnored(['docs/**/*.py'], 'docs/a/b/c.py')
+        self.assertIgnored(['docs/**/*.py'], 'other/docs/a.py', False)
+        self.assertIgnored(['**/generated'], 'generated', is_directory=True)
+        self.assertIgnored(['**/generated'], 'a/b/generated', is_directory=True)
+        self.assertIgnored(['docs/**'], 'docs/a/b.py')
+        self.assertIgnored(['docs/**'], 'docs', False, is_directory=True)
+
+    def test_unanchored_patterns_match_names_at_any_depth(self):
+        self.assertIgnored(['*_pb2.py'], 'a/b/model_pb2.py')
+        self.assertIgnored(['scratch/'], 'a/scratch', is_directory=True)
+        self.assertIgnored(['scratch/'], 'a/scratch', False)
+
+    def test_patterns_are_relative_to_their_gitignore(self):
+        self.assertIgnored(['*.py'], 'pkg/docs/a.py', base_parts=('pkg',))
+        self.assertIgnored(['docs/*.py'], 'pkg/docs/a.py', base_parts=('pkg',))
+        self.assertIgnored(['docs/*.py'], 'docs/a.py', False, base_parts=('pkg',))
+        self.assertIgnored(['/docs/'], 'pkg/docs', is_directory=True, base_parts=('pkg',))
+        self.assertIgnored(['/docs/'], 'pkg/sub/docs', False, is_directory=True, base_parts=('pkg',))
+
+    def test_last_matching_pattern_wins(self):
+        self.assertIgnored(['docs/**', '!docs/keep.py'], 'docs/keep.py', False)
+        self.assertIgnored(['docs/**', '!docs/keep.py'], 'docs/a/keep.py')
+        self.assertIgnored(['!*.py', '*.py'], 'a.py')
+
+    def test_scanner_keeps_nested_files_of_a_single_level_pattern(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for name in ('docs/conf.py', 'docs/examples/example.py', 'module.py'):
+                write_file(os.path.join(directory, *name.split('/')))
+            files = sorted('/'.join(scanned.relative_parts + (file.name,))
+                           for scanned in DirectoryScanner(excludes=['docs/*.py']).scan(directory)
+                           for file in scanned.files)
+            self.assertEqual(files, ['docs/examples/example.py', 'module.py'])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
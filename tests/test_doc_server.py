@@ -0,0 +1,137 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.doc_server import DocServer, _DocRequestHandler, _ThreadingHTTPServer
+from html_utils.py_html_processor import STATIC_DIR
+from python_file_parser.directory_file_searcher import DirectoryScanner
+from python_file_parser.file_parser import FileParser
+from tests.test_sharding import LIBRARY_FILES
+from tests.test_type_definitions import write_file
+import http.client
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+
+class DocServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.library_path = os.path.join(self.directory, 'lib')
+        for name, content in LIBRARY_FILES.items():
+            write_file(os.path.join(self.library_path, *name.split('/')), content)
+        self.doc_server = DocServer(self.library_path, FileParser(), DirectoryScanner())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def touch(self, path, content=None):
+        """ Rewrites a file, or only bumps its mtime, so the change is seen whatever the mtime resolution. """
+        if content is not None:
+            write_file(path, content)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_urls_resolve_to_library_package_and_module_pages(self):
+        self.assertEqual(self.doc_server.get_index_url(), '/lib/lib.html')
+        for url, text in [('/lib/lib.html', b'alpha'),
+                          ('/lib/lib/main.py.html', b'run'),
+                          ('/lib/lib/alpha.html', b'Models'),
+                          ('/lib/lib/alpha/models.py.html', b'Model'),
+                          ('/lib/lib/gamma/gamma-extra.html', b'more.py'),
+                          ('/lib/lib/gamma/gamma-extra/more.py.html', b'more')]:
+            with self.subTest(url):
+                page = self.doc_server.get_page(url)
+                self.assertIsNotNone(page)
+                self.assertIn(text, page)
+
+        for url in ['/lib/lib/missing.py.html', '/lib/lib/delta.html', '/lib/lib/alpha/beta-tools.py.html',
+                    '/other/other.html', '/lib/lib/main.py', '/lib/lib/gamma/extra.html']:
+            with self.subTest(url):
+                self.assertIsNone(self.doc_server.get_page(url))
+
+    def test_pages_are_rendered_again_once_their_sources_change(self):
+        url = '/lib/lib/alpha/models.py.html'
+        page = self.doc_server.get_page(url)
+        self.assertEqual(self.doc_server.get_page(url), page)
+        self.assertEqual((self.doc_server.hits, self.doc_server.misses), (1, 1))
+
+        self.touch(os.path.join(self.library_path, 'alpha', 'models.py'),
+                   'class Model:\n    def predict(self, data):\n        pass\n')
+        page = self.doc_server.get_page(url)
+        self.assertIn(b'predict', page)
+        self.assertEqual((self.doc_server.hits, self.doc_server.misses), (1, 2))
+
+        # A module added to a package shows up once the package directory's mtime changed.
+        write_file(os.path.join(self.library_path, 'alpha', 'extra.py'), 'def added():\n    pass\n')
+        self.touch(os.path.join(self.library_path, 'alpha'))
+        self.assertIn(b'extra.py', self.doc_server.get_page('/lib/lib/alpha.html'))
+        self.assertIn(b'added', self.doc_server.get_page('/lib/lib/alpha/extra.py.html'))
+
+        os.remove(os.path.join(self.library_path, 'alpha', 'extra.py'))
+        self.touch(os.path.join(self.library_path, 'alpha'))
+        self.assertIsNone(self.doc_server.get_page('/lib/lib/alpha/extra.py.html'))
+
+    def test_least_recently_used_pages_are_evicted(self):
+        self.doc_server.max_pages = 2
+        urls = ['/lib/lib/main.py.html', '/lib/lib/alpha/models.py.html', '/lib/lib/alpha/base.py.html']
+        for url in urls:
+            self.doc_server.get_page(url)
+        self.assertEqual(list(self.doc_server._pages), urls[1:])
+
+        self.doc_server.get_page(urls[1])
+        self.doc_server.get_page(urls[0])
+        self.assertEqual(list(self.doc_server._pages), [urls[1], urls[0]])
+        self.assertEqual((self.doc_server.hits, self.doc_server.misses), (1, 4))
+
+
+class DocRequestHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        library_path = os.path.join(self.directory, 'lib')
+        write_file(os.path.join(library_path, 'main.py'), 'def run(a):\n    pass\n')
+        self.http_server = _ThreadingHTTPServer(('127.0.0.1', 0), _DocRequestHandler)
+        self.http_server.doc_server = DocServer(library_path, FileParser(), DirectoryScanner())
+        self.thread = threading.Thread(target=self.http_server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.http_server.shutdown()
+        self.thread.join()
+        self.http_server.server_close()
+        shutil.rmtree(self.directory)
+
+    def request(self, path):
+        connection = http.client.HTTPConnection('127.0.0.1', self.http_server.server_address[1])
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            return response.status, response.getheader('Location'), response.read()
+        finally:
+            connection.close()
+
+    def test_pages_and_static_files_are_served(self):
+        self.assertEqual(self.request('/')[:2], (302, '/lib/lib.html'))
+        status, _, body = self.request('/lib/lib/main.py.html')
+        self.assertEqual(status, 200)
+        self.assertIn(b'run', body)
+        self.assertEqual(self.request('/lib/lib/missing.py.html')[0], 404)
+
+        static_file = os.path.relpath(next(os.path.join(dirpath, file_name) for dirpath, _, filenames
+                                           in os.walk(STATIC_DIR) for file_name in filenames), STATIC_DIR)
+        self.assertEqual(self.request('/static/' + static_file.replace(os.sep, '/'))[0], 200)
+
+    def test_static_files_outside_the_static_directory_are_not_served(self):
+        for path in ['/static/../doc_server.py', '/static/%2e%2e/doc_server.py', '/static/..%2fdoc_server.py',
+                     '/static/%2e%2e%2ftemplates/module.html', '/static/' + os.path.abspath(__file__)]:
+            with self.subTest(path):
+                self.assertEqual(self.request(path)[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
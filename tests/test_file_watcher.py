@@ -0,0 +1,74 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from python_file_parser.directory_file_searcher import DirectoryScanner
+from python_file_parser.file_watcher import InotifyWatcher
+from tests.test_type_definitions import write_file
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), "inotify is only available on Linux")
+class InotifyWatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        write_file(os.path.join(self.directory, '.gitignore'), 'generated_*.py\nscratch/\n')
+        write_file(os.path.join(self.directory, 'package', 'module.py'))
+        self.watcher = InotifyWatcher(self.directory, DirectoryScanner(excludes=['*_test.py']))
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.directory)
+
+    def test_ignored_files_do_not_trigger_a_rebuild(self):
+        write_file(os.path.join(self.directory, 'package', 'generated_models.py'))
+        write_file(os.path.join(self.directory, 'package', 'module_test.py'))
+        os.makedirs(os.path.join(self.directory, 'package', 'scratch'))
+        self.assertEqual(self.watcher.wait_for_changes(timeout=0.2), set())
+
+        path = os.path.join(self.directory, 'package', 'module.py')
+        write_file(path, 'x = 1\n')
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {path})
+
+    def test_new_directories_inherit_the_ignore_rules(self):
+        new_directory = os.path.join(self.directory, 'package', 'new')
+        os.makedirs(new_directory)
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {new_directory})
+
+        write_file(os.path.join(new_directory, 'generated_models.py'))
+        write_file(os.path.join(new_directory, 'module_test.py'))
+        self.assertEqual(self.watcher.wait_for_changes(timeout=0.2), set())
+        path = os.path.join(new_directory, 'module.py')
+        write_file(path)
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {path})
+
+    def test_gitignore_changes_update_the_ignore_rules(self):
+        os.makedirs(os.path.join(self.directory, 'scratch'))
+        self.assertEqual(self.watcher.wait_for_changes(timeout=0.2), set())
+
+        write_file(os.path.join(self.directory, '.gitignore'), 'generated_*.py\n')
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {self.directory})
+        path = os.path.join(self.directory, 'scratch', 'module.py')
+        write_file(path)
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {path})
+
+        write_file(os.path.join(self.directory, 'package', '.gitignore'), 'module.py\n')
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {os.path.join(self.directory, 'package')})
+        write_file(os.path.join(self.directory, 'package', 'module.py'), 'x = 1\n')
+        self.assertEqual(self.watcher.wait_for_changes(timeout=0.2), set())
+
+        os.remove(os.path.join(self.directory, '.gitignore'))
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {self.directory})
+        path = os.path.join(self.directory, 'package', 'generated_models.py')
+        write_file(path)
+        self.assertEqual(self.watcher.wait_for_changes(timeout=1), {path})
+
+
+if __name__ == "__main__":
+    unittest.main()
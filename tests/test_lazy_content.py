@@ -0,0 +1,98 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from benchmarks.conformance import describe_module
+from html_utils.py_html_processor import HTMLCreator
+from pydoc import get_content, get_lazy_content, _iter_packages
+from python_file_parser.file_parser import FileParser
+from python_file_parser.parse_cache import ParseCache
+from tests.test_sharding import LIBRARY_FILES, read_tree
+from tests.test_type_definitions import write_file
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class CountingParser(FileParser):
+    """ FileParser recording the paths, relative to the library, of the files it parsed. """
+
+    def __init__(self, library_path):
+        super().__init__()
+        self.library_path = library_path
+        self.parsed = []
+
+    def parse_file(self, directory, parent_package=None):
+        self.parsed.append(os.path.relpath(directory, self.library_path).replace(os.sep, '/'))
+        return super().parse_file(directory, parent_package)
+
+
+class LazyContentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.library_path = os.path.join(self.directory, 'lib')
+        for name, content in LIBRARY_FILES.items():
+            write_file(os.path.join(self.library_path, *name.split('/')), content)
+        self.parser = CountingParser(self.library_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_modules(self, library):
+        """ :return: package name --> {module name: ModuleDefinition} """
+        return {package.get_name(): {module.get_name(): module for module in package.get_modules()}
+                for package in _iter_packages(library)}
+
+    def test_structure_is_known_without_parsing(self):
+        lazy = self.get_modules(get_lazy_content(self.parser, self.library_path))
+        eager = self.get_modules(get_content(FileParser(), self.library_path))
+        self.assertEqual({name: sorted(modules) for name, modules in lazy.items()},
+                         {name: sorted(modules) for name, modules in eager.items()})
+        self.assertEqual(self.parser.parsed, [])
+
+    def test_only_the_modules_read_are_parsed(self):
+        library = get_lazy_content(self.parser, self.library_path)
+        modules = self.get_modules(library)
+        eager = self.get_modules(get_content(FileParser(), self.library_path))
+
+        model = modules['alpha']['models.py']
+        self.assertFalse(model.is_loaded())
+        self.assertEqual(describe_module(model), describe_module(eager['alpha']['models.py']))
+        self.assertTrue(model.is_loaded())
+        self.assertEqual(model.get_classes()[0].get_name(), 'Model')
+        self.assertEqual(self.parser.parsed, ['alpha/models.py'])
+
+        # A package description is read from the package's own modules only.
+        self.assertEqual(library.get_package('alpha').get_docstring(), 'Models')
+        self.assertEqual(sorted(self.parser.parsed), ['alpha/__init__.py', 'alpha/base.py', 'alpha/models.py'])
+        self.assertFalse(modules['beta']['tools.py'].is_loaded())
+
+    def test_cached_modules_are_not_parsed_again(self):
+        cache = ParseCache(os.path.join(self.directory, 'cache.pickle'), self.parser.version)
+        first = self.get_modules(get_lazy_content(self.parser, self.library_path, cache=cache))
+        first['alpha']['base.py'].get_functions()
+        self.assertEqual(self.parser.parsed, ['alpha/base.py'])
+
+        second = self.get_modules(get_lazy_content(self.parser, self.library_path, cache=cache))
+        self.assertEqual(describe_module(second['alpha']['base.py']), describe_module(first['alpha']['base.py']))
+        second['lib']['main.py'].get_functions()
+        self.assertEqual(self.parser.parsed, ['alpha/base.py', 'main.py'])
+
+    def test_lazy_library_renders_the_same_pages(self):
+        expected_path, lazy_path = os.path.join(self.directory, 'eager'), os.path.join(self.directory, 'lazy')
+        HTMLCreator(expected_path, get_content(FileParser(), self.library_path),
+                    directory_delimiter=os.sep).create_html_doc()
+        HTMLCreator(lazy_path, get_lazy_content(self.parser, self.library_path),
+                    directory_delimiter=os.sep).create_html_doc()
+        expected, rendered = read_tree(expected_path), read_tree(lazy_path)
+        self.assertEqual(sorted(rendered), sorted(expected))
+        for path in expected:
+            self.assertEqual(rendered[path], expected[path], path)
+        self.assertEqual(sorted(self.parser.parsed), sorted(LIBRARY_FILES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.py_html_processor import HTMLCreator
+from pydoc import get_content, parse_to_model, render_model
+from pydocumenter_utils import model_serializer
+from pydocumenter_utils.model_serializer import ModelWriter, MODEL_VERSION, iter_model_packages, load_library
+from python_file_parser.file_parser import FileParser
+from tests.test_sharding import LIBRARY_FILES, read_tree
+from tests.test_type_definitions import write_file
+from unittest import mock
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+MODEL_FILES = ['model.jsonl', 'model.msgpack'] if model_serializer.msgpack is not None else ['model.jsonl']
+
+
+class ModelSerializerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.library_path = os.path.join(self.directory, 'lib')
+        for name, content in LIBRARY_FILES.items():
+            write_file(os.path.join(self.library_path, *name.split('/')), content)
+        self.library = get_content(FileParser(), self.library_path)
+        self.expected_path = os.path.join(self.directory, 'expected')
+        HTMLCreator(self.expected_path, self.library, directory_delimiter=os.sep).create_html_doc()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameSite(self, output_path):
+        expected, rendered = read_tree(self.expected_path), read_tree(output_path)
+        self.assertEqual(sorted(rendered), sorted(expected))
+        for path in expected:
+            self.assertEqual(rendered[path], expected[path], path)
+
+    def test_reloaded_model_renders_the_same_pages(self):
+        for model_file in MODEL_FILES:
+            with self.subTest(model_file):
+                model_path = os.path.join(self.directory, model_file)
+                with ModelWriter(model_path) as writer:
+                    writer.write_library(self.library)
+
+                library = load_library(model_path)
+                self.assertEqual(library.get_name(), self.library.get_name())
+                self.assertEqual(sorted(library.get_subpackages()), sorted(self.library.get_subpackages()))
+
+                output_path = os.path.join(self.directory, model_file + '_docs')
+                render_model(model_path, output_path, directory_delimiter=os.sep)
+                self.assertSameSite(output_path)
+
+    def test_streamed_model_holds_the_whole_library(self):
+        for model_file in MODEL_FILES:
+            with self.subTest(model_file):
+                model_path = os.path.join(self.directory, 'streamed_' + model_file)
+                parse_to_model(FileParser(), self.library_path, model_path, stream=True)
+
+                packages = list(iter_model_packages(model_path))
+                self.assertEqual(packages[0].get_name(), self.library.get_name())
+                names = [package.get_name() for package in packages]
+                for package in packages[1:]:
+                    parent = package.get_parent()
+                    if parent:
+                        self.assertLess(names.index(parent), names.index(package.get_name()))
+
+                output_path = os.path.join(self.directory, 'streamed_' + model_file + '_docs')
+                render_model(model_path, output_path, directory_delimiter=os.sep)
+                self.assertSameSite(output_path)
+
+    def test_other_model_versions_are_rejected(self):
+        model_path = os.path.join(self.directory, 'model.jsonl')
+        with ModelWriter(model_path) as writer:
+            writer.write_library(self.library)
+        with open(model_path, 'r') as f:
+            lines = f.readlines()
+        header = json.loads(lines[0])
+        header['version'] = MODEL_VERSION + 1
+        lines[0] = json.dumps(header) + '\n'
+        with open(model_path, 'w') as f:
+            f.writelines(lines)
+        self.assertRaises(ValueError, load_library, model_path)
+
+    def test_msgpack_models_need_msgpack(self):
+        with mock.patch.object(model_serializer, 'msgpack', None):
+            self.assertRaises(ImportError, ModelWriter, os.path.join(self.directory, 'model.msgpack'))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'model.msgpack')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils import page_writer
+from html_utils.page_writer import ArchiveWriter
+from unittest import mock
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+
+class ZipArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.save_directory = os.path.join(self.directory, 'docs')
+        self.archive_path = os.path.join(self.directory, 'docs.zip')
+        self.pages = {'lib/page{0}.html'.format(index): '<p>{0}</p>'.format(index) * (index + 1) * 50
+                      for index in range(200)}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_archive(self, **options):
+        writer = ArchiveWriter(self.archive_path, self.save_directory, threads=8, **options)
+        for name, text in self.pages.items():
+            writer.write(os.path.join(self.save_directory, *name.split('/')), text)
+        writer.close()
+        self.assertEqual(writer.failed, 0)
+
+    def check_archive(self, extra_names=()):
+        with zipfile.ZipFile(self.archive_path) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(sorted(archive.namelist()), sorted(list(self.pages) + list(extra_names)))
+            for name, text in self.pages.items():
+                self.assertEqual(archive.read(name).decode('utf-8'), text)
+            return archive.infolist()
+
+    def test_pages_deflated_by_several_threads(self):
+        self.write_archive(precompress=('gz',))
+        infos = self.check_archive(name + '.gz' for name in self.pages)
+        compress_types = {info.filename: info.compress_type for info in infos}
+        self.assertEqual(compress_types['lib/page0.html'], zipfile.ZIP_DEFLATED)
+        self.assertEqual(compress_types['lib/page0.html.gz'], zipfile.ZIP_STORED)
+
+    def test_zip64_records(self):
+        with mock.patch.object(page_writer, 'ZIP64_LIMIT', 1000), mock.patch.object(zipfile, 'ZIP64_LIMIT', 1000), \
+                mock.patch.object(page_writer, 'ZIP_COUNT_LIMIT', 100):
+            self.write_archive()
+        self.check_archive()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from python_file_parser.file_parser import FileParser, PARSER_VERSION
+from python_file_parser.parse_cache import ParseCache
+from tests.test_type_definitions import write_file
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'module.py')
+        self.cache = ParseCache(os.path.join(self.directory, 'cache.pickle'), PARSER_VERSION)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_file_changed_after_parsing_is_parsed_again(self):
+        write_file(self.path, 'def old(a): pass\n')
+        stat = os.stat(self.path)
+        module, digest = FileParser().parse_file(self.path)
+        # Same size, edited between parsing and caching, e.g. by an editor saving while the build runs.
+        write_file(self.path, 'def new(a): pass\n')
+        os.utime(self.path, (stat.st_atime, stat.st_mtime + 10))
+        self.cache.put(self.path, module, stat, digest)
+
+        self.assertIsNone(self.cache.get(self.path))
+
+    def test_unchanged_file_is_a_hit(self):
+        write_file(self.path, 'def f(a): pass\n')
+        module, digest = FileParser().parse_file(self.path)
+        self.cache.put(self.path, module, digest=digest)
+        self.assertIs(self.cache.get(self.path), module)
+
+    def test_entries_of_the_other_parser_mode_are_not_reused(self):
+        write_file(self.path, 'def f(a):\n    x = = 1\n')
+        fast_parser = FileParser(fast=True)
+        module, digest = fast_parser.parse_file(self.path)
+        cache = ParseCache(os.path.join(self.directory, 'cache.pickle'), fast_parser.version)
+        cache.put(self.path, module, digest=digest)
+        cache.save()
+
+        self.assertIsNotNone(ParseCache(cache.cache_path, fast_parser.version).get(self.path))
+        self.assertIsNone(ParseCache(cache.cache_path, FileParser(fast=False).version).get(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
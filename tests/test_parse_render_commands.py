@@ -0,0 +1,78 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from tests.test_sharding import LIBRARY_FILES
+from tests.test_type_definitions import write_file
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+PYDOC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pydoc.py')
+
+
+def read_site(directory):
+    """ :return: relative path --> content of the pages and search index written under a directory. """
+    files = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for file_name in filenames:
+            path = os.path.join(dirpath, file_name)
+            relative_path = os.path.relpath(path, directory)
+            # The default directory delimiter is '\\', so off Windows the pages land next to the output path.
+            if 'static' in relative_path or file_name.startswith('.yaypd'):
+                continue
+            with open(path, 'rb') as f:
+                files[relative_path] = f.read()
+    return files
+
+
+class ParseRenderCommandsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name, content in LIBRARY_FILES.items():
+            write_file(os.path.join(self.directory, 'lib', *name.split('/')), content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_pydoc(self, *arguments):
+        # Paths are given relative to the working directory, as get_correct_path drops a leading '/'.
+        result = subprocess.run([sys.executable, PYDOC_PATH] + list(arguments), cwd=self.directory,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stdout)
+
+    def test_render_of_a_parsed_model_equals_build(self):
+        self.run_pydoc('build', '-i', 'lib', '-o', os.path.join('build', 'docs'))
+        self.run_pydoc('parse', '-i', 'lib', '-m', os.path.join('model', 'model.jsonl'))
+        # Rendering runs in a separate process and does not need the source any more.
+        shutil.move(os.path.join(self.directory, 'lib'), os.path.join(self.directory, 'moved_lib'))
+        self.run_pydoc('render', '-m', os.path.join('model', 'model.jsonl'), '-o', os.path.join('render', 'docs'))
+
+        expected = read_site(os.path.join(self.directory, 'build'))
+        rendered = read_site(os.path.join(self.directory, 'render'))
+        self.assertTrue(any(path.endswith('models.py.html') for path in expected))
+        self.assertEqual(sorted(rendered), sorted(expected))
+        for path in expected:
+            self.assertEqual(rendered[path], expected[path], path)
+
+    def test_model_is_rendered_with_the_options_of_each_run(self):
+        self.run_pydoc('parse', '-i', 'lib', '-m', os.path.join('model', 'model.jsonl'))
+        self.run_pydoc('render', '-m', os.path.join('model', 'model.jsonl'), '-o', os.path.join('whole', 'docs'))
+        self.run_pydoc('render', '-m', os.path.join('model', 'model.jsonl'), '-o', os.path.join('alpha', 'docs'),
+                       '-p', 'alpha', '--no-search')
+
+        whole = read_site(os.path.join(self.directory, 'whole'))
+        alpha = read_site(os.path.join(self.directory, 'alpha'))
+        self.assertTrue(any(path.endswith('tools.py.html') for path in whole))
+        self.assertTrue(any(path.endswith('models.py.html') for path in alpha))
+        self.assertFalse(any(path.endswith('tools.py.html') for path in alpha))
+        self.assertFalse(any('search' in path for path in alpha))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.page_writer import PageWriter, STAGING_SUFFIX
+from html_utils.py_html_processor import HTMLCreator, STATIC_DIR
+from pydoc import get_content
+from python_file_parser.file_parser import FileParser
+from tests.test_type_definitions import write_file
+from unittest import mock
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class BuildOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.library_path = os.path.join(self.directory, 'lib')
+        self.output_path = os.path.join(self.directory, 'docs')
+        write_file(os.path.join(self.library_path, 'main.py'), 'def run(a):\n    pass\n')
+        write_file(os.path.join(self.library_path, 'package', 'module.py'), 'class A:\n    pass\n')
+        self.library = get_content(FileParser(), self.library_path)
+        self.page_path = os.path.join(self.output_path, 'lib', 'lib', 'main.py.html')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, **options):
+        return HTMLCreator(self.output_path, self.library, directory_delimiter=os.sep, **options).create_html_doc()
+
+    def test_static_files_are_copied_once(self):
+        self.assertEqual(self.build(), 0)
+        static_files = [os.path.relpath(os.path.join(dirpath, file_name), STATIC_DIR)
+                        for dirpath, _, filenames in os.walk(STATIC_DIR) for file_name in filenames]
+        self.assertTrue(static_files)
+        for file_name in static_files:
+            self.assertTrue(os.path.isfile(os.path.join(self.output_path, 'static', file_name)), file_name)
+
+        writer = PageWriter()
+        self.assertEqual(writer.copy_directory(STATIC_DIR, os.path.join(self.output_path, 'static')), 0)
+
+    def test_failed_writes_are_reported(self):
+        with mock.patch.object(PageWriter, '_write_bytes', side_effect=OSError('disk full')):
+            self.assertGreater(self.build(), 0)
+
+    def test_failed_atomic_build_is_not_published(self):
+        self.build(atomic=True)
+        with open(self.page_path, 'rb') as f:
+            published = f.read()
+
+        write_file(os.path.join(self.library_path, 'main.py'), 'def run(a, b):\n    pass\n')
+        self.library = get_content(FileParser(), self.library_path)
+        with mock.patch.object(PageWriter, '_write_bytes', side_effect=OSError('disk full')):
+            self.assertRaises(IOError, self.build, atomic=True)
+        self.assertFalse(os.path.exists(self.output_path + STAGING_SUFFIX))
+        with open(self.page_path, 'rb') as f:
+            self.assertEqual(f.read(), published)
+
+    def test_incremental_builds_follow_the_precompress_formats(self):
+        self.build(incremental=True)
+        self.assertFalse(os.path.exists(self.page_path + '.gz'))
+
+        self.build(incremental=True, precompress=('gz',))
+        self.assertTrue(os.path.exists(self.page_path + '.gz'))
+
+        self.build(incremental=True)
+        self.assertTrue(os.path.exists(self.page_path))
+        self.assertFalse(os.path.exists(self.page_path + '.gz'))
+
+    def test_refresh_package_keeps_the_package_selection(self):
+        html_creator = HTMLCreator(self.output_path, self.library, directory_delimiter=os.sep, packages=['package'])
+        html_creator.create_html_doc()
+        self.assertFalse(os.path.exists(self.page_path))
+
+        html_creator.refresh_package(self.library)
+        self.assertFalse(os.path.exists(self.page_path))
+        package = self.library.get_subpackages()['package']
+        html_creator.refresh_package(package)
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'lib', 'lib', 'package', 'module.py.html')))
+
+    def test_refreshed_pages_are_recorded_in_the_build_manifest(self):
+        html_creator = HTMLCreator(self.output_path, self.library, directory_delimiter=os.sep, incremental=True)
+        html_creator.create_html_doc()
+        with open(self.page_path, 'rb') as f:
+            published = f.read()
+
+        # A module edited in watch mode, then reverted before the next build.
+        path = os.path.join(self.library_path, 'main.py')
+        write_file(path, 'def run(a, b):\n    pass\n')
+        module = FileParser().parse_module(path, '')
+        self.library.modules = [module]
+        html_creator.refresh_package(self.library, [module])
+        with open(self.page_path, 'rb') as f:
+            self.assertNotEqual(f.read(), published)
+
+        write_file(path, 'def run(a):\n    pass\n')
+        self.library = get_content(FileParser(), self.library_path)
+        self.build(incremental=True)
+        with open(self.page_path, 'rb') as f:
+            self.assertEqual(f.read(), published)
+
+    def test_failed_render_discards_the_staging_directory(self):
+        with mock.patch.object(HTMLCreator, 'process_package', side_effect=RuntimeError('render failed')):
+            self.assertRaises(RuntimeError, self.build, atomic=True)
+        self.assertFalse(os.path.exists(self.output_path + STAGING_SUFFIX))
+        self.assertFalse(os.path.exists(self.output_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils import search_index
+from html_utils.search_index import SearchIndex, SEARCH_DIRECTORY
+from pydocumenter_utils.type_definitions import ClassDefinition, FunctionDefinition
+from unittest import mock
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+LONG_DOCSTRING = 'Reads the configuration of the server and checks every value of it. ' * 3
+
+
+def read_script(path):
+    """ :return: data passed to pydocSearch.register by a search index file. """
+    with open(path, 'r') as f:
+        content = f.read()
+    return json.loads(content[content.index(',') + 1:content.rindex(')')])
+
+
+class SearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.search_index = SearchIndex()
+        # The functions mention widget in their summary (even ones) or only deep in a longer docstring (odd ones).
+        functions = [FunctionDefinition('function{}'.format(i), [],
+                                        LONG_DOCSTRING + 'widget' if i % 2 else 'Makes a widget.') for i in range(6)]
+        self.search_index.add_module_page('module.py.html', 'module.py', '', 'Tools.',
+                                          [ClassDefinition('Holder', [], 'Holds a widget.')], functions)
+        self.search_index.add_package_page('package.html', 'package', 'package', 'Widget package.')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_matches(self, token):
+        """ :return: names of the symbols indexed under token, and whether the token was capped. """
+        search_directory = os.path.join(self.directory, SEARCH_DIRECTORY)
+        symbols = read_script(os.path.join(search_directory, 'symbols_0.js'))
+        shard = read_script(os.path.join(search_directory, 'shard_{}.js'.format(token[:2])))
+        index = shard['t'].index(token)
+        names, symbol_id = [], 0
+        for posting in shard['p'][index]:
+            symbol_id += posting >> 1
+            names.append(symbols[symbol_id][0])
+        return names, index in shard.get('c', ())
+
+    def test_all_matches_are_kept_below_the_cap(self):
+        self.search_index.save(self.directory)
+        names, capped = self.get_matches('widget')
+        self.assertEqual(sorted(names), ['Holder', 'function0', 'function1', 'function2', 'function3', 'function4',
+                                         'function5', 'package'])
+        self.assertFalse(capped)
+
+    def test_capped_tokens_keep_their_best_matches_and_are_flagged(self):
+        with mock.patch.object(search_index, 'MAX_TEXT_POSTINGS', 4):
+            self.search_index.save(self.directory)
+        names, capped = self.get_matches('widget')
+        # Packages and classes first, then the functions with the word in their summary, lowest ids first.
+        self.assertEqual(sorted(names), ['Holder', 'function0', 'function2', 'package'])
+        self.assertTrue(capped)
+
+        # Name matches are never capped, nor are the other tokens of the shard flagged.
+        names, capped = self.get_matches('holder')
+        self.assertEqual(names, ['Holder'])
+        self.assertFalse(capped)
+
+
+if __name__ == "__main__":
+    unittest.main()
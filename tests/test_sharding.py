@@ -0,0 +1,80 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.py_html_processor import HTMLCreator
+from html_utils.shard_manifest import SHARD_MANIFEST_PATTERN, merge_shards
+from pydoc import get_content
+from pydocumenter_utils.sharding import Shard
+from python_file_parser.file_parser import FileParser
+from tests.test_type_definitions import write_file
+import os
+import shutil
+import tempfile
+import unittest
+
+LIBRARY_FILES = {
+    'main.py': 'from alpha.models import Model\n\ndef run(model : Model):\n    """ Runs a model. """\n',
+    'alpha/__init__.py': '"@PACKAGEDESC: Models"\n',
+    'alpha/models.py': 'from beta.tools import Helper, CONSTANT\nimport gamma.util\nfrom .base import Base\n\n'
+                       'class Model(Base):\n    """ A model. """\n    def fit(self, helper : Helper):\n'
+                       '        pass\n',
+    'alpha/base.py': 'class Base:\n    def save(self, path):\n        pass\n',
+    'beta/__init__.py': 'from beta.tools import Helper\n\ndef make():\n    pass\n',
+    'beta/tools.py': 'import beta.missing\nfrom beta import make\n\nCONSTANT = 1\n\nclass Helper:\n'
+                     '    def help(self):\n        pass\n',
+    'gamma/util.py': 'from alpha.models import Model\nfrom beta.tools import Helper\n\n'
+                     'def convert(model : Model, helper : Helper):\n    pass\n',
+    'gamma/extra/__init__.py': '',
+    'gamma/extra/more.py': 'from gamma.util import convert\nfrom main import run\n',
+}
+
+
+def read_tree(directory):
+    """ :return: relative path --> content of the pages and search index of a site. """
+    files = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for file_name in filenames:
+            path = os.path.join(dirpath, file_name)
+            relative_path = os.path.relpath(path, directory)
+            if SHARD_MANIFEST_PATTERN.match(file_name) or relative_path.split(os.sep)[0] == 'static':
+                continue
+            with open(path, 'rb') as f:
+                files[relative_path] = f.read()
+    return files
+
+
+class ShardedBuildTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.library_path = os.path.join(self.directory, 'lib')
+        for name, content in LIBRARY_FILES.items():
+            write_file(os.path.join(self.library_path, *name.split('/')), content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, output_path, shard=None):
+        library = get_content(FileParser(), self.library_path, shard=shard)
+        HTMLCreator(output_path, library, directory_delimiter=os.sep, shard=shard).create_html_doc()
+
+    def test_merged_shards_equal_unsharded_build(self):
+        unsharded = os.path.join(self.directory, 'unsharded', 'docs')
+        self.build(unsharded)
+
+        shard_directories = [os.path.join(self.directory, 'shard{}'.format(index), 'docs') for index in (1, 2, 3)]
+        for index, shard_directory in enumerate(shard_directories, 1):
+            self.build(shard_directory, Shard(index, 3))
+        merge_shards(shard_directories[0], shard_directories[1:])
+
+        expected, merged = read_tree(unsharded), read_tree(shard_directories[0])
+        self.assertEqual(sorted(merged), sorted(expected))
+        for path in expected:
+            self.assertEqual(merged[path], expected[path], path)
+        self.assertIn(b'models.py.html#Model', expected[os.path.join('lib', 'lib', 'gamma', 'util.py.html')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from benchmarks.conformance import describe_module
+from python_file_parser.file_parser import FileParser
+from python_file_parser.skeleton_extractor import get_skeleton
+from tests.test_type_definitions import write_file
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+# Modules the skeleton must document exactly as the whole syntax tree does, all but the last without falling back
+# to the whole tree.
+MODULES = {
+    'decorators': '''"""Module docstring."""
+import functools
+from os import path as p, sep
+
+
+def decorate(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        return function(*args, **kwargs)
+    return wrapper
+
+
+@decorate
+@functools.lru_cache(maxsize=None)
+def cached(a, b=2):
+    """ Cached. """
+    return a + b
+
+
+class Widget(object):
+    """ A widget. """
+
+    @property
+    def size(self):
+        return 1
+
+    @staticmethod
+    def make(kind : str = 'box'):
+        pass
+
+    @classmethod
+    def from_size(cls, size : int):
+        """ From a size. """
+        return cls()
+''',
+    'nested_classes': '''class Outer:
+    """ Outer. """
+
+    class Inner:
+        """ Inner. """
+
+        def inner_method(self):
+            pass
+
+    def method(self, inner):
+        class Local:
+            def local_method(self):
+                pass
+        return Local
+
+
+def function():
+    class Hidden:
+        pass
+    def helper(x):
+        return x
+    return helper
+''',
+    'signatures': '''def many(a,
+         b : int = 1,
+         *args,
+         c=(1,
+            2),
+         d={'key': [1, 2]},
+         **kwargs):
+    """
+    Multi-line signature.
+    """
+    pass
+
+
+def keyword_only(a, /, b, *, c=lambda x: x, d: "def e(): pass" = None):
+    pass
+
+
+class Typed:
+    def method(self, value : 'Typed',
+               other : dict = None) -> 'Typed':
+        return self
+''',
+    'strings': '''import re
+
+TEMPLATE = """
+def not_a_function(a):
+    pass
+
+class NotAClass:
+    pass
+"""
+
+
+def render(name):
+    """
+    Docstring mentioning
+    def fake(): and class Fake:
+    """
+    code = \'\'\'
+class Generated:
+    def method(self): pass
+\'\'\'
+    line = f"def {name}(x): return {x}"
+    nested = f"{'class Z: pass'} {name!r:>{10}}"
+    raw = r"def \\n"
+    byte = b"class B: pass"
+    return code + line
+
+
+class Holder:
+    pattern = re.compile("def (\\\\w+)")
+
+    def get(self, text="class Default:"):
+        return \'def \' + text
+''',
+    'continuations': '''from os.path import (join,
+                     dirname)
+import os, \\
+    sys
+
+
+def joined(a, \\
+           b):
+    value = a + \\
+        b
+    return value
+
+
+class Continued(dict,
+                object):
+    def method(self, x = \\
+               1):
+        pass
+''',
+    'async_definitions': '''import asyncio
+
+
+async def fetch(url, timeout=10):
+    """ Fetches a url. """
+    async with asyncio.timeout(timeout):
+        await asyncio.sleep(0)
+
+
+class Client:
+    async def get(self, path):
+        async for item in self.items():
+            yield item
+
+    def sync(self):
+        pass
+''',
+    'syntax_error_outside_bodies': '''import os
+
+def broken(a, b
+    pass
+
+class Fine:
+    pass
+''',
+}
+
+
+class SkeletonExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def parse(self, name, content, fast):
+        path = os.path.join(self.directory, name + '.py')
+        write_file(path, content)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            module = FileParser(fast=fast).parse_module(path)
+        return describe_module(module), output.getvalue()
+
+    def test_skeleton_matches_the_whole_tree(self):
+        for name, content in MODULES.items():
+            with self.subTest(name):
+                if name != 'syntax_error_outside_bodies':
+                    self.assertIsNotNone(get_skeleton(content))
+                self.assertEqual(self.parse(name, content, True), self.parse(name, content, False))
+
+    def test_syntax_error_outside_bodies_skips_the_file(self):
+        description, errors = self.parse('broken', MODULES['syntax_error_outside_bodies'], True)
+        self.assertIn('Could not process file', errors)
+        self.assertEqual(description['functions'], [])
+        self.assertEqual(description['classes'], [])
+
+    def test_syntax_error_inside_a_body_is_only_noticed_by_the_whole_tree(self):
+        content = 'def ok(a):\n    x = = 1\n'
+        self.assertEqual(self.parse('body', content, True)[0]['functions'], [('ok', None, ('a',))])
+        description, errors = self.parse('body', content, False)
+        self.assertEqual(description['functions'], [])
+        self.assertIn('invalid syntax', errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from html_utils.py_html_processor import HTMLCreator
+from pydoc import get_content
+from python_file_parser.file_parser import FileParser
+from tests.test_type_definitions import write_file
+import os
+import shutil
+import tempfile
+import unittest
+
+LIBRARY_FILES = {
+    'big.py': 'class Large:\n    def a(self):\n        pass\n    def b(self):\n        pass\n'
+              '    def c(self):\n        pass\n\n\nclass Small:\n    def a(self):\n        pass\n\n\n'
+              'def first():\n    """ The first function. """\n\n\ndef second():\n    pass\n',
+    'user.py': 'from big import Small\n\ndef use(value : Small):\n    pass\n',
+}
+
+
+class SplitModuleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.library_path = os.path.join(self.directory, 'lib')
+        self.output_path = os.path.join(self.directory, 'docs')
+        self.pages_path = os.path.join(self.output_path, 'lib', 'lib')
+        for name, content in LIBRARY_FILES.items():
+            write_file(os.path.join(self.library_path, name), content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, split_threshold):
+        library = get_content(FileParser(), self.library_path)
+        HTMLCreator(self.output_path, library, directory_delimiter=os.sep,
+                    split_threshold=split_threshold).create_html_doc()
+
+    def read_page(self, name):
+        with open(os.path.join(self.pages_path, name), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_small_modules_are_not_split(self):
+        self.build(split_threshold=None)
+        self.assertEqual(sorted(os.listdir(self.pages_path)), ['big.py.html', 'user.py.html'])
+
+        self.build(split_threshold=8)
+        self.assertEqual(sorted(os.listdir(self.pages_path)), ['big.py.html', 'user.py.html'])
+
+    def test_large_module_is_split_into_part_pages(self):
+        self.build(split_threshold=3)
+        self.assertEqual(sorted(os.listdir(self.pages_path)), ['big.py-part1.html', 'big.py-part2.html',
+                                                               'big.py-part3.html', 'big.py.html', 'user.py.html'])
+
+        # A class larger than the threshold takes a part of its own, the rest fill parts up to the threshold.
+        self.assertIn('id="Large"', self.read_page('big.py-part1.html'))
+        part2 = self.read_page('big.py-part2.html')
+        self.assertIn('id="Small"', part2)
+        self.assertIn('id="first"', part2)
+        self.assertIn('id="second"', self.read_page('big.py-part3.html'))
+
+        toc = self.read_page('big.py.html')
+        self.assertNotIn('id="Large"', toc)
+        for link in ('big.py-part1.html#Large', 'big.py-part2.html#Small', 'big.py-part2.html#first',
+                     'big.py-part3.html#second'):
+            self.assertIn(link, toc)
+
+    def test_references_and_search_point_at_the_part_pages(self):
+        self.build(split_threshold=3)
+        self.assertIn('big.py-part2.html#Small', self.read_page('user.py.html'))
+
+        with open(os.path.join(self.output_path, 'search', 'symbols_0.js'), 'r', encoding='utf-8') as f:
+            symbols = f.read()
+        self.assertIn('"big.Large.a","lib/lib/big.py-part1.html#Large.a"', symbols)
+        self.assertIn('"big.second","lib/lib/big.py-part3.html#second"', symbols)
+        self.assertIn('"big","lib/lib/big.py.html"', symbols)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Author: Reuben Ferrante
+Date:   18/10/2026
+"""
+
+from pydoc import get_content
+from pydocumenter_utils.model_serializer import ModelWriter, load_library
+from pydocumenter_utils.type_definitions import FunctionDefinition, SHARED_PARAMETERS_SIZE, share_parameters
+from python_file_parser.file_parser import FileParser
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+
+def write_file(path, content=''):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def get_tree(package):
+    """ :return: nested dict of package name --> sub-packages, as the docs lay them out. """
+    return {name: get_tree(sub_package) for name, sub_package in package.get_subpackages().items()}
+
+
+class LibraryNamedLikeItsPackageTest(unittest.TestCase):
+    """ A library directory foo holding a top level package foo, e.g. a repository checkout. """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'foo')
+        write_file(os.path.join(self.path, 'foo', '__init__.py'))
+        write_file(os.path.join(self.path, 'foo', 'bar', '__init__.py'))
+        write_file(os.path.join(self.path, 'foo', 'bar', 'baz', 'module.py'), 'def f(a): pass\n')
+        write_file(os.path.join(self.path, 'other', 'module.py'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_sub_packages_stay_nested(self):
+        library = get_content(FileParser(), self.path)
+        self.assertEqual(get_tree(library), {'foo': {'foo-bar': {'foo-bar-baz': {}}}, 'other': {}})
+        self.assertEqual(library.get_package('foo-bar').get_parent(), 'foo')
+
+    def test_model_round_trip(self):
+        library = get_content(FileParser(), self.path)
+        model = os.path.join(self.directory, 'model.jsonl')
+        with ModelWriter(model) as writer:
+            writer.write_library(library)
+        self.assertEqual(get_tree(load_library(model)), get_tree(library))
+
+
+class SharedParametersTest(unittest.TestCase):
+
+    def test_functions_with_the_same_signature_share_their_parameters(self):
+        function = FunctionDefinition('f', ['self', 'other'])
+        self.assertIs(FunctionDefinition('g', ('self', 'other')).get_parameters(), function.get_parameters())
+        self.assertIs(pickle.loads(pickle.dumps(function)).get_parameters(), function.get_parameters())
+
+    def test_only_recent_signatures_are_kept(self):
+        first = share_parameters(['first_parameter'])
+        for index in range(SHARED_PARAMETERS_SIZE):
+            share_parameters(['parameter_{}'.format(index)])
+        self.assertIsNot(share_parameters(['first_parameter']), first)
+        self.assertEqual(share_parameters(['first_parameter']), first)
+
+
+if __name__ == "__main__":
+    unittest.main()